@@ -1,125 +1,204 @@
 """
 Async Python wrapper for the MinIO command line interface.
+
+Public names are imported lazily, on first attribute access, so importing
+the package is cheap and has no side effects. The `mc` binary is looked up
+on the first command execution, see ``aiomc.utils.set_mc_binary``.
 """
 
 __title__ = 'aiomc'
 
-from .api.ls import (
-    ls,
-    async_ls,
-)
-
-from .api.mb import (
-    mb,
-    async_mb
-)
-
-from .api.rb import (
-    rb,
-    async_rb
-)
-
-from .api.cp import (
-    cp,
-    async_cp
-)
-
-
-from .api.user import (
-    admin_user_list,
-    admin_user_add,
-    admin_user_remove,
-    admin_user_enable,
-    admin_user_disable,
-    admin_user_info,
-    # Async
-    async_admin_user_list,
-    async_admin_user_add,
-    async_admin_user_remove,
-    async_admin_user_enable,
-    async_admin_user_disable,
-    async_admin_user_info,
-)
-
-
-from .api.user import (
-    admin_user_svcacct_add,
-    admin_user_svcacct_remove,
-    admin_user_svcacct_list,
-    admin_user_svcacct_info,
-    admin_user_svcacct_enable,
-    admin_user_svcacct_disable,
-    admin_user_svcacct_edit,
-    
-    # Async
-    async_admin_user_svcacct_add,
-    async_admin_user_svcacct_remove,
-    async_admin_user_svcacct_list,
-    async_admin_user_svcacct_info,
-    async_admin_user_svcacct_enable,
-    async_admin_user_svcacct_disable,
-    async_admin_user_svcacct_edit,
-    
-)
-
-from .api.config import (
-    config_host_add,
-    config_host_list,
-    async_config_host_add,
-    async_config_host_list,
-    
-)
-
-
-from .api.server import (
-    server,
-    async_server,
-)
-
-from .api.service import (
-    stop_service,
-    restart_service,
-    service_stop,
-    service_restart,
-    async_stop_service,
-    async_restart_service,
-    async_service_restart,
-    async_service_stop,
-)
-
-from .api.policy import (
-    admin_policy_add,
-    admin_policy_remove,
-    admin_policy_list,
-    admin_policy_info,
-    admin_policy_set,
-    async_admin_policy_add,
-    async_admin_policy_remove,
-    async_admin_policy_list,
-    async_admin_policy_info,
-    async_admin_policy_set,
-)
-
-from .api.group import (
-    admin_group_add,
-    admin_group_remove,
-    admin_group_info,
-    admin_group_list,
-    admin_group_enable,
-    admin_group_disable,
-    async_admin_group_add,
-    async_admin_group_remove,
-    async_admin_group_info,
-    async_admin_group_list,
-    async_admin_group_enable,
-    async_admin_group_disable,
-)
-
-from .utils import (
-    aiomcError,
-    check_error,
-    mc_binary_path,
-)
-
-assert mc_binary_path is not None, 'Unable to locate the `mc` binary required to run this module.'
-print(f'Using `mc` from: {mc_binary_path}')
+_exports = {
+    '.api.ls': (
+        'ls',
+        'async_ls',
+        'stream_ls',
+    ),
+    '.api.stat': (
+        'stat',
+        'async_stat',
+    ),
+    '.api.mb': (
+        'mb',
+        'async_mb',
+    ),
+    '.api.rb': (
+        'rb',
+        'async_rb',
+    ),
+    '.api.cp': (
+        'cp',
+        'async_cp',
+        'cp_many',
+        'async_cp_many',
+        'async_cp_progress',
+        'TransferResult',
+        'TransferSummary',
+    ),
+    '.api.mirror': (
+        'mirror',
+        'async_mirror',
+        'MirrorSummary',
+    ),
+    '.api.iam': (
+        'reconcile',
+        'async_reconcile',
+        'IAMState',
+        'IAMPlan',
+    ),
+    '.api.fanout': (
+        'fanout',
+        'async_fanout',
+        'FanoutReport',
+    ),
+    '.api.user': (
+        'admin_user_list',
+        'admin_user_add',
+        'admin_user_remove',
+        'admin_user_enable',
+        'admin_user_disable',
+        'admin_user_info',
+        # Async
+        'async_admin_user_list',
+        'async_admin_user_add',
+        'async_admin_user_remove',
+        'async_admin_user_enable',
+        'async_admin_user_disable',
+        'async_admin_user_info',
+
+        'admin_user_svcacct_add',
+        'admin_user_svcacct_remove',
+        'admin_user_svcacct_list',
+        'admin_user_svcacct_info',
+        'admin_user_svcacct_enable',
+        'admin_user_svcacct_disable',
+        'admin_user_svcacct_edit',
+        # Async
+        'async_admin_user_svcacct_add',
+        'async_admin_user_svcacct_remove',
+        'async_admin_user_svcacct_list',
+        'async_admin_user_svcacct_info',
+        'async_admin_user_svcacct_enable',
+        'async_admin_user_svcacct_disable',
+        'async_admin_user_svcacct_edit',
+    ),
+    '.api.config': (
+        'config_host_add',
+        'config_host_list',
+        'async_config_host_add',
+        'async_config_host_list',
+    ),
+    '.api.server': (
+        'server',
+        'async_server',
+    ),
+    '.api.service': (
+        'stop_service',
+        'restart_service',
+        'service_stop',
+        'service_restart',
+        'async_stop_service',
+        'async_restart_service',
+        'async_service_restart',
+        'async_service_stop',
+    ),
+    '.api.policy': (
+        'admin_policy_add',
+        'admin_policy_remove',
+        'admin_policy_list',
+        'admin_policy_info',
+        'admin_policy_set',
+        'admin_policy_unset',
+        'async_admin_policy_add',
+        'async_admin_policy_remove',
+        'async_admin_policy_list',
+        'async_admin_policy_info',
+        'async_admin_policy_set',
+        'async_admin_policy_unset',
+    ),
+    '.api.group': (
+        'admin_group_add',
+        'admin_group_remove',
+        'admin_group_info',
+        'admin_group_list',
+        'admin_group_enable',
+        'admin_group_disable',
+        'async_admin_group_add',
+        'async_admin_group_remove',
+        'async_admin_group_info',
+        'async_admin_group_list',
+        'async_admin_group_enable',
+        'async_admin_group_disable',
+    ),
+    '.utils': (
+        'aiomcError',
+        'CommandTimeoutError',
+        'TransferStalledError',
+        'set_default_timeout',
+        'get_default_timeout',
+        'MinioError',
+        'TransientError',
+        'ThrottledError',
+        'NetworkError',
+        'AccessDeniedError',
+        'NotFoundError',
+        'ConflictError',
+        'InvalidRequestError',
+        'classify_error',
+        'RetryBudget',
+        'RetryPolicy',
+        'HedgePolicy',
+        'set_retry_policy',
+        'set_hedge_policy',
+        'check_error',
+        'mc_binary_path',
+        'get_mc_binary',
+        'set_mc_binary',
+        'CommandScheduler',
+        'get_scheduler',
+        'set_scheduler',
+        'configure_scheduler',
+        'ListingFrame',
+        'ListingIndex',
+        'CommandCache',
+        'get_cache',
+        'set_cache',
+        'configure_cache',
+        'SingleFlight',
+        'get_single_flight',
+        'configure_coalescing',
+        'CommandTiming',
+        'add_listener',
+        'remove_listener',
+        'trace_commands',
+        'configure_instrumentation',
+        'export_histograms',
+        'shutdown_background_loop',
+        'map_commands',
+        'batch',
+        'Alias',
+        'register_alias',
+        'unregister_alias',
+        'registered_aliases',
+        'use_private_config_dir',
+    ),
+}
+
+_origins = {name: module for module, names in _exports.items() for name in names}
+
+__all__ = list(_origins)
+
+
+def __getattr__(name):
+    module = _origins.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    if name != 'mc_binary_path':
+        globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
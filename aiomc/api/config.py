@@ -1,8 +1,17 @@
 from aiomc.utils import *
+from aiomc.utils.alias import Alias, register_alias
+from aiomc.backends.base import make_response
+
+
+def register_host(alias: str, url: str, username: str = '', password: str = '', **kwargs) -> Response:
+    '''Registers the alias in memory, answering like `mc config host add` without touching its configuration.'''
+    host = register_alias(Alias(alias, url, username, password))
+    record = {'status': 'success', 'alias': host.name, 'URL': host.url, 'accessKey': host.access_key, 'secretKey': host.secret_key, 'api': host.api, 'lookup': host.path}
+    return make_response([record], name='config_host_add', command=f'config host add {host.name} {host.url}')
 
 ## Syncronous
 
-def config_host_add(**kwargs) -> Response:
+def config_host_add(in_memory: bool = False, **kwargs) -> Response:
     '''Add an alias for the host storage.
 
     Usage ::
@@ -21,7 +30,13 @@ def config_host_add(**kwargs) -> Response:
       'secretKey': 'soverysecret',
       'api': 's3v4',
       'lookup': 'auto'}]
+
+    With ``in_memory=True`` the alias is registered with ``register_alias``
+    instead of being written to the shared `mc` configuration; every `mc`
+    process then gets it through ``MC_HOST_<alias>``.
     '''
+    if in_memory:
+        return register_host(**kwargs)
     cmd = Command('mc {flags} config host add {alias} {url} {username} {password}')
     return cmd(**kwargs)
 
@@ -63,7 +78,7 @@ def config_host_list(**kwargs) -> Response:
     return cmd(**kwargs)
 
 
-async def async_config_host_add(**kwargs) -> Response:
+async def async_config_host_add(in_memory: bool = False, **kwargs) -> Response:
     '''Add an alias for the host storage.
 
     Usage ::
@@ -82,7 +97,13 @@ async def async_config_host_add(**kwargs) -> Response:
       'secretKey': 'soverysecret',
       'api': 's3v4',
       'lookup': 'auto'}]
+
+    With ``in_memory=True`` the alias is registered with ``register_alias``
+    instead of being written to the shared `mc` configuration; every `mc`
+    process then gets it through ``MC_HOST_<alias>``.
     '''
+    if in_memory:
+        return register_host(**kwargs)
     cmd = AsyncCommand('mc {flags} config host add {alias} {url} {username} {password}')
     return await cmd.run(**kwargs)
 
@@ -1,4 +1,10 @@
+import time
+import asyncio
+import collections
+from typing import Any, Iterable, AsyncIterable, Union
 from aiomc.utils import *
+from aiomc.utils.executor import run_sync
+from aiomc.backends import dispatch, async_dispatch
 
 def cp(**kwargs) -> Response:
     '''Copy objects.
@@ -53,9 +59,14 @@ def cp(**kwargs) -> Response:
     :param legal_hold: apply legal hold to the copied object (on, off)
     :param encrypt_key: encrypt/decrypt objects using server-side encryption
            with customer provided keys
+    :param backend: backend serving the call, 'mc' or 'native'. Defaults to
+                    the global backend, see ``aiomc.backends.set_backend``.
 
 
     '''
+    response = dispatch('cp', kwargs)
+    if response is not None:
+        return response
     cmd = Command('mc {flags} cp {source} {target}')
     return cmd(**kwargs)
 
@@ -113,8 +124,333 @@ async def async_cp(**kwargs) -> Response:
     :param legal_hold: apply legal hold to the copied object (on, off)
     :param encrypt_key: encrypt/decrypt objects using server-side encryption
            with customer provided keys
+    :param backend: backend serving the call, 'mc' or 'native'. Defaults to
+                    the global backend, see ``aiomc.backends.set_backend``.
 
 
     '''
+    response = await async_dispatch('cp', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand('mc {flags} cp {source} {target}')
-    return await cmd.run(**kwargs)
\ No newline at end of file
+    return await cmd.run(**kwargs)
+
+
+class TransferResult(object):
+    '''Outcome of a single job run by ``async_cp_many``.'''
+
+    def __init__(self, source=None, target=None, flags=None, status='success', bytes=0, elapsed=0.0, error=None, response=None):
+        self.source = source
+        self.target = target
+        self.flags = flags or {}
+        self.status = status
+        self.bytes = bytes
+        self.elapsed = elapsed
+        self.error = error
+        self.response = response
+
+    @property
+    def job(self) -> tuple:
+        '''The ``(source, target, flags)`` job, ready to be submitted again.'''
+        return (self.source, self.target, self.flags)
+
+    @property
+    def throughput(self) -> float:
+        '''Bytes per second.'''
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[source='{self.source}', target='{self.target}', status='{self.status}', bytes={self.bytes}]"
+
+
+class TransferSummary(object):
+    '''Aggregated outcome of ``async_cp_many``, results are in submission order.'''
+
+    def __init__(self, results=None, elapsed=0.0):
+        self.results = results or []
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self) -> list:
+        return [result for result in self.results if result.status == 'success']
+
+    @property
+    def failed(self) -> list:
+        return [result for result in self.results if result.status != 'success']
+
+    @property
+    def failed_jobs(self) -> list:
+        '''Jobs that failed, in a form accepted by ``async_cp_many`` for a retry.'''
+        return [result.job for result in self.failed]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    @property
+    def bytes(self) -> int:
+        return sum(result.bytes for result in self.results)
+
+    @property
+    def throughput(self) -> float:
+        '''Aggregate bytes per second over the wall-clock duration of the batch.'''
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[jobs={len(self.results)}, failed={len(self.failed)}, bytes={self.bytes}, elapsed={self.elapsed:.3f}]"
+
+
+def make_job(job: Any) -> tuple:
+    '''Normalises a job given as a tuple or a dict into ``(source, target, flags)``.'''
+    if isinstance(job, dict):
+        flags = dict(job)
+        return (flags.pop('source'), flags.pop('target'), flags)
+    source, target, *rest = job
+    return (source, target, dict(rest[0]) if rest and rest[0] else {})
+
+
+def response_records(response: Response) -> list:
+    content = response.content
+    if isinstance(content, list):
+        return content
+    return [content] if content else []
+
+
+async def run_cp_job(job: tuple) -> TransferResult:
+    source, target, flags = job
+    start = time.perf_counter()
+    try:
+        response = await async_cp(source=source, target=target, **flags)
+    except Exception as e:
+        return TransferResult(source, target, flags, status='error', elapsed=time.perf_counter() - start, error=str(e) or repr(e))
+    elapsed = time.perf_counter() - start
+    moved, error = 0, None
+    for record in response_records(response):
+        if not isinstance(record, dict):
+            continue
+        if record.get('status') == 'error':
+            message = record.get('error', {}).get('message', '')
+            cause = record.get('error', {}).get('cause', {}).get('message', '')
+            error = f'{message}:{cause}'
+        else:
+            moved += record.get('size') or 0
+    return TransferResult(source, target, flags, status='error' if error else 'success', bytes=moved, elapsed=elapsed, error=error, response=response)
+
+
+async def async_cp_many(jobs: Union[Iterable, AsyncIterable], concurrency: int = 8) -> TransferSummary:
+    '''Copy many objects with a pool of concurrent `mc cp` processes.
+
+    Jobs are pulled from `jobs` only as workers free up, so a large (async)
+    iterator is never materialised ahead of the copies.
+
+    Usage::
+
+      >>> summary = await async_cp_many([
+            ('backup/2014/', 'play/archive/2014/', {'recursive': True}),
+            ('backup/2015/', 'play/archive/2015/', {'recursive': True}),
+            {'source': 'myobject.txt', 'target': 'play/mybucket', 'preserve': True},
+          ], concurrency=16)
+      >>> summary
+      TransferSummary[jobs=3, failed=1, bytes=10485760, elapsed=2.104]
+      >>> summary.failed[0].error
+      'Unable to validate source.:...'
+      >>> retried = await async_cp_many(summary.failed_jobs)
+
+    :param jobs: iterable or async iterable of ``(source, target)`` or
+                 ``(source, target, flags)`` tuples, or of dicts with
+                 ``source``, ``target`` and any ``async_cp`` flags.
+    :param concurrency: number of copies running at once. Defaults to 8.
+    '''
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = {}
+
+    async def produce():
+        index = 0
+        if hasattr(jobs, '__aiter__'):
+            async for job in jobs:
+                await queue.put((index, make_job(job)))
+                index += 1
+        else:
+            for job in jobs:
+                await queue.put((index, make_job(job)))
+                index += 1
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, job = item
+            results[index] = await run_cp_job(job)
+
+    start = time.perf_counter()
+    workers = [asyncio.ensure_future(work()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(produce(), *workers)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        raise
+    return TransferSummary([results[index] for index in sorted(results)], elapsed=time.perf_counter() - start)
+
+
+def cp_many(jobs: Iterable, concurrency: int = 8) -> TransferSummary:
+    '''Copy many objects with a pool of concurrent `mc cp` processes.
+
+    Synchronous version of ``async_cp_many``.
+
+    Usage::
+
+      >>> summary = cp_many([('Music/a.ogg', 's3/jukebox/'), ('Music/b.ogg', 's3/jukebox/')], concurrency=4)
+      >>> summary.ok
+      True
+    '''
+    return run_sync(async_cp_many, jobs, concurrency=concurrency)
+
+
+class Throughput(object):
+    '''Rolling transfer rate over the last `window` seconds.'''
+
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self.samples = collections.deque()
+
+    def add(self, now: float, transferred: int):
+        '''Records that `transferred` bytes in total had been moved at time `now`.'''
+        self.samples.append((now, transferred))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+
+    def rate(self, now: float) -> float:
+        '''Bytes per second between the oldest sample in the window and `now`.'''
+        if not self.samples:
+            return 0.0
+        start, first = self.samples[0]
+        _, last = self.samples[-1]
+        return (last - first) / (now - start) if now > start else 0.0
+
+
+class CopyEvent(object):
+    '''Progress of an ``async_cp_progress`` copy, at the time one `mc` record came in.
+
+    :param record: the `mc` record the event is built from.
+    :param transferred: bytes copied so far.
+    :param total: bytes to copy in all, when `mc` reports it.
+    :param elapsed: seconds since the copy started.
+    :param throughput: bytes per second over the rolling window.
+    '''
+
+    kind = 'progress'
+
+    def __init__(self, record=None, transferred=0, total=None, elapsed=0.0, throughput=0.0):
+        self.record = record or {}
+        self.transferred = transferred
+        self.total = total
+        self.elapsed = elapsed
+        self.throughput = throughput
+
+    @property
+    def average(self) -> float:
+        '''Bytes per second since the copy started.'''
+        return self.transferred / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fraction(self):
+        '''Share of `total` copied so far, None when the total is unknown.'''
+        return min(1.0, self.transferred / self.total) if self.total else None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[transferred={self.transferred}, total={self.total}, throughput={self.throughput:.0f}]"
+
+
+class ObjectCopied(CopyEvent):
+    '''One object has been copied.'''
+
+    kind = 'object'
+
+    def __init__(self, source=None, target=None, size=0, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.target = target
+        self.size = size
+
+
+class TransferStats(CopyEvent):
+    '''Transfer statistics printed by `mc`, with the speed it measured.'''
+
+    kind = 'stats'
+
+    def __init__(self, speed=None, duration=None, **kwargs):
+        super().__init__(**kwargs)
+        self.speed = speed
+        self.duration = duration
+
+
+class CopyFailed(CopyEvent):
+    '''`mc` reported an error; the copy goes on with the other objects.'''
+
+    kind = 'error'
+
+    def __init__(self, error=None, **kwargs):
+        super().__init__(**kwargs)
+        self.error = error
+
+
+async def async_cp_progress(stall_timeout: float = None, window: float = 10.0, **kwargs):
+    '''Copy objects and yield progress events as `mc` reports them.
+
+    Events are ``ObjectCopied`` when an object is done, ``CopyFailed`` for
+    error records and ``TransferStats`` for the transfer statistics `mc`
+    prints, each with the bytes transferred so far, the total when known and
+    the throughput over the last `window` seconds. `mc` reports progress
+    once per object, so `stall_timeout` has to exceed the time taken by the
+    largest object. Stopping the iteration stops `mc`.
+
+    Usage::
+
+      >>> async for event in async_cp_progress(recursive=True, source='backup/', target='s3/archive/', stall_timeout=300):
+      ...     if event.kind == 'object':
+      ...         print(event.target, f'{event.throughput / 2 ** 20:.1f} MiB/s', event.fraction)
+      Traceback (most recent call last):
+      TransferStalledError: No progress for 300s after 73400320 bytes: mc cp backup/ s3/archive/
+
+    :param stall_timeout: seconds without any record after which `mc` is
+                          stopped and ``TransferStalledError`` raised. None
+                          waits forever.
+    :param window: seconds over which ``throughput`` is computed.
+    :param kwargs: ``source``, ``target`` and any ``async_cp`` flags.
+    '''
+    records = AsyncCommand('mc {flags} cp {source} {target}').stream(**kwargs)
+    meter = Throughput(window)
+    start = time.monotonic()
+    meter.add(start, 0)
+    transferred, total = 0, None
+    try:
+        while True:
+            try:
+                record = await asyncio.wait_for(records.__anext__(), stall_timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                raise TransferStalledError(f"mc cp {kwargs.get('source')} {kwargs.get('target')}", stall_timeout, transferred) from None
+            if not isinstance(record, dict):
+                continue
+            now = time.monotonic()
+            if record.get('status') == 'error':
+                event = CopyFailed(error=classify_error(record))
+            elif 'source' in record or 'target' in record:
+                transferred += record.get('size') or 0
+                total = record.get('totalSize') or total
+                event = ObjectCopied(source=record.get('source'), target=record.get('target'), size=record.get('size') or 0)
+            else:
+                transferred = max(transferred, record.get('transferred') or 0)
+                total = record.get('total') or total
+                event = TransferStats(speed=record.get('speed'), duration=record.get('duration'))
+            meter.add(now, transferred)
+            event.record, event.transferred, event.total = record, transferred, total
+            event.elapsed, event.throughput = now - start, meter.rate(now)
+            yield event
+    finally:
+        await records.aclose()
@@ -0,0 +1,232 @@
+'''Run one command against many aliases at once.'''
+
+import sys
+import time
+import fnmatch
+import asyncio
+import threading
+import contextlib
+from typing import Iterable, Optional, Union
+from aiomc.utils import *
+from aiomc.utils.executor import run_sync
+from aiomc.utils.alias import list_aliases
+from aiomc.utils.scheduler import get_scheduler
+
+__all__ = [
+    'FanoutResult',
+    'FanoutReport',
+    'resolve_aliases',
+    'fanout',
+    'async_fanout',
+]
+
+
+class FanoutResult(object):
+    '''Outcome of a fanned out command on one alias.
+
+    ``status`` is ``'success'``, ``'error'`` when the command raised or `mc`
+    reported an error, or ``'timeout'`` when the alias was still running at
+    the straggler timeout.
+    '''
+
+    def __init__(self, alias: str, status: str = 'success', response=None, error=None, elapsed: float = 0.0):
+        self.alias = alias
+        self.status = status
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def content(self):
+        return self.response.content if self.response is not None else None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[alias='{self.alias}', status='{self.status}', elapsed={self.elapsed:.3f}]"
+
+
+class FanoutReport(dict):
+    '''Results of ``async_fanout`` keyed by alias, with the partial failures at hand.'''
+
+    def __init__(self, results=(), elapsed: float = 0.0):
+        super().__init__((result.alias, result) for result in results)
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self) -> list:
+        return [alias for alias, result in self.items() if result.status == 'success']
+
+    @property
+    def failed(self) -> list:
+        return [alias for alias, result in self.items() if result.status == 'error']
+
+    @property
+    def timed_out(self) -> list:
+        return [alias for alias, result in self.items() if result.status == 'timeout']
+
+    @property
+    def ok(self) -> bool:
+        return len(self.succeeded) == len(self)
+
+    @property
+    def partial(self) -> bool:
+        '''Some aliases succeeded and some did not.'''
+        return bool(self.succeeded) and not self.ok
+
+    def contents(self) -> dict:
+        '''Content of each successful response, keyed by alias.'''
+        return {alias: result.content for alias, result in self.items() if result.status == 'success'}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[aliases={len(self)}, succeeded={len(self.succeeded)}, failed={len(self.failed)}, timed_out={len(self.timed_out)}, elapsed={self.elapsed:.3f}]"
+
+
+def resolve_aliases(aliases: Union[str, Iterable[str]]) -> list:
+    '''Expands glob patterns such as ``'prod-*'`` against the known aliases, keeping plain names as given.'''
+    if isinstance(aliases, str):
+        aliases = [aliases]
+    known, resolved = None, []
+    for pattern in aliases:
+        if any(char in pattern for char in '*?['):
+            known = list_aliases() if known is None else known
+            matches = fnmatch.filter(known, pattern)
+        else:
+            matches = [pattern]
+        resolved.extend(name for name in matches if name not in resolved)
+    return resolved
+
+
+# Limits installed by running fan-outs: ``(id(scheduler), alias)`` to ``[fan-outs using it, limit]``.
+_temporary_limits = {}
+_limits_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def temporary_limits(scheduler, names: list, limit: Optional[int]):
+    '''Limits the `mc` processes of each alias in `names` while the block runs.
+
+    Aliases with a limit of their own keep it. The limit is shared by
+    overlapping fan-outs and removed when the last of them is done, unless
+    it was changed with ``set_limit`` in the meantime.
+    '''
+    used = []
+    if limit is not None:
+        with _limits_lock:
+            for name in names:
+                entry = _temporary_limits.get((id(scheduler), name))
+                if entry is not None:
+                    entry[0] += 1
+                elif name not in scheduler.key_limits:
+                    scheduler.set_limit(name, limit)
+                    entry = _temporary_limits[(id(scheduler), name)] = [1, limit]
+                else:
+                    continue
+                used.append(name)
+    try:
+        yield
+    finally:
+        with _limits_lock:
+            for name in used:
+                entry = _temporary_limits[(id(scheduler), name)]
+                entry[0] -= 1
+                if not entry[0]:
+                    del _temporary_limits[(id(scheduler), name)]
+                    if scheduler.key_limits.get(name) == entry[1]:
+                        scheduler.set_limit(name, None)
+
+
+def async_variant(fn):
+    '''The ``async_`` twin of a sync aiomc API function, which can be cancelled; `fn` itself otherwise.'''
+    if asyncio.iscoroutinefunction(fn) or not getattr(fn, '__module__', '').startswith('aiomc.api.'):
+        return fn
+    return getattr(sys.modules[fn.__module__], f'async_{fn.__name__}', fn)
+
+
+async def call_alias(fn, alias: str, kwargs: dict) -> FanoutResult:
+    start = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(fn):
+            response = await fn(**kwargs)
+        else:
+            response = await asyncio.get_running_loop().run_in_executor(None, lambda: fn(**kwargs))
+    except Exception as e:
+        return FanoutResult(alias, 'error', error=e, elapsed=time.perf_counter() - start)
+    error = None
+    if isinstance(response, Response) and response.status == 'error':
+        content = response.content
+        error = classify_error(content if isinstance(content, dict) else next((record for record in content if isinstance(record, dict) and record.get('status') == 'error'), {}))
+    return FanoutResult(alias, 'error' if error else 'success', response=response, error=error, elapsed=time.perf_counter() - start)
+
+
+async def async_fanout(fn, aliases: Union[str, Iterable[str]], path: str = '', alias_arg: str = 'target', timeout: Optional[float] = None,
+                       concurrency: Optional[int] = None, per_alias_limit: Optional[int] = None, **kwargs) -> FanoutReport:
+    '''Runs ``fn`` against every alias concurrently and returns the results keyed by alias.
+
+    The whole fleet takes about as long as its slowest alias. With a
+    `timeout`, aliases still running when it expires are cancelled, which
+    stops their `mc`, and reported as ``'timeout'``; the others keep their
+    results. Errors are reported per alias and never raised.
+
+    Sync aiomc API functions are replaced by their ``async_`` version. Other
+    sync callables run in threads, and those cannot be cancelled: at the
+    timeout they are reported as ``'timeout'`` but keep running.
+
+    Usage::
+
+      >>> report = await async_fanout(async_admin_user_list, 'prod-*', timeout=30)
+      >>> report
+      FanoutReport[aliases=40, succeeded=38, failed=1, timed_out=1, elapsed=30.002]
+      >>> report['prod-eu-1'].content
+      >>> report.failed, report.timed_out
+      (['prod-us-3'], ['prod-ap-2'])
+      >>> await async_fanout(async_ls, ['prod-eu-1', 'prod-eu-2'], path='logs/2024/', recursive=True)
+
+    :param fn: an API function, such as ``async_ls``, or any callable taking the target.
+    :param aliases: alias names or glob patterns matched against the configured aliases.
+    :param path: appended to the alias, ``'bucket/prefix'`` targets ``'<alias>/bucket/prefix'``.
+    :param alias_arg: argument of `fn` taking the target, ``'alias'`` for ``async_config_host_list``.
+    :param timeout: seconds after which the aliases still running are given up on.
+    :param concurrency: number of aliases handled at once, all of them by default.
+    :param per_alias_limit: maximum number of `mc` processes per alias while
+                            the fan-out runs, for aliases without a limit of their own.
+    :param kwargs: any other argument of `fn`.
+    '''
+    names = resolve_aliases(aliases)
+    fn = async_variant(fn)
+    semaphore = asyncio.Semaphore(concurrency or max(1, len(names)))
+
+    async def run(name: str) -> FanoutResult:
+        async with semaphore:
+            return await call_alias(fn, name, dict(kwargs, **{alias_arg: f"{name}/{path.lstrip('/')}" if path else name}))
+    start = time.perf_counter()
+    with temporary_limits(get_scheduler(), names, per_alias_limit):
+        tasks = {asyncio.ensure_future(run(name)): name for name in names}
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout) if tasks else (set(), set())
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            for task in tasks:
+                task.cancel()
+    elapsed = time.perf_counter() - start
+    results = []
+    for task, name in tasks.items():
+        if task in done:
+            results.append(task.result())
+        else:
+            results.append(FanoutResult(name, 'timeout', error=TimeoutError(f'{name} still running after {timeout}s'), elapsed=elapsed))
+    return FanoutReport(results, elapsed=elapsed)
+
+
+def fanout(fn, aliases: Union[str, Iterable[str]], path: str = '', alias_arg: str = 'target', timeout: Optional[float] = None,
+           concurrency: Optional[int] = None, per_alias_limit: Optional[int] = None, **kwargs) -> FanoutReport:
+    '''Runs ``fn`` against every alias concurrently and returns the results keyed by alias.
+
+    Synchronous version of ``async_fanout``; `fn` may be a sync or an async API function.
+
+    Usage::
+
+      >>> fanout(async_admin_user_list, 'prod-*', timeout=30).contents()
+    '''
+    return run_sync(async_fanout, fn, aliases, path=path, alias_arg=alias_arg, timeout=timeout, concurrency=concurrency, per_alias_limit=per_alias_limit, **kwargs)
@@ -1,4 +1,5 @@
 from aiomc.utils import *
+from aiomc.backends import dispatch, async_dispatch
 
 __all__ = [
     'admin_group_add',
@@ -28,8 +29,11 @@ def admin_group_add(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins', 'members': ['rockstar', 'test']}
     '''
-    if not isinstance(kwargs['members'], str):
-        kwargs['members'] = ' '.join(kwargs['members'])
+    response = dispatch('admin_group_add', kwargs)
+    if response is not None:
+        return response
+    if isinstance(kwargs['members'], str):
+        kwargs['members'] = kwargs['members'].split()
 
     cmd = Command(GROUP_COMMAND + 'add {target} {group} {members}')
 
@@ -50,10 +54,12 @@ def admin_group_remove(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins'}
     '''
-    if 'members' not in kwargs:
-        kwargs['members'] = ''
-    elif not isinstance(kwargs['members'], str):
-        kwargs['members'] = ' '.join(kwargs['members'])
+    response = dispatch('admin_group_remove', kwargs)
+    if response is not None:
+        return response
+    kwargs['members'] = kwargs.get('members') or []
+    if isinstance(kwargs['members'], str):
+        kwargs['members'] = kwargs['members'].split()
 
     cmd = Command(GROUP_COMMAND + 'remove {target} {group} {members}')
 
@@ -70,6 +76,9 @@ def admin_group_info(**kwargs) -> Response:
       {'status': 'success', 'groupName': 'admins', 'members': ['rockstar', 'test'],
       'groupStatus': 'enabled', 'groupPolicy': 'somePolicy'}
     '''
+    response = dispatch('admin_group_info', kwargs)
+    if response is not None:
+        return response
     cmd = Command(GROUP_COMMAND + 'info {target} {group}')
     return cmd(**kwargs)
 
@@ -83,6 +92,9 @@ def admin_group_list(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groups': ['foo', 'bar', 'admins']}
     '''
+    response = dispatch('admin_group_list', kwargs)
+    if response is not None:
+        return response
     cmd = Command(GROUP_COMMAND + 'list {target}')
     return cmd(**kwargs)
 
@@ -96,6 +108,9 @@ def admin_group_enable(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins', 'groupStatus': 'enabled'}
     '''
+    response = dispatch('admin_group_enable', kwargs)
+    if response is not None:
+        return response
     cmd = Command(GROUP_COMMAND + 'enable {target} {group}')
     return cmd(**kwargs)
 
@@ -109,6 +124,9 @@ def admin_group_disable(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins', 'groupStatus': 'disabled'}
     '''
+    response = dispatch('admin_group_disable', kwargs)
+    if response is not None:
+        return response
     cmd = Command(GROUP_COMMAND + 'disable {target} {group}')
     return cmd(**kwargs)
 
@@ -125,8 +143,11 @@ async def async_admin_group_add(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins', 'members': ['rockstar', 'test']}
     '''
-    if not isinstance(kwargs['members'], str):
-        kwargs['members'] = ' '.join(kwargs['members'])
+    response = await async_dispatch('admin_group_add', kwargs)
+    if response is not None:
+        return response
+    if isinstance(kwargs['members'], str):
+        kwargs['members'] = kwargs['members'].split()
 
     cmd = AsyncCommand(GROUP_COMMAND + 'add {target} {group} {members}')
 
@@ -147,10 +168,12 @@ async def async_admin_group_remove(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins'}
     '''
-    if 'members' not in kwargs:
-        kwargs['members'] = ''
-    elif not isinstance(kwargs['members'], str):
-        kwargs['members'] = ' '.join(kwargs['members'])
+    response = await async_dispatch('admin_group_remove', kwargs)
+    if response is not None:
+        return response
+    kwargs['members'] = kwargs.get('members') or []
+    if isinstance(kwargs['members'], str):
+        kwargs['members'] = kwargs['members'].split()
 
     cmd = AsyncCommand(GROUP_COMMAND + 'remove {target} {group} {members}')
     return await cmd.run(**kwargs)
@@ -166,6 +189,9 @@ async def async_admin_group_info(**kwargs) -> Response:
       {'status': 'success', 'groupName': 'admins', 'members': ['rockstar', 'test'],
       'groupStatus': 'enabled', 'groupPolicy': 'somePolicy'}
     '''
+    response = await async_dispatch('admin_group_info', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(GROUP_COMMAND + 'info {target} {group}')
     return await cmd.run(**kwargs)
 
@@ -179,6 +205,9 @@ async def async_admin_group_list(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groups': ['foo', 'bar', 'admins']}
     '''
+    response = await async_dispatch('admin_group_list', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(GROUP_COMMAND + 'list {target}')
     return await cmd.run(**kwargs)
 
@@ -192,6 +221,9 @@ async def async_admin_group_enable(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins', 'groupStatus': 'enabled'}
     '''
+    response = await async_dispatch('admin_group_enable', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(GROUP_COMMAND + 'enable {target} {group}')
     return await cmd.run(**kwargs)
 
@@ -206,5 +238,8 @@ async def async_admin_group_disable(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'groupName': 'admins', 'groupStatus': 'disabled'}
     '''
+    response = await async_dispatch('admin_group_disable', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(GROUP_COMMAND + 'disable {target} {group}')
     return await cmd.run(**kwargs)
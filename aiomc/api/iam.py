@@ -0,0 +1,332 @@
+'''Declarative IAM: bring users, groups, policies and attachments to a desired state with the fewest commands.'''
+
+import asyncio
+from typing import Optional
+from aiomc.utils import *
+from aiomc.utils.executor import run_sync
+from aiomc.api.user import async_admin_user_list, async_admin_user_add, async_admin_user_remove, async_admin_user_enable, async_admin_user_disable
+from aiomc.api.group import async_admin_group_list, async_admin_group_info, async_admin_group_add, async_admin_group_remove, async_admin_group_enable, async_admin_group_disable
+from aiomc.api.policy import async_admin_policy_list, async_admin_policy_info, async_admin_policy_add, async_admin_policy_remove, async_admin_policy_set, async_admin_policy_unset, policy_hash
+
+__all__ = [
+    'IAMState',
+    'IAMOperation',
+    'IAMPlan',
+    'ReconcileReport',
+    'fetch_iam_state',
+    'plan_iam',
+    'reconcile',
+    'async_reconcile',
+]
+
+# Policies every MinIO deployment ships with, never removed when pruning.
+BUILTIN_POLICIES = frozenset({'readwrite', 'readonly', 'writeonly', 'diagnostics', 'consoleAdmin'})
+
+# Operations run phase by phase, each phase concurrently. Enabling and
+# disabling come after the users and groups phases, which create them.
+PHASES = ('policies', 'users', 'groups', 'status', 'attachments', 'prune')
+
+
+def policy_names(policy) -> str:
+    '''Attached policies as mc takes them: sorted and comma separated.'''
+    if not policy:
+        return ''
+    if isinstance(policy, str):
+        policy = policy.split(',')
+    return ','.join(sorted(name.strip() for name in policy if name.strip()))
+
+
+def records(response: Response) -> list:
+    content = response.content
+    items = content if isinstance(content, list) else [content] if content else []
+    for record in items:
+        if isinstance(record, dict) and record.get('status') == 'error':
+            raise classify_error(record)
+    return [record for record in items if isinstance(record, dict)]
+
+
+class IAMState(object):
+    '''Users, groups and policies of a deployment, in the form ``reconcile`` takes.
+
+    - ``policies``: name to policy document,
+    - ``users``: access key to ``{'status', 'policy', 'secret'}``,
+    - ``groups``: name to ``{'status', 'policy', 'members'}``.
+
+    A ``policy`` left out keeps the attached policies as they are, an empty
+    one detaches them.
+
+    Usage::
+
+      >>> IAMState.from_dict({
+            'policies': {'logs-rw': {'Version': '2012-10-17', 'Statement': [...]}},
+            'users': {'rockstar': {'secret': 'verysecretpassword', 'policy': 'logs-rw'}},
+            'groups': {'admins': {'members': ['rockstar'], 'policy': 'consoleAdmin'}},
+          })
+    '''
+
+    def __init__(self, policies=None, users=None, groups=None):
+        self.policies = policies or {}
+        self.users = users or {}
+        self.groups = groups or {}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'IAMState':
+        users = {name: dict({'status': 'enabled', 'policy': None}, **(spec or {})) for name, spec in (state.get('users') or {}).items()}
+        groups = {name: dict({'status': 'enabled', 'policy': None, 'members': []}, **(spec or {})) for name, spec in (state.get('groups') or {}).items()}
+        for spec in list(users.values()) + list(groups.values()):
+            if spec['policy'] is not None:
+                spec['policy'] = policy_names(spec['policy'])
+        return cls(dict(state.get('policies') or {}), users, groups)
+
+    def as_dict(self) -> dict:
+        return {'policies': self.policies, 'users': self.users, 'groups': self.groups}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[policies={len(self.policies)}, users={len(self.users)}, groups={len(self.groups)}]"
+
+
+async def fetch_iam_state(target: str, policies=None) -> IAMState:
+    '''Reads the current IAM state of `target` in one round of concurrent commands.
+
+    :param policies: names of the policies whose documents are fetched, all of them by default.
+    '''
+    users, groups, listed = await asyncio.gather(
+        async_admin_user_list(target=target),
+        async_admin_group_list(target=target),
+        async_admin_policy_list(target=target),
+    )
+    state = IAMState()
+    for record in records(users):
+        if record.get('accessKey'):
+            state.users[record['accessKey']] = {'status': record.get('userStatus', 'enabled'), 'policy': policy_names(record.get('policyName'))}
+    group_names = [name for record in records(groups) for name in record.get('groups') or []]
+    policy_list = [record['policy'] for record in records(listed) if record.get('policy')]
+    wanted = policy_list if policies is None else [name for name in policy_list if name in policies]
+
+    async def group(name: str):
+        record = records(await async_admin_group_info(target=target, group=name))[0]
+        state.groups[name] = {'status': record.get('groupStatus', 'enabled'), 'policy': policy_names(record.get('groupPolicy')), 'members': sorted(record.get('members') or [])}
+
+    async def policy(name: str):
+        record = records(await async_admin_policy_info(target=target, name=name))[0]
+        info = record.get('policyInfo') or {}
+        state.policies[name] = record.get('policyJSON') or info.get('policy') or {}
+    await asyncio.gather(*(group(name) for name in group_names), *(policy(name) for name in wanted))
+    for name in policy_list:
+        state.policies.setdefault(name, None)
+    return state
+
+
+class IAMOperation(object):
+    '''One command of an ``IAMPlan``.'''
+
+    def __init__(self, phase: str, action: str, kind: str, name: str, call=None, kwargs=None, detail: str = ''):
+        self.phase = phase
+        self.action = action
+        self.kind = kind
+        self.name = name
+        self.call = call
+        self.kwargs = kwargs or {}
+        self.detail = detail
+        self.status = 'pending'
+        self.error = None
+
+    def describe(self) -> str:
+        return f"{self.action} {self.kind} {self.name}" + (f' ({self.detail})' if self.detail else '')
+
+    def as_dict(self) -> dict:
+        return {'phase': self.phase, 'action': self.action, 'kind': self.kind, 'name': self.name, 'detail': self.detail, 'status': self.status, 'error': self.error}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[{self.describe()}, status='{self.status}']"
+
+
+class IAMPlan(object):
+    '''The operations turning a current IAM state into a desired one, grouped in phases.
+
+    Policies are created before users and groups, which exist before policies
+    are attached to them; removals come last.
+    '''
+
+    def __init__(self, target: str, operations=None):
+        self.target = target
+        self.operations = operations or []
+
+    def phase(self, name: str) -> list:
+        return [operation for operation in self.operations if operation.phase == name]
+
+    @property
+    def empty(self) -> bool:
+        return not self.operations
+
+    def describe(self) -> str:
+        '''The plan, one operation per line, phase by phase.'''
+        lines = []
+        for name in PHASES:
+            operations = self.phase(name)
+            if operations:
+                lines.append(f'{name}:')
+                lines.extend(f'  {operation.describe()}' for operation in operations)
+        return '\n'.join(lines) or 'no changes'
+
+    def as_dict(self) -> dict:
+        return {'target': self.target, 'operations': [operation.as_dict() for operation in self.operations]}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[target='{self.target}', operations={len(self.operations)}]"
+
+
+def plan_iam(current: IAMState, desired: IAMState, target: str, prune: bool = False) -> IAMPlan:
+    '''Computes the fewest operations taking `current` to `desired`.
+
+    Secrets cannot be read back, so they are only used to create users;
+    `mc` cannot create empty groups, so new groups need members.
+    Without `prune`, users, groups and policies missing from `desired` are
+    left alone; built-in policies are never removed.
+    '''
+    plan = IAMPlan(target)
+    add = plan.operations.append
+
+    def attach(name: str, kind: str, policy: Optional[str], existing: str):
+        if policy is None:
+            return
+        if policy and policy != existing:
+            add(IAMOperation('attachments', 'set', 'policy', policy, async_admin_policy_set, {'name': policy, kind: name}, detail=f'{kind}={name}'))
+        elif not policy and existing:
+            add(IAMOperation('attachments', 'unset', 'policy', existing, async_admin_policy_unset, {'name': existing, kind: name}, detail=f'{kind}={name}'))
+    for name, document in sorted(desired.policies.items()):
+        existing = current.policies.get(name, False)
+        if existing is False or existing is None or policy_hash(existing) != policy_hash(document):
+            add(IAMOperation('policies', 'add' if existing is False else 'update', 'policy', name, async_admin_policy_add, {'name': name, 'document': document, 'skip_identical': False}))
+    for name, spec in sorted(desired.users.items()):
+        existing = current.users.get(name)
+        if existing is None:
+            if not spec.get('secret'):
+                raise ValueError(f'User {name} does not exist and has no secret to create it with')
+            add(IAMOperation('users', 'add', 'user', name, async_admin_user_add, {'username': name, 'password': spec['secret']}))
+            existing = {'status': 'enabled', 'policy': ''}
+        if spec['status'] != existing['status']:
+            call = async_admin_user_enable if spec['status'] == 'enabled' else async_admin_user_disable
+            add(IAMOperation('status', spec['status'][:-1], 'user', name, call, {'username': name}))
+        attach(name, 'user', spec['policy'], existing['policy'])
+    for name, spec in sorted(desired.groups.items()):
+        existing = current.groups.get(name)
+        members = sorted(set(spec['members']))
+        current_members = set(existing['members']) if existing else set()
+        missing = [member for member in members if member not in current_members]
+        extra = sorted(current_members.difference(members))
+        if existing is None and not members:
+            raise ValueError(f'Group {name} does not exist and has no members to create it with')
+        if existing is None or missing:
+            add(IAMOperation('groups', 'add' if existing is None else 'update', 'group', name, async_admin_group_add, {'group': name, 'members': missing}, detail=f"+{','.join(missing)}" if missing else ''))
+            existing = existing or {'status': 'enabled', 'policy': ''}
+        if extra:
+            add(IAMOperation('groups', 'update', 'group', name, async_admin_group_remove, {'group': name, 'members': extra}, detail=f"-{','.join(extra)}"))
+        if spec['status'] != existing['status']:
+            call = async_admin_group_enable if spec['status'] == 'enabled' else async_admin_group_disable
+            add(IAMOperation('status', spec['status'][:-1], 'group', name, call, {'group': name}))
+        attach(name, 'group', spec['policy'], existing['policy'])
+    if prune:
+        for name in sorted(set(current.groups).difference(desired.groups)):
+            # Only empty groups can be removed.
+            if current.groups[name]['members']:
+                add(IAMOperation('groups', 'update', 'group', name, async_admin_group_remove, {'group': name, 'members': current.groups[name]['members']}, detail='-' + ','.join(current.groups[name]['members'])))
+            add(IAMOperation('prune', 'remove', 'group', name, async_admin_group_remove, {'group': name}))
+        for name in sorted(set(current.users).difference(desired.users)):
+            add(IAMOperation('prune', 'remove', 'user', name, async_admin_user_remove, {'username': name}))
+        for name in sorted(set(current.policies).difference(desired.policies, BUILTIN_POLICIES)):
+            add(IAMOperation('prune', 'remove', 'policy', name, async_admin_policy_remove, {'name': name}))
+    return plan
+
+
+class ReconcileReport(object):
+    '''Outcome of ``reconcile``: the plan, with the status of each operation.'''
+
+    def __init__(self, plan: IAMPlan, dry_run: bool = False):
+        self.plan = plan
+        self.dry_run = dry_run
+
+    @property
+    def failed(self) -> list:
+        return [operation for operation in self.plan.operations if operation.status == 'error']
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and all(operation.status in ('success', 'pending') for operation in self.plan.operations)
+
+    def as_dict(self) -> dict:
+        return dict(self.plan.as_dict(), dry_run=self.dry_run)
+
+    def __repr__(self):
+        done = sum(operation.status == 'success' for operation in self.plan.operations)
+        return f"{self.__class__.__name__}[operations={len(self.plan.operations)}, done={done}, failed={len(self.failed)}, dry_run={self.dry_run}]"
+
+
+async def run_operation(target: str, operation: IAMOperation):
+    try:
+        records(await operation.call(target=target, **operation.kwargs))
+        operation.status = 'success'
+    except Exception as e:
+        operation.status, operation.error = 'error', str(e) or repr(e)
+
+
+async def async_reconcile(desired_state, target: str, prune: bool = False, dry_run: bool = False) -> ReconcileReport:
+    '''Brings the users, groups, policies and attachments of `target` to `desired_state`.
+
+    The current state is read once, with concurrent list and info commands,
+    and only the differences are applied. Operations run concurrently within
+    a phase, phases in dependency order: policies, users, groups, user and
+    group status, policy attachments, then removals. A failed phase stops
+    the run, the later operations are reported as ``skipped``.
+
+    Usage::
+
+      >>> report = await async_reconcile({
+            'policies': {'logs-rw': {'Version': '2012-10-17', 'Statement': [...]}},
+            'users': {'rockstar': {'secret': 'verysecretpassword', 'policy': 'logs-rw'}},
+            'groups': {'admins': {'members': ['rockstar'], 'policy': 'consoleAdmin'}},
+          }, target='prod', dry_run=True)
+      >>> print(report.plan.describe())
+      policies:
+        add policy logs-rw
+      users:
+        add user rockstar
+      attachments:
+        set policy logs-rw (user=rockstar)
+      >>> report = await async_reconcile(state, target='prod')
+      >>> report.ok
+      True
+
+    :param desired_state: an ``IAMState`` or a dict with ``policies``, ``users`` and ``groups``.
+    :param target: alias of the deployment.
+    :param prune: remove the users, groups and policies `desired_state` does not list.
+    :param dry_run: only compute the plan.
+    '''
+    desired = desired_state if isinstance(desired_state, IAMState) else IAMState.from_dict(desired_state)
+    current = await fetch_iam_state(target, policies=None if prune else set(desired.policies))
+    report = ReconcileReport(plan_iam(current, desired, target, prune=prune), dry_run=dry_run)
+    if dry_run:
+        return report
+    failed = False
+    for name in PHASES:
+        operations = report.plan.phase(name)
+        if failed:
+            for operation in operations:
+                operation.status = 'skipped'
+            continue
+        await asyncio.gather(*(run_operation(target, operation) for operation in operations))
+        failed = any(operation.status == 'error' for operation in operations)
+    return report
+
+
+def reconcile(desired_state, target: str, prune: bool = False, dry_run: bool = False) -> ReconcileReport:
+    '''Brings the users, groups, policies and attachments of `target` to `desired_state`.
+
+    Synchronous version of ``async_reconcile``.
+
+    Usage::
+
+      >>> print(reconcile(state, target='prod', dry_run=True).plan.describe())
+      no changes
+    '''
+    return run_sync(async_reconcile, desired_state, target, prune=prune, dry_run=dry_run)
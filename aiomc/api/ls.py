@@ -1,5 +1,13 @@
 
 from aiomc.utils import *
+from aiomc.utils.listing import ListingFrame
+from aiomc.backends import dispatch, async_dispatch
+
+
+def response_frame(response: Response) -> ListingFrame:
+    content = response.content
+    return ListingFrame.from_records([content] if isinstance(content, dict) else content)
+
 
 def ls(**kwargs) -> Response:
     '''List buckets and objects.
@@ -33,10 +41,21 @@ def ls(**kwargs) -> Response:
                    directory.
     :param recursive: if set to ``True``, will recursively list objects.
                       Defaults to ``False``
+    :param backend: backend serving the call, 'mc' or 'native'. Defaults to
+                    the global backend, see ``aiomc.backends.set_backend``.
+    :param columnar: if set to ``True``, returns a ``ListingFrame`` built while
+                     the listing streams in, instead of a ``Response``: about
+                     40 bytes per entry plus its key, rather than a dict.
 
     '''
     kwargs.setdefault('target', '')
+    columnar = kwargs.pop('columnar', False)
+    response = dispatch('ls', kwargs)
+    if response is not None:
+        return response_frame(response) if columnar else response
     cmd = Command('mc {flags} ls {target}')
+    if columnar:
+        return ListingFrame.from_records(cmd.stream(**kwargs))
     return cmd(**kwargs)
 
 
@@ -72,8 +91,49 @@ async def async_ls(**kwargs) -> Response:
                    directory.
     :param recursive: if set to ``True``, will recursively list objects.
                       Defaults to ``False``
+    :param backend: backend serving the call, 'mc' or 'native'. Defaults to
+                    the global backend, see ``aiomc.backends.set_backend``.
+    :param columnar: if set to ``True``, returns a ``ListingFrame`` built while
+                     the listing streams in, instead of a ``Response``: about
+                     40 bytes per entry plus its key, rather than a dict.
 
     '''
     kwargs.setdefault('target', '')
+    columnar = kwargs.pop('columnar', False)
+    response = await async_dispatch('ls', kwargs)
+    if response is not None:
+        return response_frame(response) if columnar else response
     cmd = AsyncCommand('mc {flags} ls {target}')
+    if columnar:
+        frame = ListingFrame()
+        async for entry in cmd.stream(**kwargs):
+            frame.append(entry)
+        return frame
     return await cmd.run(**kwargs)
+
+
+async def stream_ls(**kwargs):
+    '''List buckets and objects, yielding each entry as soon as `mc` emits it.
+
+    Unlike ``async_ls``, the listing is never held in memory as a whole: the
+    output of `mc` is read line by line, and only when the caller asks for the
+    next entry, so memory stays bounded on buckets with millions of keys.
+
+    Usage::
+
+      >>> async for entry in stream_ls(target='s3/awesome-bucket', recursive=True):
+      ...     print(entry['key'], entry['size'])
+      photos/2020/cat.jpg 807
+      photos/2020/dog.jpg 4096
+
+    :param target: target to list objects for. example: 's3/awesome-bucket'.
+                   Defaults to an empty string '' to list the current working
+                   directory.
+    :param recursive: if set to ``True``, will recursively list objects.
+                      Defaults to ``False``
+
+    '''
+    kwargs.setdefault('target', '')
+    cmd = AsyncCommand('mc {flags} ls {target}')
+    async for entry in cmd.stream(**kwargs):
+        yield entry
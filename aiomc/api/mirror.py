@@ -0,0 +1,196 @@
+import time
+import heapq
+import asyncio
+from aiomc.utils import *
+from aiomc.utils.executor import run_sync
+from aiomc.api.cp import TransferResult, TransferSummary, response_records
+
+
+class MirrorShard(object):
+    '''Top-level prefixes of the source assigned to one `mc mirror` worker.'''
+
+    def __init__(self, index=0):
+        self.index = index
+        self.prefixes = []
+        self.bytes = 0
+        self.objects = 0
+        self.weight = 0
+
+    def __lt__(self, other):
+        return (self.weight, self.index) < (other.weight, other.index)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[index={self.index}, prefixes={len(self.prefixes)}, bytes={self.bytes}, objects={self.objects}]"
+
+
+class MirrorResult(TransferResult):
+    '''Outcome of mirroring one prefix, with the number of objects copied.'''
+
+    def __init__(self, *args, objects=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.objects = objects
+
+
+class MirrorSummary(TransferSummary):
+    '''Merged outcome of the shards of ``async_mirror``, one result per mirrored prefix.'''
+
+    def __init__(self, results=None, elapsed=0.0, shards=None):
+        super().__init__(results, elapsed)
+        self.shards = shards or []
+
+    @property
+    def objects(self) -> int:
+        return sum(result.objects for result in self.results)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[shards={len(self.shards)}, prefixes={len(self.results)}, failed={len(self.failed)}, objects={self.objects}, bytes={self.bytes}, elapsed={self.elapsed:.3f}]"
+
+
+def join_path(base: str, prefix: str) -> str:
+    return f"{base.rstrip('/')}/{prefix}" if prefix else base
+
+
+async def list_prefixes(source: str, sized: bool = True) -> list:
+    '''Top-level folders of `source` as ``(prefix, bytes, objects)``, sized with `mc du`.
+
+    The files at the top level come first, as one entry with an empty prefix.
+    `mc du` walks every object under a folder, so sizing costs about as many
+    requests as a recursive listing of the source; without `sized`, it is
+    skipped and folders are reported with 0 bytes and 0 objects.
+    '''
+    folders, loose = [], [0, 0]
+    # Without the trailing slash, `mc ls` describes the folder itself.
+    async for record in AsyncCommand('mc {flags} ls {target}').stream(target=source.rstrip('/') + '/'):
+        if record.get('status') == 'error':
+            raise classify_error(record)
+        if record.get('type') == 'folder':
+            folders.append(record.get('key', ''))
+        else:
+            loose[0] += record.get('size') or 0
+            loose[1] += 1
+    head = [('', loose[0], loose[1])] if loose[1] else []
+    if not sized:
+        return head + [(prefix, 0, 0) for prefix in folders]
+    du = AsyncCommand('mc {flags} du {target}')
+
+    async def size(prefix: str) -> tuple:
+        response = await du.run(target=join_path(source, prefix))
+        records = [record for record in response_records(response) if isinstance(record, dict) and 'size' in record]
+        if not records:
+            return (prefix, 0, 1)
+        return (prefix, records[-1].get('size') or 0, records[-1].get('objects') or 1)
+    return head + list(await asyncio.gather(*(size(prefix) for prefix in folders)))
+
+
+def balance(prefixes: list, shards: int, by: str = 'bytes') -> list:
+    '''Assigns prefixes to `shards` shards, largest first to the lightest shard (LPT).
+
+    :param prefixes: ``(prefix, bytes, objects)`` tuples.
+    :param by: ``'bytes'`` or ``'objects'``, the estimate of the work per
+               prefix, or ``'prefixes'`` to count every prefix as the same
+               work, in listing order.
+    '''
+    if by not in ('bytes', 'objects', 'prefixes'):
+        raise ValueError(f"by must be 'bytes', 'objects' or 'prefixes', not {by!r}")
+    heap = [MirrorShard(index) for index in range(max(1, shards))]
+
+    def work(prefix: tuple) -> int:
+        return 1 if by == 'prefixes' else prefix[1 if by == 'bytes' else 2]
+    for prefix in sorted(prefixes, key=work, reverse=True):
+        shard = heapq.heappop(heap)
+        shard.prefixes.append(prefix[0])
+        shard.bytes += prefix[1]
+        shard.objects += prefix[2]
+        # Empty prefixes still cost a process.
+        shard.weight += max(1, work(prefix))
+        heapq.heappush(heap, shard)
+    return sorted((shard for shard in heap if shard.prefixes), key=lambda shard: shard.index)
+
+
+async def run_mirror_job(source: str, target: str, prefix: str, folders: list, flags: dict) -> MirrorResult:
+    '''Mirrors one prefix; the empty prefix mirrors the top-level files only, excluding `folders`.'''
+    excludes = [] if prefix else [arg for folder in folders for arg in ('--exclude', f'{folder}*')]
+    if folders and not prefix:
+        # With --remove, the job over the whole target would delete what the shards are writing.
+        flags = dict(flags, remove=False)
+    start = time.perf_counter()
+    try:
+        response = await AsyncCommand('mc {flags} mirror {excludes} {source} {target}').run(
+            source=join_path(source, prefix), target=join_path(target, prefix), excludes=excludes, **flags)
+    except Exception as e:
+        return MirrorResult(join_path(source, prefix), join_path(target, prefix), flags, status='error', elapsed=time.perf_counter() - start, error=str(e) or repr(e))
+    elapsed = time.perf_counter() - start
+    moved, objects, error = 0, 0, None
+    for record in response_records(response):
+        if not isinstance(record, dict):
+            continue
+        if record.get('status') == 'error':
+            error = str(classify_error(record))
+        elif 'source' in record or 'target' in record:
+            moved += record.get('size') or 0
+            objects += 1
+    return MirrorResult(join_path(source, prefix), join_path(target, prefix), flags, status='error' if error else 'success', bytes=moved, elapsed=elapsed, error=error, response=response, objects=objects)
+
+
+async def async_mirror(source: str, target: str, shards: int = 1, by: str = 'bytes', **kwargs) -> MirrorSummary:
+    '''Synchronize a source to a target, with `shards` concurrent `mc mirror` processes.
+
+    The top-level folders of `source` are sized with `mc du` and spread over
+    the shards, largest first to the least loaded one. Sizing walks the whole
+    source before the first copy starts; with ``by='prefixes'`` it is skipped
+    and every folder counts as the same work, which starts at once but
+    balances poorly when folder sizes differ a lot. Each shard mirrors its
+    prefixes one after the other; the files at the top level are mirrored by
+    one more job that excludes the folders. With ``shards=1``, a single
+    `mc mirror` runs over the whole source.
+
+    With ``remove=True`` and several shards, only the folders of the source
+    are pruned on the target: extraneous top-level objects and folders that
+    no longer exist in the source are left in place.
+
+    Usage::
+
+      >>> summary = await async_mirror('s3/photos', 'backup/photos', shards=8, overwrite=True)
+      >>> summary
+      MirrorSummary[shards=8, prefixes=120, failed=0, objects=1048576, bytes=53687091200, elapsed=912.004]
+      >>> summary.shards[0]
+      MirrorShard[index=0, prefixes=15, bytes=6710886400, objects=131072]
+      >>> summary.failed_jobs
+
+    :param source: bucket or prefix to mirror, example: 's3/photos'.
+    :param target: bucket or prefix to mirror to.
+    :param shards: number of `mc mirror` processes running at once.
+    :param by: balance the shards by ``'bytes'``, by ``'objects'``, or by
+               ``'prefixes'`` without sizing the folders.
+    :param kwargs: any `mc mirror` flag, e.g. ``overwrite=True`` or ``remove=True``.
+    '''
+    start = time.perf_counter()
+    if shards <= 1:
+        result = await run_mirror_job(source, target, '', [], kwargs)
+        result.source, result.target = source, target
+        shard = MirrorShard()
+        shard.prefixes.append('')
+        return MirrorSummary([result], elapsed=time.perf_counter() - start, shards=[shard])
+    prefixes = await list_prefixes(source, sized=by != 'prefixes')
+    folders = [prefix for prefix, _, _ in prefixes if prefix]
+    plan = balance(prefixes, shards, by=by)
+    results = {}
+
+    async def work(shard: MirrorShard):
+        for prefix in shard.prefixes:
+            results[prefix] = await run_mirror_job(source, target, prefix, folders, kwargs)
+    await asyncio.gather(*(work(shard) for shard in plan))
+    return MirrorSummary([results[prefix] for prefix, _, _ in prefixes], elapsed=time.perf_counter() - start, shards=plan)
+
+
+def mirror(source: str, target: str, shards: int = 1, by: str = 'bytes', **kwargs) -> MirrorSummary:
+    '''Synchronize a source to a target, with `shards` concurrent `mc mirror` processes.
+
+    Synchronous version of ``async_mirror``.
+
+    Usage::
+
+      >>> mirror('s3/photos', 'backup/photos', shards=4).ok
+      True
+    '''
+    return run_sync(async_mirror, source, target, shards=shards, by=by, **kwargs)
@@ -1,4 +1,12 @@
+import os
+import json
+import hashlib
+import tempfile
+import contextlib
+from typing import Optional
 from aiomc.utils import *
+from aiomc.backends import dispatch, async_dispatch
+from aiomc.backends.base import make_response
 
 __all__ = [
     'admin_policy_add',
@@ -6,29 +14,149 @@ __all__ = [
     'admin_policy_list',
     'admin_policy_info',
     'admin_policy_set',
+    'admin_policy_unset',
     # Async
     'async_admin_policy_add',
     'async_admin_policy_remove',
     'async_admin_policy_list',
     'async_admin_policy_info',
     'async_admin_policy_set',
+    'async_admin_policy_unset',
+    'canonical_policy',
+    'normalized_policy',
+    'policy_hash',
 ]
 
 POLICY_COMMAND = 'mc {flags} admin policy '
 
+# tmpfs, so that policy documents handed to `mc` never reach a disk.
+SHM_DIRECTORY = '/dev/shm'
+
+
+def canonical_policy(document) -> bytes:
+    '''A policy document as compact JSON with sorted keys: equal documents give equal bytes.
+
+    :param document: a dict, or the JSON document as ``str`` or ``bytes``.
+    '''
+    if isinstance(document, (bytes, bytearray, str)):
+        document = json.loads(document)
+    return json.dumps(document, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+# Statement fields MinIO stores as lists, even when given a single value.
+LIST_FIELDS = ('Action', 'NotAction', 'Resource', 'NotResource')
+
+
+def as_sorted_list(value) -> list:
+    values = value if isinstance(value, list) else [value]
+    return sorted(set(values), key=lambda item: json.dumps(item, sort_keys=True))
+
+
+def normalized_policy(document) -> bytes:
+    '''The canonical form of a policy document in the shape MinIO stores it.
+
+    A single statement becomes a list of one, and every ``Action``,
+    ``Resource`` and condition value a sorted list, so that a document
+    compares equal to the one the server returns for it.
+    '''
+    if isinstance(document, (bytes, bytearray, str)):
+        document = json.loads(document)
+    document = dict(document)
+    statements = document.get('Statement')
+    if statements is not None:
+        normalized = []
+        for statement in statements if isinstance(statements, list) else [statements]:
+            statement = dict(statement)
+            for field in LIST_FIELDS:
+                if field in statement:
+                    statement[field] = as_sorted_list(statement[field])
+            if isinstance(statement.get('Condition'), dict):
+                statement['Condition'] = {
+                    operator: {key: as_sorted_list(value) for key, value in conditions.items()} if isinstance(conditions, dict) else conditions
+                    for operator, conditions in statement['Condition'].items()
+                }
+            normalized.append(statement)
+        document['Statement'] = normalized
+    return canonical_policy(document)
+
+
+def policy_hash(document) -> str:
+    '''SHA-256 of the normalized form of a policy document, see ``normalized_policy``.'''
+    return hashlib.sha256(normalized_policy(document)).hexdigest()
+
+
+def check_policy_source(kwargs: dict):
+    if kwargs.get('document') is not None and kwargs.get('file') is not None:
+        raise ValueError('Pass either document or file, not both.')
+
+
+def stored_policy(response: Response) -> Optional[str]:
+    '''The hash of the document in an ``admin_policy_info`` response, None if there is none.'''
+    content = response.content
+    for record in content if isinstance(content, list) else [content]:
+        if isinstance(record, dict) and record.get('status') != 'error':
+            document = record.get('policyJSON') or (record.get('policyInfo') or {}).get('policy')
+            if document:
+                return policy_hash(document)
+    return None
+
+
+def unchanged_response(target: str, name: str) -> Response:
+    return make_response([{'status': 'success', 'policy': name, 'isGroup': False, 'unchanged': True}], name='admin_policy_add', command=f'admin policy add {target} {name}')
+
+
+@contextlib.contextmanager
+def policy_file(document: bytes):
+    '''Writes `document` to a private file for `mc`, on tmpfs when there is one, and removes it after.'''
+    directory = SHM_DIRECTORY if os.access(SHM_DIRECTORY, os.W_OK) else None
+    fd, path = tempfile.mkstemp(prefix='aiomc-policy-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as policy:
+            policy.write(document)
+        yield path
+    finally:
+        os.unlink(path)
+
 
 def admin_policy_add(**kwargs) -> Response:
     '''Add new canned policy on MinIO.
 
+    The policy is read from `file`, or given as `document`. Documents are
+    canonicalised, compared with the one the server holds once both are
+    normalized (see ``normalized_policy``), and only uploaded when they differ; the file `mc` needs is then written to tmpfs
+    and removed right after.
+
     Usage::
 
       >>> r = admin_policy_add(target='aliasforhost', name='admins', file='/tmp/policy.json')
       >>> r.content
       {'status': 'success', 'policy': 'admins', 'isGroup': False}
+
+      >>> r = admin_policy_add(target='aliasforhost', name='admins', document={'Version': '2012-10-17', 'Statement': [...]})
+      >>> r.content
+      {'status': 'success', 'policy': 'admins', 'isGroup': False, 'unchanged': True}
+
+    :param document: the policy as a dict, or as JSON ``str`` or ``bytes``.
+    :param skip_identical: with `document`, skip the upload when the server
+                           already holds an identical policy. Defaults to ``True``.
     '''
+    check_policy_source(kwargs)
+    skip_identical = kwargs.pop('skip_identical', True)
+    if kwargs.get('document') is not None:
+        kwargs['document'] = canonical_policy(kwargs['document'])
+        if skip_identical:
+            current = admin_policy_info(target=kwargs['target'], name=kwargs['name'], backend=kwargs.get('backend'))
+            if stored_policy(current) == policy_hash(kwargs['document']):
+                return unchanged_response(kwargs['target'], kwargs['name'])
+    response = dispatch('admin_policy_add', kwargs)
+    if response is not None:
+        return response
     cmd = Command(POLICY_COMMAND + 'add {target} {name} {file}')
-
-    return cmd(**kwargs)
+    document = kwargs.pop('document', None)
+    if document is None:
+        return cmd(**kwargs)
+    with policy_file(document) as path:
+        return cmd(file=path, **kwargs)
 
 
 def admin_policy_remove(**kwargs) -> Response:
@@ -40,6 +168,9 @@ def admin_policy_remove(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'policy': 'admins', 'isGroup': False}
     '''
+    response = dispatch('admin_policy_remove', kwargs)
+    if response is not None:
+        return response
     cmd = Command(POLICY_COMMAND + 'remove {target} {name}')
 
     return cmd(**kwargs)
@@ -57,6 +188,9 @@ def admin_policy_list(**kwargs) -> Response:
       {'status': 'success', 'policy': 'writeonly', 'isGroup': False},
       {'status': 'success', 'policy': 'admins', 'isGroup': False}]
     '''
+    response = dispatch('admin_policy_list', kwargs)
+    if response is not None:
+        return response
     cmd = Command(POLICY_COMMAND + 'list {target}')
 
     return cmd(**kwargs)
@@ -77,6 +211,9 @@ def admin_policy_info(**kwargs) -> Response:
           'Resource': ['arn:aws:s3:::*']}]},
       'isGroup': False}
     '''
+    response = dispatch('admin_policy_info', kwargs)
+    if response is not None:
+        return response
     cmd = Command(POLICY_COMMAND + 'info {target} {name}')
 
     return cmd(**kwargs)
@@ -94,6 +231,9 @@ def admin_policy_set(**kwargs) -> Response:
       'userOrGroup': 'rockstar',
       'isGroup': False}
     '''
+    response = dispatch('admin_policy_set', kwargs)
+    if response is not None:
+        return response
 
     if {'user', 'group'}.issubset(kwargs.keys()):
         raise KeyError('Only one of user or group arguments can be set.')
@@ -105,6 +245,29 @@ def admin_policy_set(**kwargs) -> Response:
 
     return cmd(**kwargs)
 
+
+def admin_policy_unset(**kwargs) -> Response:
+    '''Detach IAM policies from a user or group
+
+    Usage::
+
+      >>> r = admin_policy_unset(target='aliasforhost', name='admins,readonly', user='rockstar')
+      >>> r.content
+      {'status': 'success',
+      'policy': 'admins,readonly',
+      'userOrGroup': 'rockstar',
+      'isGroup': False}
+    '''
+    if {'user', 'group'}.issubset(kwargs.keys()):
+        raise KeyError('Only one of user or group arguments can be set.')
+
+    if 'group' in kwargs:
+        cmd = Command(POLICY_COMMAND + 'unset {target} {name} group={group}')
+    else:
+        cmd = Command(POLICY_COMMAND + 'unset {target} {name} user={user}')
+
+    return cmd(**kwargs)
+
 ## Async
 
 
@@ -113,12 +276,33 @@ async def async_admin_policy_add(**kwargs) -> Response:
 
     Usage::
 
-      >>> r = admin_policy_add(target='aliasforhost', name='admins', file='/tmp/policy.json')
+      >>> r = await async_admin_policy_add(target='aliasforhost', name='admins', file='/tmp/policy.json')
       >>> r.content
       {'status': 'success', 'policy': 'admins', 'isGroup': False}
+
+      >>> r = await async_admin_policy_add(target='aliasforhost', name='admins', document=b'{"Version": "2012-10-17", ...}')
+
+    :param document: the policy as a dict, or as JSON ``str`` or ``bytes``.
+    :param skip_identical: with `document`, skip the upload when the server
+                           already holds an identical policy. Defaults to ``True``.
     '''
+    check_policy_source(kwargs)
+    skip_identical = kwargs.pop('skip_identical', True)
+    if kwargs.get('document') is not None:
+        kwargs['document'] = canonical_policy(kwargs['document'])
+        if skip_identical:
+            current = await async_admin_policy_info(target=kwargs['target'], name=kwargs['name'], backend=kwargs.get('backend'))
+            if stored_policy(current) == policy_hash(kwargs['document']):
+                return unchanged_response(kwargs['target'], kwargs['name'])
+    response = await async_dispatch('admin_policy_add', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(POLICY_COMMAND + 'add {target} {name} {file}')
-    return await cmd.run(**kwargs)
+    document = kwargs.pop('document', None)
+    if document is None:
+        return await cmd.run(**kwargs)
+    with policy_file(document) as path:
+        return await cmd.run(file=path, **kwargs)
 
 
 async def async_admin_policy_remove(**kwargs) -> Response:
@@ -130,6 +314,9 @@ async def async_admin_policy_remove(**kwargs) -> Response:
       >>> r.content
       {'status': 'success', 'policy': 'admins', 'isGroup': False}
     '''
+    response = await async_dispatch('admin_policy_remove', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(POLICY_COMMAND + 'remove {target} {name}')
 
     return await cmd.run(**kwargs)
@@ -146,6 +333,9 @@ async def async_admin_policy_list(**kwargs) -> Response:
       {'status': 'success', 'policy': 'writeonly', 'isGroup': False},
       {'status': 'success', 'policy': 'admins', 'isGroup': False}]
     '''
+    response = await async_dispatch('admin_policy_list', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(POLICY_COMMAND + 'list {target}')
 
     return await cmd.run(**kwargs)
@@ -166,6 +356,9 @@ async def async_admin_policy_info(**kwargs) -> Response:
           'Resource': ['arn:aws:s3:::*']}]},
       'isGroup': False}
     '''
+    response = await async_dispatch('admin_policy_info', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand(POLICY_COMMAND + 'info {target} {name}')
 
     return await cmd.run(**kwargs)
@@ -183,6 +376,9 @@ async def async_admin_policy_set(**kwargs) -> Response:
       'userOrGroup': 'rockstar',
       'isGroup': False}
     '''
+    response = await async_dispatch('admin_policy_set', kwargs)
+    if response is not None:
+        return response
 
     if {'user', 'group'}.issubset(kwargs.keys()):
         raise KeyError('Only one of user or group arguments can be set.')
@@ -193,3 +389,26 @@ async def async_admin_policy_set(**kwargs) -> Response:
         cmd = AsyncCommand(POLICY_COMMAND + 'set {target} {name} user={user}')
 
     return await cmd.run(**kwargs)
+
+
+async def async_admin_policy_unset(**kwargs) -> Response:
+    '''Detach IAM policies from a user or group
+
+    Usage::
+
+      >>> r = await async_admin_policy_unset(target='aliasforhost', name='admins,readonly', user='rockstar')
+      >>> r.content
+      {'status': 'success',
+      'policy': 'admins,readonly',
+      'userOrGroup': 'rockstar',
+      'isGroup': False}
+    '''
+    if {'user', 'group'}.issubset(kwargs.keys()):
+        raise KeyError('Only one of user or group arguments can be set.')
+
+    if 'group' in kwargs:
+        cmd = AsyncCommand(POLICY_COMMAND + 'unset {target} {name} group={group}')
+    else:
+        cmd = AsyncCommand(POLICY_COMMAND + 'unset {target} {name} user={user}')
+
+    return await cmd.run(**kwargs)
@@ -0,0 +1,58 @@
+from aiomc.utils import *
+from aiomc.backends import dispatch, async_dispatch
+
+
+def stat(**kwargs) -> Response:
+    '''Show object metadata.
+
+    Usage::
+
+      >>> r = stat(target='s3/awesome-bucket/photos/cat.jpg')
+      >>> r.content
+      {'status': 'success',
+       'name': 'cat.jpg',
+       'lastModified': '2020-06-01T12:25:04+00:00',
+       'size': 807,
+       'etag': '2dbe7e4c2d3a3a1a0c5e5b6e3c3a2f1e',
+       'type': 'file',
+       'metadata': {'content-type': 'image/jpeg'}}
+
+    :param target: object to describe, example: 's3/awesome-bucket/cat.jpg'
+    :param recursive: if set to ``True``, stat all objects recursively.
+                      Defaults to ``False``
+    :param backend: backend serving the call, 'mc' or 'native'. Defaults to
+                    the global backend, see ``aiomc.backends.set_backend``.
+    '''
+    response = dispatch('stat', kwargs)
+    if response is not None:
+        return response
+    cmd = Command('mc {flags} stat {target}')
+    return cmd(**kwargs)
+
+
+async def async_stat(**kwargs) -> Response:
+    '''Show object metadata.
+
+    Usage::
+
+      >>> r = await async_stat(target='s3/awesome-bucket/photos/cat.jpg')
+      >>> r.content
+      {'status': 'success',
+       'name': 'cat.jpg',
+       'lastModified': '2020-06-01T12:25:04+00:00',
+       'size': 807,
+       'etag': '2dbe7e4c2d3a3a1a0c5e5b6e3c3a2f1e',
+       'type': 'file',
+       'metadata': {'content-type': 'image/jpeg'}}
+
+    :param target: object to describe, example: 's3/awesome-bucket/cat.jpg'
+    :param recursive: if set to ``True``, stat all objects recursively.
+                      Defaults to ``False``
+    :param backend: backend serving the call, 'mc' or 'native'. Defaults to
+                    the global backend, see ``aiomc.backends.set_backend``.
+    '''
+    response = await async_dispatch('stat', kwargs)
+    if response is not None:
+        return response
+    cmd = AsyncCommand('mc {flags} stat {target}')
+    return await cmd.run(**kwargs)
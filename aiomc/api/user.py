@@ -1,6 +1,7 @@
 '''Manage users. Command to add, remove, enable, disable, list users on MinIO server.'''
 
 from aiomc.utils import *
+from aiomc.backends import dispatch, async_dispatch
 
 __all__ = [
 
@@ -50,6 +51,9 @@ def admin_user_add(**kwargs) -> Response:
         'secretKey': 'verysecretpassword',
         'userStatus': 'enabled'}]
     '''
+    response = dispatch('admin_user_add', kwargs)
+    if response is not None:
+        return response
     cmd = Command('mc {flags} admin user add {target} {username} {password}')
     return cmd(**kwargs)
 
@@ -66,6 +70,9 @@ def admin_user_remove(**kwargs) -> Response:
        'accessKey': 'hellokitten'
       }]
     '''
+    response = dispatch('admin_user_remove', kwargs)
+    if response is not None:
+        return response
     cmd = Command('mc {flags} admin user remove {target} {username}')
     return cmd(**kwargs)
 
@@ -79,6 +86,9 @@ def admin_user_enable(**kwargs) -> Response:
       >>> r.content
       [{'status': 'success', 'accessKey': 'rockstar'}]
     '''
+    response = dispatch('admin_user_enable', kwargs)
+    if response is not None:
+        return response
     cmd = Command('mc {flags} admin user enable {target} {username}')
     return cmd(**kwargs)
 
@@ -92,6 +102,9 @@ def admin_user_disable(**kwargs) -> Response:
       >>> r.content
       [{'status': 'success', 'accessKey': 'rockstar'}]
     '''
+    response = dispatch('admin_user_disable', kwargs)
+    if response is not None:
+        return response
     cmd = Command('mc {flags} admin user disable {target} {username}')
     return cmd(**kwargs)
 
@@ -108,6 +121,9 @@ def admin_user_list(**kwargs) -> Response:
        {'status': 'success', 'accessKey': 'rockstar', 'userStatus': 'enabled'},
        {'status': 'success', 'accessKey': 'test_access_key', 'policyName': 'readwrite', 'userStatus': 'enabled'}]
     '''
+    response = dispatch('admin_user_list', kwargs)
+    if response is not None:
+        return response
     cmd = Command('mc {flags} admin user list {target}')
     return cmd(**kwargs)
 
@@ -121,6 +137,9 @@ def admin_user_info(**kwargs) -> Response:
       >>> r.content
       [{'status': 'success', 'accessKey': 'rockstar', 'userStatus': 'disabled'}]
     '''
+    response = dispatch('admin_user_info', kwargs)
+    if response is not None:
+        return response
     cmd = Command('mc {flags} admin user info {target} {username}')
     return cmd(**kwargs)
 
@@ -257,6 +276,9 @@ async def async_admin_user_add(**kwargs) -> Response:
         'secretKey': 'verysecretpassword',
         'userStatus': 'enabled'}]
     '''
+    response = await async_dispatch('admin_user_add', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand('mc {flags} admin user add {target} {username} {password}')
     return await cmd.run(**kwargs)
 
@@ -273,6 +295,9 @@ async def async_admin_user_remove(**kwargs) -> Response:
        'accessKey': 'hellokitten'
       }]
     '''
+    response = await async_dispatch('admin_user_remove', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand('mc {flags} admin user remove {target} {username}')
     return await cmd.run(**kwargs)
 
@@ -286,6 +311,9 @@ async def async_admin_user_enable(**kwargs) -> Response:
       >>> r.content
       [{'status': 'success', 'accessKey': 'rockstar'}]
     '''
+    response = await async_dispatch('admin_user_enable', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand('mc {flags} admin user enable {target} {username}')
     return await cmd.run(**kwargs)
 
@@ -299,6 +327,9 @@ async def async_admin_user_disable(**kwargs) -> Response:
       >>> r.content
       [{'status': 'success', 'accessKey': 'rockstar'}]
     '''
+    response = await async_dispatch('admin_user_disable', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand('mc {flags} admin user disable {target} {username}')
     return await cmd.run(**kwargs)
 
@@ -314,6 +345,9 @@ async def async_admin_user_list(**kwargs) -> Response:
        {'status': 'success', 'accessKey': 'rockstar', 'userStatus': 'enabled'},
        {'status': 'success', 'accessKey': 'test_access_key', 'policyName': 'readwrite', 'userStatus': 'enabled'}]
     '''
+    response = await async_dispatch('admin_user_list', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand('mc {flags} admin user list {target}')
     return await cmd.run(**kwargs)
 
@@ -326,6 +360,9 @@ async def async_admin_user_info(**kwargs) -> Response:
       >>> r.content
       [{'status': 'success', 'accessKey': 'rockstar', 'userStatus': 'disabled'}]
     '''
+    response = await async_dispatch('admin_user_info', kwargs)
+    if response is not None:
+        return response
     cmd = AsyncCommand('mc {flags} admin user info {target} {username}')
     return await cmd.run(**kwargs)
 
@@ -0,0 +1,138 @@
+'''Pluggable backends serving API calls without spawning `mc`.
+
+Usage::
+
+  >>> from aiomc.backends import set_backend
+  >>> set_backend('native')                   # every call that the backend supports
+  >>> ls(target='s3/awesome-bucket', backend='mc')  # or pick one per call
+
+The default backend can also be set with the ``AIOMC_BACKEND`` environment
+variable. ``mc`` is the default and is always used for calls a backend does
+not support.
+'''
+
+import os
+import functools
+import threading
+from typing import Optional
+
+from .base import NotSupported, BackendError
+
+__all__ = [
+    'NotSupported',
+    'BackendError',
+    'register_backend',
+    'get_backend',
+    'set_backend',
+    'dispatch',
+    'async_dispatch',
+]
+
+MC_BACKEND = 'mc'
+
+
+def _native():
+    from .native import NativeBackend
+    return NativeBackend()
+
+
+_factories = {'native': _native}
+_instances = {}
+_lock = threading.Lock()
+_default = os.environ.get('AIOMC_BACKEND', MC_BACKEND)
+
+
+def register_backend(name: str, factory):
+    '''Registers a backend under `name`. `factory` is called once, on first use.'''
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def set_backend(name: str):
+    '''Sets the backend used by calls that do not pass ``backend=``.'''
+    global _default
+    if name != MC_BACKEND and name not in _factories:
+        raise ValueError(f'Unknown backend: {name}')
+    _default = name
+
+
+def get_backend(name: Optional[str] = None):
+    '''Returns the backend instance for `name`, ``None`` meaning `mc`.'''
+    name = name or _default
+    if name == MC_BACKEND:
+        return None
+    backend = _instances.get(name)
+    if backend is None:
+        with _lock:
+            backend = _instances.get(name)
+            if backend is None:
+                if name not in _factories:
+                    raise ValueError(f'Unknown backend: {name}')
+                backend = _instances[name] = _factories[name]()
+    return backend
+
+
+def _timeout(kwargs: dict) -> Optional[float]:
+    '''The ``timeout=`` of the call, else the default one of `mc` commands.'''
+    timeout = kwargs.get('timeout')
+    if timeout is None:
+        from aiomc.utils.executor import get_default_timeout
+        timeout = get_default_timeout()
+    return timeout
+
+
+def _call(backend, operation: str, kwargs: dict, timeout: Optional[float] = None):
+    handler = getattr(backend, operation, None)
+    if handler is None:
+        return None
+    from .transport import request_deadline
+    try:
+        with request_deadline(timeout):
+            return handler(**kwargs)
+    except NotSupported:
+        return None
+
+
+def _lookup(operation: str, kwargs: dict):
+    '''Looks the call up in the command cache, without consuming call options from `kwargs`.
+
+    Returns the arguments for the backend too, without those options: they
+    only apply to `mc` processes.
+    '''
+    from aiomc.utils.cache import cache_lookup, CALL_OPTIONS
+    args = {name: value for name, value in kwargs.items() if name not in CALL_OPTIONS}
+    return cache_lookup(tuple(operation.split('_')), args, kwargs.get('cache', True)) + (args,)
+
+
+def _done(ticket, response):
+    if response is not None and ticket is not None:
+        ticket.done(response)
+    return response
+
+
+def dispatch(operation: str, kwargs: dict):
+    '''Serves `operation` with the selected backend.
+
+    Pops ``backend`` from `kwargs`. Returns ``None`` when the call should go
+    through `mc`. Results go through the command cache like `mc` ones do.
+    '''
+    backend = get_backend(kwargs.pop('backend', None))
+    if backend is None:
+        return None
+    response, ticket, args = _lookup(operation, kwargs)
+    if response is not None:
+        return response
+    return _done(ticket, _call(backend, operation, args, _timeout(kwargs)))
+
+
+async def async_dispatch(operation: str, kwargs: dict):
+    '''Async version of ``dispatch``, the blocking I/O runs in a worker thread.'''
+    backend = get_backend(kwargs.pop('backend', None))
+    if backend is None or not hasattr(backend, operation):
+        return None
+    response, ticket, args = _lookup(operation, kwargs)
+    if response is not None:
+        return response
+    import anyio
+    return _done(ticket, await anyio.to_thread.run_sync(functools.partial(_call, backend, operation, args, _timeout(kwargs))))
@@ -0,0 +1,231 @@
+'''MinIO admin API operations for users, groups and policies.'''
+
+import json
+import hashlib
+from typing import Optional, Union
+
+from aiomc.utils.alias import Alias, load_alias
+from .base import NotSupported, BackendError, check_flags, error_record, make_response
+from .transport import get_pool, sign_v4, quote_path, canonical_query
+from . import madmin
+
+ADMIN_PREFIX = '/minio/admin/v3/'
+
+__all__ = [
+    'AdminClient',
+    'AdminOperations',
+]
+
+
+def split_members(members: Union[str, list, tuple, None]) -> list:
+    if not members:
+        return []
+    if isinstance(members, str):
+        return members.split()
+    return list(members)
+
+
+class AdminClient(object):
+    '''Client of the MinIO admin REST API over a pooled keep-alive connection.'''
+
+    def __init__(self, alias: Alias, insecure: bool = False):
+        self.alias = alias
+        self.pool = get_pool(alias, insecure=insecure)
+
+    def request(self, method: str, api: str, params: Optional[dict] = None, body: bytes = b'', encrypt: bool = False):
+        if encrypt:
+            body = madmin.encrypt_data(self.alias.secret_key, body)
+        path = quote_path(ADMIN_PREFIX + api)
+        headers = {'host': self.alias.host}
+        if body:
+            headers['content-length'] = str(len(body))
+        sign_v4(method, path, params, headers, hashlib.sha256(body).hexdigest(), self.alias)
+        query = canonical_query(params)
+        status, _, data = self.pool.request(method, f'{path}?{query}' if query else path, body=body or None, headers=headers)
+        if status >= 300:
+            try:
+                error = json.loads(data)
+            except ValueError:
+                error = {}
+            raise BackendError(error.get('Message') or f'HTTP {status}', code=error.get('Code', ''), status=status, resource=error.get('Resource'))
+        return data
+
+    def get_json(self, api: str, params: Optional[dict] = None, encrypted: bool = False):
+        data = self.request('GET', api, params)
+        if encrypted:
+            data = madmin.decrypt_data(self.alias.secret_key, data)
+        return json.loads(data) if data else None
+
+
+class AdminOperations(object):
+    '''`mc admin user|group|policy` operations served by ``AdminClient``.
+
+    Each method takes the same arguments as the API function of the same name
+    and returns the records `mc --json` would have printed.
+    '''
+
+    def admin_client(self, target: str, insecure: bool = False) -> AdminClient:
+        alias = load_alias(target.split('/', 1)[0])
+        if alias is None:
+            raise NotSupported('unknown alias')
+        return AdminClient(alias, insecure=insecure)
+
+    def admin_call(self, name: str, target: str, flags: dict, message: str, call):
+        '''Runs ``call(client)`` and wraps the records it returns, or the error it raises.'''
+        insecure = flags.pop('insecure', False)
+        check_flags(flags)
+        client = self.admin_client(target, insecure=insecure)
+        try:
+            records = call(client)
+        except (BackendError, madmin.MadminCryptoError) as e:
+            records = [error_record(message, e)]
+        return make_response(records, name=self.__class__.__name__, command=f'admin {name} {target}')
+
+    # Users
+
+    def admin_user_add(self, target: str = '', username: str = '', password: str = '', **flags):
+        if not madmin.available():
+            raise NotSupported('cryptography is not installed')
+
+        def call(client):
+            body = json.dumps({'secretKey': password, 'status': 'enabled'}).encode('utf-8')
+            client.request('PUT', 'add-user', {'accessKey': username}, body, encrypt=True)
+            return [{'status': 'success', 'accessKey': username, 'secretKey': password, 'userStatus': 'enabled'}]
+        return self.admin_call('user add', target, flags, 'Unable to add new user', call)
+
+    def admin_user_remove(self, target: str = '', username: str = '', **flags):
+        def call(client):
+            client.request('DELETE', 'remove-user', {'accessKey': username})
+            return [{'status': 'success', 'accessKey': username}]
+        return self.admin_call('user remove', target, flags, 'Unable to remove user', call)
+
+    def set_user_status(self, target: str, username: str, status: str, flags: dict):
+        def call(client):
+            client.request('PUT', 'set-user-status', {'accessKey': username, 'status': status})
+            return [{'status': 'success', 'accessKey': username, 'userStatus': status}]
+        return self.admin_call(f'user {status[:-1]}', target, flags, f'Unable to {status[:-1]} user', call)
+
+    def admin_user_enable(self, target: str = '', username: str = '', **flags):
+        return self.set_user_status(target, username, 'enabled', flags)
+
+    def admin_user_disable(self, target: str = '', username: str = '', **flags):
+        return self.set_user_status(target, username, 'disabled', flags)
+
+    @staticmethod
+    def user_record(username: str, info: dict) -> dict:
+        record = {'status': 'success', 'accessKey': username}
+        if info.get('policyName'):
+            record['policyName'] = info['policyName']
+        record['userStatus'] = info.get('status', '')
+        if info.get('memberOf'):
+            record['memberOf'] = info['memberOf']
+        return record
+
+    def admin_user_list(self, target: str = '', **flags):
+        if not madmin.available():
+            raise NotSupported('cryptography is not installed')
+
+        def call(client):
+            users = client.get_json('list-users', encrypted=True) or {}
+            return [self.user_record(username, users[username]) for username in sorted(users)]
+        return self.admin_call('user list', target, flags, 'Unable to list user', call)
+
+    def admin_user_info(self, target: str = '', username: str = '', **flags):
+        def call(client):
+            return [self.user_record(username, client.get_json('user-info', {'accessKey': username}) or {})]
+        return self.admin_call('user info', target, flags, 'Unable to get user info', call)
+
+    # Groups
+
+    def admin_group_add(self, target: str = '', group: str = '', members=None, **flags):
+        members = split_members(members)
+
+        def call(client):
+            body = json.dumps({'group': group, 'members': members, 'isRemove': False}).encode('utf-8')
+            client.request('PUT', 'update-group-members', body=body)
+            return [{'status': 'success', 'groupName': group, 'members': members}]
+        return self.admin_call('group add', target, flags, 'Unable to add new group', call)
+
+    def admin_group_remove(self, target: str = '', group: str = '', members=None, **flags):
+        members = split_members(members)
+
+        def call(client):
+            body = json.dumps({'group': group, 'members': members, 'isRemove': True}).encode('utf-8')
+            client.request('PUT', 'update-group-members', body=body)
+            record = {'status': 'success', 'groupName': group}
+            if members:
+                record['members'] = members
+            return [record]
+        return self.admin_call('group remove', target, flags, 'Could not perform remove operation', call)
+
+    def admin_group_info(self, target: str = '', group: str = '', **flags):
+        def call(client):
+            info = client.get_json('group', {'group': group}) or {}
+            return [{
+                'status': 'success',
+                'groupName': info.get('name', group),
+                'members': info.get('members') or [],
+                'groupStatus': info.get('status', ''),
+                'groupPolicy': info.get('policy', ''),
+            }]
+        return self.admin_call('group info', target, flags, 'Unable to get group info', call)
+
+    def admin_group_list(self, target: str = '', **flags):
+        def call(client):
+            return [{'status': 'success', 'groups': client.get_json('groups') or []}]
+        return self.admin_call('group list', target, flags, 'Unable to list groups', call)
+
+    def set_group_status(self, target: str, group: str, status: str, flags: dict):
+        def call(client):
+            client.request('PUT', 'set-group-status', {'group': group, 'status': status})
+            return [{'status': 'success', 'groupName': group, 'groupStatus': status}]
+        return self.admin_call(f'group {status[:-1]}', target, flags, f'Unable to {status[:-1]} group', call)
+
+    def admin_group_enable(self, target: str = '', group: str = '', **flags):
+        return self.set_group_status(target, group, 'enabled', flags)
+
+    def admin_group_disable(self, target: str = '', group: str = '', **flags):
+        return self.set_group_status(target, group, 'disabled', flags)
+
+    # Policies
+
+    def admin_policy_add(self, target: str = '', name: str = '', file: str = '', document: Optional[bytes] = None, **flags):
+        def call(client):
+            if document is not None:
+                body = document
+            else:
+                with open(file, 'rb') as policy:
+                    body = policy.read()
+            client.request('PUT', 'add-canned-policy', {'name': name}, body)
+            return [{'status': 'success', 'policy': name, 'isGroup': False}]
+        return self.admin_call('policy add', target, flags, 'Unable to add new policy', call)
+
+    def admin_policy_remove(self, target: str = '', name: str = '', **flags):
+        def call(client):
+            client.request('DELETE', 'remove-canned-policy', {'name': name})
+            return [{'status': 'success', 'policy': name, 'isGroup': False}]
+        return self.admin_call('policy remove', target, flags, 'Unable to remove policy', call)
+
+    def admin_policy_list(self, target: str = '', **flags):
+        def call(client):
+            policies = client.get_json('list-canned-policies') or {}
+            return [{'status': 'success', 'policy': name, 'isGroup': False} for name in sorted(policies)]
+        return self.admin_call('policy list', target, flags, 'Unable to list policy', call)
+
+    def admin_policy_info(self, target: str = '', name: str = '', **flags):
+        def call(client):
+            document = client.get_json('info-canned-policy', {'name': name})
+            return [{'status': 'success', 'policy': name, 'policyJSON': document, 'isGroup': False}]
+        return self.admin_call('policy info', target, flags, 'Unable to fetch policy', call)
+
+    def admin_policy_set(self, target: str = '', name: str = '', user: Optional[str] = None, group: Optional[str] = None, **flags):
+        if user is not None and group is not None:
+            raise KeyError('Only one of user or group arguments can be set.')
+        is_group = group is not None
+        entity = group if is_group else user
+
+        def call(client):
+            params = {'policyName': name, 'userOrGroup': entity, 'isGroup': 'true' if is_group else 'false'}
+            client.request('PUT', 'set-user-or-group-policy', params)
+            return [{'status': 'success', 'policy': name, 'userOrGroup': entity, 'isGroup': is_group}]
+        return self.admin_call('policy set', target, flags, 'Unable to set the policy', call)
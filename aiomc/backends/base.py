@@ -0,0 +1,57 @@
+'''Shared pieces of the native backends.'''
+
+import json
+from typing import Iterable, Optional
+
+from aiomc.utils.executor import Response, aiomcError
+
+__all__ = [
+    'NotSupported',
+    'BackendError',
+    'check_flags',
+    'make_response',
+    'error_record',
+]
+
+# Flags that only affect how `mc` prints its output.
+OUTPUT_FLAGS = ('json', 'quiet', 'no_color')
+
+
+class NotSupported(Exception):
+    '''Raised by a backend for calls it cannot serve, which then go through `mc`.'''
+    pass
+
+
+class BackendError(aiomcError):
+    '''Error returned by a server to a native backend.'''
+
+    def __init__(self, message='', code='', status=None, resource=None):
+        super().__init__(f'{code}: {message}' if code else message)
+        self.message = message
+        self.code = code
+        self.status = status
+        self.resource = resource
+
+
+def check_flags(flags: dict, supported: Iterable[str] = ()):
+    '''Raises ``NotSupported`` when `flags` contains an option the backend does not implement.'''
+    for flag, value in flags.items():
+        if flag in OUTPUT_FLAGS or flag in supported:
+            continue
+        if value in (None, False):
+            continue
+        raise NotSupported(flag)
+
+
+def error_record(message: str, error: Exception) -> dict:
+    '''Formats `error` the way `mc --json` reports failures.'''
+    cause = {'message': getattr(error, 'message', None) or str(error)}
+    if isinstance(error, BackendError):
+        cause['error'] = {'Code': error.code, 'Message': error.message, 'StatusCode': error.status, 'Resource': error.resource}
+    return {'status': 'error', 'error': {'message': message, 'cause': cause}}
+
+
+def make_response(records: Iterable[dict], name: Optional[str] = None, command: Optional[str] = None) -> Response:
+    '''Wraps `records` in a ``Response`` shaped exactly like the `mc --json` one.'''
+    output = '\n'.join(json.dumps(record, separators=(',', ':')) for record in records)
+    return Response(command=command, name=name, output=output.encode('utf-8'))
@@ -0,0 +1,144 @@
+'''Payload encryption used by the MinIO admin API for secret-bearing calls.
+
+This is the format of ``madmin.EncryptData``: a 32 byte salt, one byte naming
+the key derivation and AEAD, an 8 byte nonce, then the plaintext sealed as a
+`sio` stream of 16 KiB fragments. The key is derived from the secret key of
+the caller.
+
+Needs the optional ``cryptography`` package, and ``argon2-cffi`` to use the
+Argon2id key derivation that every MinIO release understands. Without it,
+PBKDF2 is used, which only recent releases accept. Set ``AIOMC_MADMIN_KDF``
+to ``pbkdf2`` to prefer it anyway: it is much cheaper for the server to
+decrypt than Argon2id when provisioning many users.
+'''
+
+import os
+import struct
+import hashlib
+import functools
+import threading
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+except ImportError:
+    AESGCM = ChaCha20Poly1305 = None
+    InvalidTag = ValueError
+
+try:
+    from argon2.low_level import hash_secret_raw, Type as Argon2Type
+except ImportError:
+    hash_secret_raw = Argon2Type = None
+
+ARGON2ID_AES_GCM = 0x00
+ARGON2ID_CHACHA20_POLY1305 = 0x01
+PBKDF2_AES_GCM = 0x02
+PBKDF2_COST = 8192
+SALT_SIZE = 32
+NONCE_SIZE = 8
+FRAGMENT_SIZE = 1 << 14
+TAG_SIZE = 16
+# Messages sealed with one derived key before a fresh salt is drawn. Key
+# derivation dominates the cost of a call (Argon2id uses 64 MiB), and random
+# 8 byte nonces stay far from colliding within this many messages.
+KEY_REUSE = 4096
+
+__all__ = [
+    'MadminCryptoError',
+    'encrypt_data',
+    'decrypt_data',
+    'available',
+]
+
+
+class MadminCryptoError(ValueError):
+    pass
+
+
+def available() -> bool:
+    '''Whether the packages needed to encrypt admin payloads are installed.'''
+    return AESGCM is not None
+
+
+@functools.lru_cache(maxsize=256)
+def derive_key(password: str, salt: bytes, algorithm: int) -> bytes:
+    if algorithm in (ARGON2ID_AES_GCM, ARGON2ID_CHACHA20_POLY1305):
+        if hash_secret_raw is None:
+            raise MadminCryptoError('argon2-cffi is required for Argon2id encrypted payloads')
+        return hash_secret_raw(password.encode('utf-8'), salt, time_cost=1, memory_cost=64 * 1024, parallelism=4, hash_len=32, type=Argon2Type.ID)
+    if algorithm == PBKDF2_AES_GCM:
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, PBKDF2_COST, 32)
+    raise MadminCryptoError(f'invalid encryption algorithm ID: {algorithm}')
+
+
+def make_cipher(key: bytes, algorithm: int):
+    if AESGCM is None:
+        raise MadminCryptoError('cryptography is required to encrypt admin payloads')
+    return ChaCha20Poly1305(key) if algorithm == ARGON2ID_CHACHA20_POLY1305 else AESGCM(key)
+
+
+def default_algorithm() -> int:
+    if os.environ.get('AIOMC_MADMIN_KDF', '').lower() == 'pbkdf2' or hash_secret_raw is None:
+        return PBKDF2_AES_GCM
+    return ARGON2ID_AES_GCM
+
+
+_keys = {}
+_keys_lock = threading.Lock()
+
+
+def sealing_key(password: str, algorithm: int):
+    '''Returns ``(salt, key)`` to seal the next message, re-deriving every ``KEY_REUSE`` messages.'''
+    with _keys_lock:
+        entry = _keys.get((password, algorithm))
+        if entry is not None and entry[2] < KEY_REUSE:
+            entry[2] += 1
+            return entry[0], entry[1]
+    salt = os.urandom(SALT_SIZE)
+    key = derive_key(password, salt, algorithm)
+    with _keys_lock:
+        _keys[(password, algorithm)] = [salt, key, 1]
+    return salt, key
+
+
+def _nonce(prefix: bytes, sequence: int) -> bytes:
+    return prefix + struct.pack('<I', sequence)
+
+
+def encrypt_data(password: str, data: bytes, algorithm: int = None) -> bytes:
+    '''Encrypts `data` for the admin API with the secret key `password`.'''
+    algorithm = default_algorithm() if algorithm is None else algorithm
+    salt, key = sealing_key(password, algorithm)
+    nonce = os.urandom(NONCE_SIZE)
+    cipher = make_cipher(key, algorithm)
+    tag = cipher.encrypt(_nonce(nonce, 0), b'', None)
+    chunks = [salt, bytes([algorithm]), nonce]
+    sequence, offset = 1, 0
+    while len(data) - offset > FRAGMENT_SIZE:
+        chunks.append(cipher.encrypt(_nonce(nonce, sequence), data[offset:offset + FRAGMENT_SIZE], b'\x00' + tag))
+        sequence += 1
+        offset += FRAGMENT_SIZE
+    chunks.append(cipher.encrypt(_nonce(nonce, sequence), data[offset:], b'\x80' + tag))
+    return b''.join(chunks)
+
+
+def decrypt_data(password: str, data: bytes) -> bytes:
+    '''Decrypts an admin API payload sealed with the secret key `password`.'''
+    header = SALT_SIZE + 1 + NONCE_SIZE
+    if len(data) < header + TAG_SIZE:
+        raise MadminCryptoError('payload too short')
+    salt, algorithm, nonce = data[:SALT_SIZE], data[SALT_SIZE], data[SALT_SIZE + 1:header]
+    cipher = make_cipher(derive_key(password, salt, algorithm), algorithm)
+    tag = cipher.encrypt(_nonce(nonce, 0), b'', None)
+    body = memoryview(data)[header:]
+    fragment = FRAGMENT_SIZE + TAG_SIZE
+    chunks, sequence = [], 1
+    try:
+        while len(body) > fragment:
+            chunks.append(cipher.decrypt(_nonce(nonce, sequence), bytes(body[:fragment]), b'\x00' + tag))
+            body = body[fragment:]
+            sequence += 1
+        chunks.append(cipher.decrypt(_nonce(nonce, sequence), bytes(body), b'\x80' + tag))
+    except InvalidTag as e:
+        raise MadminCryptoError('unable to decrypt payload, wrong secret key?') from e
+    return b''.join(chunks)
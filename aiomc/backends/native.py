@@ -0,0 +1,22 @@
+'''Backend that talks to MinIO directly instead of spawning `mc`.'''
+
+from .s3 import S3Operations
+from .admin import AdminOperations
+
+__all__ = [
+    'NativeBackend',
+]
+
+
+class NativeBackend(S3Operations, AdminOperations):
+    '''Serves supported operations over pooled, SigV4-signed HTTP connections.
+
+    Data-plane calls (`ls`, `stat`, `cp`) use the S3 API, `admin user`,
+    `admin group` and `admin policy` calls use the MinIO admin API.
+    Credentials are read from the `mc` alias named by the first component of
+    the target, exactly as `mc` would resolve it. Anything this backend cannot
+    serve (recursive copies, multipart sizes, unknown flags, local paths...)
+    raises ``NotSupported`` and the call falls back to `mc`.
+    '''
+
+    name = 'native'
@@ -0,0 +1,265 @@
+'''S3 data-plane operations (`ls`, `stat`, `cp`) spoken directly over HTTP.'''
+
+import os
+import hashlib
+import mimetypes
+import email.utils
+import xml.etree.ElementTree as ET
+from typing import Optional
+
+from aiomc.utils.alias import Alias, load_alias
+from .base import NotSupported, BackendError, check_flags, error_record, make_response
+from .transport import EMPTY_SHA256, UNSIGNED_PAYLOAD, sign_v4, quote_path, canonical_query, get_pool
+
+# Largest object S3 accepts in a single PUT or server-side copy.
+MAX_SINGLE_PART = 5 * 1024 ** 3
+WILDCARDS = ('*', '?', '[')
+
+__all__ = [
+    'S3Client',
+    'S3Operations',
+    'split_target',
+]
+
+
+def split_target(target: str):
+    '''Splits ``alias/bucket/key`` into its three parts.'''
+    alias, _, path = (target or '').partition('/')
+    bucket, _, key = path.partition('/')
+    return alias, bucket, key
+
+
+def strip_namespace(tree: ET.Element) -> ET.Element:
+    for element in tree.iter():
+        if '}' in element.tag:
+            element.tag = element.tag.split('}', 1)[1]
+    return tree
+
+
+def iso_timestamp(value: str) -> str:
+    '''S3 timestamps end in ``Z``, `mc` prints an explicit offset.'''
+    return value[:-1] + '+00:00' if value.endswith('Z') else value
+
+
+def http_timestamp(value: str) -> str:
+    return email.utils.parsedate_to_datetime(value).isoformat()
+
+
+class S3Client(object):
+    '''Minimal S3 client signing with SigV4 over a pooled keep-alive connection.'''
+
+    def __init__(self, alias: Alias, insecure: bool = False):
+        self.alias = alias
+        self.pool = get_pool(alias, insecure=insecure)
+
+    def request(self, method: str, bucket: str = '', key: str = '', params: Optional[dict] = None, headers: Optional[dict] = None, body=b'', payload_hash: Optional[str] = None, sink=None):
+        path = '/' + bucket + ('/' + key if key else '') if bucket else '/'
+        path = quote_path(path)
+        headers = dict(headers or {})
+        headers['host'] = self.alias.host
+        if payload_hash is None:
+            payload_hash = hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256
+        sign_v4(method, path, params, headers, payload_hash, self.alias)
+        query = canonical_query(params)
+        url = f'{path}?{query}' if query else path
+        status, response_headers, data = self.pool.request(method, url, body=body or None, headers=headers, sink=sink)
+        if status >= 300:
+            raise self.error(status, data, bucket, key)
+        return response_headers, data
+
+    @staticmethod
+    def error(status: int, data: bytes, bucket: str, key: str) -> BackendError:
+        resource = '/'.join(part for part in (bucket, key) if part)
+        try:
+            tree = strip_namespace(ET.fromstring(data))
+        except ET.ParseError:
+            return BackendError(f'HTTP {status}', code='', status=status, resource=resource)
+        return BackendError(tree.findtext('Message') or f'HTTP {status}', code=tree.findtext('Code') or '', status=status, resource=resource)
+
+    def list_buckets(self):
+        _, data = self.request('GET')
+        tree = strip_namespace(ET.fromstring(data))
+        for bucket in tree.iter('Bucket'):
+            yield bucket.findtext('Name'), bucket.findtext('CreationDate')
+
+    def list_objects(self, bucket: str, prefix: str = '', delimiter: Optional[str] = None):
+        '''Yields ``('file', Contents)`` and ``('folder', prefix)`` pairs, following pagination.'''
+        params = {'list-type': '2', 'prefix': prefix}
+        if delimiter:
+            params['delimiter'] = delimiter
+        while True:
+            _, data = self.request('GET', bucket, params=params)
+            tree = strip_namespace(ET.fromstring(data))
+            for element in tree:
+                if element.tag == 'Contents':
+                    yield 'file', element
+                elif element.tag == 'CommonPrefixes':
+                    yield 'folder', element.findtext('Prefix')
+            token = tree.findtext('NextContinuationToken')
+            if tree.findtext('IsTruncated') != 'true' or not token:
+                return
+            params['continuation-token'] = token
+
+    def head_object(self, bucket: str, key: str) -> dict:
+        headers, _ = self.request('HEAD', bucket, key)
+        return headers
+
+    def get_object(self, bucket: str, key: str, sink):
+        return self.request('GET', bucket, key, sink=sink)[0]
+
+    def put_object(self, bucket: str, key: str, body, length: int, content_type: Optional[str] = None) -> dict:
+        headers = {'content-length': str(length)}
+        if content_type:
+            headers['content-type'] = content_type
+        payload_hash = None if isinstance(body, bytes) else UNSIGNED_PAYLOAD
+        return self.request('PUT', bucket, key, headers=headers, body=body, payload_hash=payload_hash)[0]
+
+    def copy_object(self, source_bucket: str, source_key: str, bucket: str, key: str) -> dict:
+        headers = {'x-amz-copy-source': quote_path(f'/{source_bucket}/{source_key}')}
+        return self.request('PUT', bucket, key, headers=headers)[0]
+
+
+class S3Operations(object):
+    '''`ls`, `stat` and `cp` served by ``S3Client`` with `mc`-compatible records.'''
+
+    def s3_client(self, alias_name: str, insecure: bool = False) -> Optional[S3Client]:
+        alias = load_alias(alias_name)
+        if alias is None:
+            return None
+        return S3Client(alias, insecure=insecure)
+
+    def ls(self, target: str = '', recursive: bool = False, insecure: bool = False, **flags):
+        check_flags(flags)
+        alias_name, bucket, key = split_target(target)
+        client = self.s3_client(alias_name, insecure=insecure)
+        if client is None:
+            raise NotSupported('local path')
+        command = f'ls {target}'
+        try:
+            if not bucket:
+                records = [
+                    {'status': 'success', 'type': 'folder', 'lastModified': iso_timestamp(created or ''), 'size': 0, 'key': f'{name}/', 'etag': ''}
+                    for name, created in client.list_buckets()
+                ]
+            else:
+                records = self.list_records(client, bucket, key, recursive)
+        except BackendError as e:
+            records = [error_record('Unable to list folder.', e)]
+        return make_response(records, name=self.__class__.__name__, command=command)
+
+    def list_records(self, client: S3Client, bucket: str, key: str, recursive: bool) -> list:
+        if key and not key.endswith('/'):
+            # A key without a trailing slash names either an object or a folder.
+            base = key.rsplit('/', 1)[0] + '/' if '/' in key else ''
+            for kind, entry in client.list_objects(bucket, prefix=key, delimiter='/'):
+                if kind == 'file' and entry.findtext('Key') == key:
+                    return [self.object_record(entry, base)]
+            key += '/'
+        delimiter = None if recursive else '/'
+        records = []
+        for kind, entry in client.list_objects(bucket, prefix=key, delimiter=delimiter):
+            if kind == 'folder':
+                records.append({'status': 'success', 'type': 'folder', 'lastModified': '', 'size': 0, 'key': entry[len(key):], 'etag': ''})
+            else:
+                records.append(self.object_record(entry, key))
+        return records
+
+    @staticmethod
+    def object_record(entry: ET.Element, base: str) -> dict:
+        return {
+            'status': 'success',
+            'type': 'file',
+            'lastModified': iso_timestamp(entry.findtext('LastModified') or ''),
+            'size': int(entry.findtext('Size') or 0),
+            'key': entry.findtext('Key')[len(base):],
+            'etag': (entry.findtext('ETag') or '').strip('"'),
+            'storageClass': entry.findtext('StorageClass') or '',
+        }
+
+    def stat(self, target: str = '', insecure: bool = False, **flags):
+        check_flags(flags)
+        alias_name, bucket, key = split_target(target)
+        client = self.s3_client(alias_name, insecure=insecure)
+        if client is None or not key or key.endswith('/'):
+            raise NotSupported('only objects are stat-ed natively')
+        try:
+            headers = client.head_object(bucket, key)
+        except BackendError as e:
+            if e.status == 404:
+                # A missing object may still be a folder, which `mc` knows how to describe.
+                raise NotSupported('not an object')
+            record = error_record(f'Unable to stat `{target}`.', e)
+        else:
+            record = {
+                'status': 'success',
+                'name': key.rsplit('/', 1)[-1],
+                'lastModified': http_timestamp(headers['last-modified']) if 'last-modified' in headers else '',
+                'size': int(headers.get('content-length', 0)),
+                'etag': headers.get('etag', '').strip('"'),
+                'type': 'file',
+                'metadata': {name: value for name, value in headers.items() if name.startswith('x-amz-meta-') or name == 'content-type'},
+            }
+        return make_response([record], name=self.__class__.__name__, command=f'stat {target}')
+
+    def cp(self, source: str = '', target: str = '', recursive: bool = False, insecure: bool = False, **flags):
+        check_flags(flags)
+        if recursive or any(char in source for char in WILDCARDS):
+            raise NotSupported('recursive copy')
+        source_alias, source_bucket, source_key = split_target(source)
+        target_alias, target_bucket, target_key = split_target(target)
+        source_client = self.s3_client(source_alias, insecure=insecure)
+        target_client = self.s3_client(target_alias, insecure=insecure)
+        if source_client is None and target_client is None:
+            raise NotSupported('local copy')
+        if source_client is not None and (not source_key or source_key.endswith('/')):
+            raise NotSupported('folder copy')
+        if target_client is not None and not target_bucket:
+            raise NotSupported('copy to an alias root')
+        if source_client is not None and target_client is not None and source_client.pool is not target_client.pool:
+            raise NotSupported('copy across endpoints')
+        try:
+            if source_client is None:
+                size, target = self.upload(source, target_client, target_bucket, target_key, target)
+            elif target_client is None:
+                size, target = self.download(source_client, source_bucket, source_key, target)
+            else:
+                size = int(source_client.head_object(source_bucket, source_key).get('content-length', 0))
+                if size > MAX_SINGLE_PART:
+                    raise NotSupported('multipart copy')
+                if not target_key or target_key.endswith('/'):
+                    target_key += source_key.rsplit('/', 1)[-1]
+                target_client.copy_object(source_bucket, source_key, target_bucket, target_key)
+        except (BackendError, OSError) as e:
+            record = error_record(f'Failed to copy `{source}`.', e)
+        else:
+            record = {'status': 'success', 'source': source, 'target': target, 'size': size, 'totalCount': 1, 'totalSize': size}
+        return make_response([record], name=self.__class__.__name__, command=f'cp {source} {target}')
+
+    @staticmethod
+    def upload(path: str, client: S3Client, bucket: str, key: str, target: str):
+        size = os.path.getsize(path)
+        if size > MAX_SINGLE_PART:
+            raise NotSupported('multipart upload')
+        if not key or key.endswith('/'):
+            name = os.path.basename(path)
+            key += name
+            target = target.rstrip('/') + '/' + name
+        with open(path, 'rb') as body:
+            client.put_object(bucket, key, body, size, content_type=mimetypes.guess_type(path)[0])
+        return size, target
+
+    @staticmethod
+    def download(client: S3Client, bucket: str, key: str, path: str):
+        if path.endswith(os.sep) or os.path.isdir(path):
+            path = os.path.join(path, key.rsplit('/', 1)[-1])
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        partial = path + '.part.minio'
+        try:
+            with open(partial, 'wb') as sink:
+                client.get_object(bucket, key, sink)
+                size = sink.tell()
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return size, path
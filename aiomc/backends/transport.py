@@ -0,0 +1,233 @@
+'''SigV4 request signing and pooled keep-alive HTTP/1.1 connections.'''
+
+import ssl
+import hmac
+import time
+import socket
+import hashlib
+import datetime
+import threading
+import contextlib
+import contextvars
+import http.client
+from urllib.parse import quote
+from typing import Optional
+
+from aiomc.utils.alias import Alias
+from aiomc.utils.errors import CommandTimeoutError
+
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+# Idle connections kept per endpoint.
+POOL_SIZE = 32
+# Exceptions raised when a pooled connection was closed by the server while idle.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError)
+# Socket timeouts: ``socket.timeout`` only became an alias of ``TimeoutError`` in Python 3.10.
+TIMEOUT_ERRORS = (socket.timeout, TimeoutError)
+
+__all__ = [
+    'sign_v4',
+    'quote_path',
+    'canonical_query',
+    'ConnectionPool',
+    'get_pool',
+    'request_deadline',
+]
+
+# ``(deadline, timeout)`` of the call the current requests belong to.
+_deadline = contextvars.ContextVar('aiomc_request_deadline', default=None)
+
+
+@contextlib.contextmanager
+def request_deadline(timeout: Optional[float]):
+    '''Bounds all the requests made in the block to `timeout` seconds in total, None for no bound.
+
+    A request still running when the time is up raises ``CommandTimeoutError``.
+    '''
+    token = _deadline.set(None if timeout is None else (time.monotonic() + timeout, timeout))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def quote_path(path: str) -> str:
+    return quote(path, safe='/~')
+
+
+def canonical_query(params: Optional[dict]) -> str:
+    if not params:
+        return ''
+    return '&'.join(f"{quote(str(key), safe='~')}={quote(str(value), safe='~')}" for key, value in sorted(params.items()))
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+def signing_key(secret_key: str, date: str, region: str, service: str) -> bytes:
+    key = _hmac(('AWS4' + secret_key).encode('utf-8'), date)
+    key = _hmac(key, region)
+    key = _hmac(key, service)
+    return _hmac(key, 'aws4_request')
+
+
+def sign_v4(method: str, path: str, params: Optional[dict], headers: dict, payload_hash: str, alias: Alias, service: str = 's3', now: Optional[datetime.datetime] = None) -> dict:
+    '''Adds the AWS Signature Version 4 headers to `headers` and returns it.
+
+    `path` must already be URI-encoded and `headers` must contain ``host``.
+    '''
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date = amz_date[:8]
+    headers['x-amz-date'] = amz_date
+    headers['x-amz-content-sha256'] = payload_hash
+    if alias.session_token:
+        headers['x-amz-security-token'] = alias.session_token
+    canonical_headers = {key.lower(): ' '.join(str(value).split()) for key, value in headers.items()}
+    signed_headers = ';'.join(sorted(canonical_headers))
+    canonical_request = '\n'.join([
+        method,
+        path,
+        canonical_query(params),
+        ''.join(f'{key}:{canonical_headers[key]}\n' for key in sorted(canonical_headers)),
+        signed_headers,
+        payload_hash,
+    ])
+    scope = f'{date}/{alias.region}/{service}/aws4_request'
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256',
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+    ])
+    signature = hmac.new(signing_key(alias.secret_key, date, alias.region, service), string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+    headers['Authorization'] = f'AWS4-HMAC-SHA256 Credential={alias.access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}'
+    return headers
+
+
+class ConnectionPool(object):
+    '''Thread-safe pool of keep-alive HTTP/1.1 connections to one endpoint.
+
+    Connections are checked out for the duration of one request and returned
+    once its response has been read completely, so every request after the
+    first reuses an established (and, for HTTPS, already negotiated) socket.
+    '''
+
+    def __init__(self, host: str, secure: bool = False, size: int = POOL_SIZE, timeout: Optional[float] = None, insecure: bool = False):
+        self.host = host
+        self.secure = secure
+        self.size = size
+        self.timeout = timeout
+        self.created = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self._context = None
+        if secure:
+            self._context = ssl._create_unverified_context() if insecure else ssl.create_default_context()
+
+    def _connect(self):
+        self.created += 1
+        if self.secure:
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout, context=self._context)
+        return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def acquire(self):
+        '''Returns ``(connection, reused)``.'''
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def release(self, connection, response=None):
+        '''Returns `connection` to the pool unless the server asked to close it.'''
+        if response is not None and response.will_close:
+            connection.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def remaining(self, connection, deadline) -> Optional[float]:
+        '''Applies the time left before `deadline` to the socket of `connection`.'''
+        if deadline is None:
+            timeout = self.timeout
+        else:
+            timeout = deadline[0] - time.monotonic()
+            if timeout <= 0:
+                raise TimeoutError('timed out')
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return timeout
+
+    def request(self, method: str, url: str, body=None, headers: Optional[dict] = None, sink=None):
+        '''Sends one request, returns ``(status, headers, body)``.
+
+        When `sink` is given, the response body is written to it in chunks
+        instead of being returned. A request that fails on a reused idle
+        connection is retried once on a fresh one. Within ``request_deadline``
+        the request raises ``CommandTimeoutError`` once the time is up.
+        '''
+        headers = headers or {}
+        streamed = False
+        deadline = _deadline.get()
+        for attempt in (0, 1):
+            connection, reused = self.acquire()
+            try:
+                if hasattr(body, 'seek') and attempt:
+                    body.seek(0)
+                self.remaining(connection, deadline)
+                connection.request(method, url, body=body, headers=headers)
+                self.remaining(connection, deadline)
+                response = connection.getresponse()
+                if sink is not None and 200 <= response.status < 300:
+                    while True:
+                        self.remaining(connection, deadline)
+                        chunk = response.read(1 << 16)
+                        if not chunk:
+                            break
+                        streamed = True
+                        sink.write(chunk)
+                    data = b''
+                else:
+                    data = response.read()
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if reused and not attempt and not streamed:
+                    continue
+                raise
+            except TIMEOUT_ERRORS:
+                connection.close()
+                if deadline is None:
+                    raise
+                raise CommandTimeoutError(f'{method} {self.host}{url}', deadline[1], deadline[1] + time.monotonic() - deadline[0]) from None
+            except BaseException:
+                connection.close()
+                raise
+            self.release(connection, response)
+            return response.status, {key.lower(): value for key, value in response.getheaders()}, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: Alias, insecure: bool = False) -> ConnectionPool:
+    '''Returns the shared connection pool for the endpoint of `alias`.'''
+    key = (alias.host, alias.secure, insecure)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(alias.host, secure=alias.secure, insecure=insecure)
+    return pool
@@ -0,0 +1,5 @@
+'''Local stand-ins for MinIO, to exercise aiomc without a real deployment.'''
+
+from .fake_s3 import FakeS3Server
+from .fake_admin import FakeMinioServer
+from .stub_mc import StubMc
@@ -0,0 +1,202 @@
+'''In-process stub of the MinIO admin API, on top of the fake S3 server.'''
+
+import json
+
+from aiomc.backends import madmin
+from .fake_s3 import FakeS3Handler, FakeS3Server
+
+__all__ = [
+    'FakeMinioServer',
+]
+
+ADMIN_PREFIX = '/minio/admin/v3/'
+CANNED_POLICIES = ('readonly', 'readwrite', 'writeonly', 'diagnostics', 'consoleAdmin')
+
+
+def canned_policy(name: str) -> dict:
+    actions = {'readonly': ['s3:GetBucketLocation', 's3:GetObject'], 'writeonly': ['s3:PutObject']}.get(name, ['s3:*'])
+    return {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': actions, 'Resource': ['arn:aws:s3:::*']}]}
+
+
+class FakeMinioHandler(FakeS3Handler):
+
+    def handle_request(self):
+        if not self.path.startswith(ADMIN_PREFIX):
+            return super().handle_request()
+        self.parse()
+        if not self.authorized():
+            return self.admin_error(403, 'SignatureDoesNotMatch', 'The request signature we calculated does not match the signature you provided.')
+        api = self.raw_path[len(ADMIN_PREFIX):].replace('-', '_')
+        handler = getattr(self, f'admin_{api}', None)
+        if handler is None:
+            return self.admin_error(400, 'XMinioAdminInvalidRequest', f'Unsupported admin API: {api}')
+        with self.server.fake.lock:
+            return handler()
+
+    def admin_error(self, status: int, code: str, message: str):
+        body = json.dumps({'Code': code, 'Message': message, 'Resource': self.raw_path}).encode('utf-8')
+        self.reply(status, body, {'Content-Type': 'application/json'})
+
+    def admin_json(self, value, encrypt: bool = False):
+        body = json.dumps(value).encode('utf-8')
+        if encrypt:
+            body = madmin.encrypt_data(self.server.fake.secret_key, body)
+        self.reply(200, body, {'Content-Type': 'application/json'})
+
+    def payload(self, encrypted: bool = False) -> dict:
+        body = madmin.decrypt_data(self.server.fake.secret_key, self.body) if encrypted else self.body
+        return json.loads(body)
+
+    # Users
+
+    def user(self):
+        user = self.server.fake.users.get(self.params.get('accessKey'))
+        if user is None:
+            self.admin_error(404, 'XMinioAdminNoSuchUser', 'The specified user does not exist.')
+        return user
+
+    def admin_add_user(self):
+        payload = self.payload(encrypted=True)
+        users = self.server.fake.users
+        user = users.setdefault(self.params['accessKey'], {'policyName': '', 'memberOf': []})
+        user.update(secretKey=payload['secretKey'], status=payload.get('status', 'enabled'))
+        self.reply(200)
+
+    def admin_remove_user(self):
+        if self.user() is None:
+            return
+        username = self.params['accessKey']
+        del self.server.fake.users[username]
+        for group in self.server.fake.groups.values():
+            if username in group['members']:
+                group['members'].remove(username)
+        self.reply(200)
+
+    def admin_set_user_status(self):
+        user = self.user()
+        if user is not None:
+            user['status'] = self.params['status']
+            self.reply(200)
+
+    def admin_list_users(self):
+        users = {name: {key: value for key, value in user.items() if key != 'secretKey'} for name, user in self.server.fake.users.items()}
+        self.admin_json(users, encrypt=True)
+
+    def admin_user_info(self):
+        user = self.user()
+        if user is not None:
+            self.admin_json({key: value for key, value in user.items() if key != 'secretKey'})
+
+    # Groups
+
+    def group(self, name: str):
+        group = self.server.fake.groups.get(name)
+        if group is None:
+            self.admin_error(404, 'XMinioAdminNoSuchGroup', 'The specified group does not exist.')
+        return group
+
+    def admin_update_group_members(self):
+        payload = self.payload()
+        fake = self.server.fake
+        name, members = payload['group'], payload.get('members') or []
+        missing = [member for member in members if member not in fake.users]
+        if missing:
+            return self.admin_error(404, 'XMinioAdminNoSuchUser', f'The specified user does not exist: {missing[0]}')
+        if payload.get('isRemove'):
+            group = self.group(name)
+            if group is None:
+                return
+            if not members:
+                if group['members']:
+                    return self.admin_error(400, 'XMinioAdminGroupNotEmpty', 'The specified group is not empty - cannot remove it.')
+                del fake.groups[name]
+            for member in members:
+                if member in group['members']:
+                    group['members'].remove(member)
+                    fake.users[member]['memberOf'].remove(name)
+        else:
+            group = fake.groups.setdefault(name, {'name': name, 'status': 'enabled', 'members': [], 'policy': ''})
+            for member in members:
+                if member not in group['members']:
+                    group['members'].append(member)
+                    fake.users[member]['memberOf'].append(name)
+        self.reply(200)
+
+    def admin_groups(self):
+        self.admin_json(sorted(self.server.fake.groups))
+
+    def admin_group(self):
+        group = self.group(self.params.get('group'))
+        if group is not None:
+            self.admin_json(group)
+
+    def admin_set_group_status(self):
+        group = self.group(self.params.get('group'))
+        if group is not None:
+            group['status'] = self.params['status']
+            self.reply(200)
+
+    # Policies
+
+    def admin_add_canned_policy(self):
+        try:
+            self.server.fake.policies[self.params['name']] = json.loads(self.body)
+        except ValueError:
+            return self.admin_error(400, 'XMinioMalformedJSON', 'The JSON you provided was not well-formed or did not validate against our published format.')
+        self.reply(200)
+
+    def admin_remove_canned_policy(self):
+        if self.server.fake.policies.pop(self.params.get('name'), None) is None:
+            return self.admin_error(404, 'XMinioAdminNoSuchPolicy', 'The canned policy does not exist.')
+        self.reply(200)
+
+    def admin_list_canned_policies(self):
+        self.admin_json(self.server.fake.policies)
+
+    def admin_info_canned_policy(self):
+        policy = self.server.fake.policies.get(self.params.get('name'))
+        if policy is None:
+            return self.admin_error(404, 'XMinioAdminNoSuchPolicy', 'The canned policy does not exist.')
+        self.admin_json(policy)
+
+    def admin_set_user_or_group_policy(self):
+        fake = self.server.fake
+        name, entity = self.params['policyName'], self.params['userOrGroup']
+        if name not in fake.policies:
+            return self.admin_error(404, 'XMinioAdminNoSuchPolicy', 'The canned policy does not exist.')
+        if self.params.get('isGroup') == 'true':
+            group = self.group(entity)
+            if group is None:
+                return
+            group['policy'] = name
+        else:
+            self.params['accessKey'] = entity
+            user = self.user()
+            if user is None:
+                return
+            user['policyName'] = name
+        self.reply(200)
+
+
+class FakeMinioServer(FakeS3Server):
+    '''Fake S3 server that also stubs the admin API for users, groups and policies.
+
+    Secret-bearing payloads are encrypted and decrypted like a real server
+    does, so it needs the ``cryptography`` package.
+
+    Usage::
+
+      >>> with FakeMinioServer() as server:
+      ...     os.environ.update(server.env('fake'))
+      ...     admin_user_add(target='fake', username='rockstar', password='verysecret', backend='native')
+      ...     server.users['rockstar']['status']
+      'enabled'
+    '''
+
+    handler_class = FakeMinioHandler
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.users = {}
+        self.groups = {}
+        self.policies = {name: canned_policy(name) for name in CANNED_POLICIES}
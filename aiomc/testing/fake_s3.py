@@ -0,0 +1,298 @@
+'''In-process fake S3 server for exercising the native backend.'''
+
+import time
+import hmac
+import hashlib
+import datetime
+import threading
+import email.utils
+from xml.sax.saxutils import escape
+from urllib.parse import urlsplit, parse_qsl, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from aiomc.utils.alias import Alias
+from aiomc.backends.transport import sign_v4
+
+__all__ = [
+    'FakeS3Server',
+]
+
+XMLNS = 'http://s3.amazonaws.com/doc/2006-03-01/'
+
+
+def iso(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.fake.connections += 1
+
+    # Plumbing
+
+    def parse(self):
+        parts = urlsplit(self.path)
+        self.raw_path = parts.path
+        self.params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        path = unquote(parts.path).lstrip('/')
+        self.bucket, _, self.key = path.partition('/')
+        length = int(self.headers.get('content-length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        self.server.fake.requests.append((self.command, self.raw_path, self.params))
+
+    def authorized(self) -> bool:
+        fake = self.server.fake
+        if not fake.verify:
+            return True
+        authorization = self.headers.get('authorization', '')
+        try:
+            fields = dict(part.strip().split('=', 1) for part in authorization.split(' ', 1)[1].split(','))
+            access_key, date, region, service, _ = fields['Credential'].split('/')
+            signed_headers = fields['SignedHeaders'].split(';')
+            now = datetime.datetime.strptime(self.headers['x-amz-date'], '%Y%m%dT%H%M%SZ').replace(tzinfo=datetime.timezone.utc)
+        except (IndexError, KeyError, ValueError, TypeError):
+            return False
+        if access_key != fake.access_key:
+            return False
+        headers = {name: self.headers[name] for name in signed_headers if name not in ('x-amz-date', 'x-amz-content-sha256', 'x-amz-security-token')}
+        expected = sign_v4(self.command, self.raw_path, self.params, headers, self.headers['x-amz-content-sha256'], fake.alias(), service=service, now=now)
+        return hmac.compare_digest(expected['Authorization'], authorization)
+
+    def reply(self, status: int, body: bytes = b'', headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def reply_xml(self, status: int, body: str):
+        self.reply(status, ('<?xml version="1.0" encoding="UTF-8"?>\n' + body).encode('utf-8'), {'Content-Type': 'application/xml'})
+
+    def error(self, status: int, code: str, message: str):
+        resource = escape('/' + '/'.join(part for part in (self.bucket, self.key) if part))
+        self.reply_xml(status, f'<Error><Code>{code}</Code><Message>{escape(message)}</Message><Resource>{resource}</Resource></Error>')
+
+    def handle_request(self):
+        self.parse()
+        if not self.authorized():
+            return self.error(403, 'SignatureDoesNotMatch', 'The request signature we calculated does not match the signature you provided.')
+        handler = getattr(self, f'{self.command.lower()}_{"object" if self.key else "bucket" if self.bucket else "service"}', None)
+        if handler is None:
+            return self.error(405, 'MethodNotAllowed', 'The specified method is not allowed against this resource.')
+        with self.server.fake.lock:
+            return handler()
+
+    def do_GET(self):
+        self.handle_request()
+
+    do_PUT = do_HEAD = do_DELETE = do_POST = do_GET
+
+    # Operations
+
+    def lookup_bucket(self):
+        bucket = self.server.fake.buckets.get(self.bucket)
+        if bucket is None:
+            self.error(404, 'NoSuchBucket', 'The specified bucket does not exist')
+        return bucket
+
+    def get_service(self):
+        buckets = ''.join(
+            f'<Bucket><Name>{escape(name)}</Name><CreationDate>{iso(bucket["created"])}</CreationDate></Bucket>'
+            for name, bucket in sorted(self.server.fake.buckets.items())
+        )
+        self.reply_xml(200, f'<ListAllMyBucketsResult xmlns="{XMLNS}"><Owner><ID>minio</ID></Owner><Buckets>{buckets}</Buckets></ListAllMyBucketsResult>')
+
+    def put_bucket(self):
+        if self.bucket in self.server.fake.buckets:
+            return self.error(409, 'BucketAlreadyOwnedByYou', 'Your previous request to create the named bucket succeeded and you already own it.')
+        self.server.fake.buckets[self.bucket] = {'created': time.time(), 'objects': {}}
+        self.reply(200)
+
+    def get_bucket(self):
+        bucket = self.lookup_bucket()
+        if bucket is None:
+            return
+        prefix = self.params.get('prefix', '')
+        delimiter = self.params.get('delimiter', '')
+        max_keys = int(self.params.get('max-keys', self.server.fake.max_keys))
+        after = self.params.get('continuation-token') or self.params.get('start-after', '')
+        contents, prefixes, last, truncated = [], [], None, False
+        for key in sorted(bucket['objects']):
+            if not key.startswith(prefix) or key <= after:
+                continue
+            if len(contents) + len(prefixes) >= max_keys:
+                truncated = True
+                break
+            if delimiter:
+                cut = key.find(delimiter, len(prefix))
+                if cut >= 0:
+                    common = key[:cut + len(delimiter)]
+                    if not prefixes or prefixes[-1] != common:
+                        prefixes.append(common)
+                    last = common + '\uffff'
+                    after = last
+                    continue
+            contents.append(key)
+            last = key
+        body = ''.join(
+            f'<Contents><Key>{escape(key)}</Key><LastModified>{iso(bucket["objects"][key]["mtime"])}</LastModified>'
+            f'<ETag>&quot;{bucket["objects"][key]["etag"]}&quot;</ETag><Size>{len(bucket["objects"][key]["data"])}</Size>'
+            f'<StorageClass>STANDARD</StorageClass></Contents>'
+            for key in contents
+        )
+        body += ''.join(f'<CommonPrefixes><Prefix>{escape(common)}</Prefix></CommonPrefixes>' for common in prefixes)
+        token = f'<NextContinuationToken>{escape(last)}</NextContinuationToken>' if truncated and last else ''
+        self.reply_xml(200, (
+            f'<ListBucketResult xmlns="{XMLNS}"><Name>{escape(self.bucket)}</Name><Prefix>{escape(prefix)}</Prefix>'
+            f'<KeyCount>{len(contents) + len(prefixes)}</KeyCount><MaxKeys>{max_keys}</MaxKeys>'
+            f'<IsTruncated>{"true" if truncated else "false"}</IsTruncated>{token}{body}</ListBucketResult>'
+        ))
+
+    def delete_bucket(self):
+        bucket = self.lookup_bucket()
+        if bucket is None:
+            return
+        if bucket['objects']:
+            return self.error(409, 'BucketNotEmpty', 'The bucket you tried to delete is not empty')
+        del self.server.fake.buckets[self.bucket]
+        self.reply(204)
+
+    def lookup_object(self):
+        bucket = self.lookup_bucket()
+        if bucket is None:
+            return None
+        entry = bucket['objects'].get(self.key)
+        if entry is None:
+            self.error(404, 'NoSuchKey', 'The specified key does not exist.')
+        return entry
+
+    def object_headers(self, entry):
+        headers = {'ETag': f'"{entry["etag"]}"', 'Last-Modified': email.utils.formatdate(entry['mtime'], usegmt=True), 'Content-Type': entry['content_type']}
+        headers.update(entry['metadata'])
+        return headers
+
+    def head_object(self):
+        entry = self.lookup_object()
+        if entry is None:
+            return
+        self.send_response(200)
+        for name, value in self.object_headers(entry).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(entry['data'])))
+        self.end_headers()
+
+    def get_object(self):
+        entry = self.lookup_object()
+        if entry is not None:
+            self.reply(200, entry['data'], self.object_headers(entry))
+
+    def put_object(self):
+        bucket = self.lookup_bucket()
+        if bucket is None:
+            return
+        source = self.headers.get('x-amz-copy-source')
+        if source:
+            source_bucket, _, source_key = unquote(source).lstrip('/').partition('/')
+            original = self.server.fake.buckets.get(source_bucket, {}).get('objects', {}).get(source_key)
+            if original is None:
+                return self.error(404, 'NoSuchKey', 'The specified key does not exist.')
+            entry = dict(original, mtime=time.time())
+            bucket['objects'][self.key] = entry
+            return self.reply_xml(200, f'<CopyObjectResult><LastModified>{iso(entry["mtime"])}</LastModified><ETag>&quot;{entry["etag"]}&quot;</ETag></CopyObjectResult>')
+        self.server.fake.put(self.bucket, self.key, self.body, content_type=self.headers.get('content-type'), metadata={
+            name: value for name, value in self.headers.items() if name.lower().startswith('x-amz-meta-')
+        })
+        self.reply(200, headers={'ETag': f'"{bucket["objects"][self.key]["etag"]}"'})
+
+    def delete_object(self):
+        bucket = self.lookup_bucket()
+        if bucket is not None:
+            bucket['objects'].pop(self.key, None)
+            self.reply(204)
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeS3Server(object):
+    '''S3-compatible server running in a background thread, backed by dicts.
+
+    It checks SigV4 signatures and speaks keep-alive HTTP/1.1, so it can be
+    used to exercise the native backend end to end. ``requests`` records every
+    request and ``connections`` counts accepted sockets.
+
+    Usage::
+
+      >>> with FakeS3Server() as server:
+      ...     server.put('bucket', 'photos/cat.jpg', b'meow')
+      ...     os.environ.update(server.env('fake'))
+      ...     ls(target='fake/bucket/photos/', backend='native').content
+      {'status': 'success', 'type': 'file', 'key': 'cat.jpg', 'size': 4, ...}
+    '''
+
+    handler_class = FakeS3Handler
+
+    def __init__(self, access_key: str = 'minioadmin', secret_key: str = 'minioadmin', region: str = 'us-east-1', verify: bool = True, max_keys: int = 1000):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.verify = verify
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.RLock()
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def alias(self, name: str = 'fake') -> Alias:
+        return Alias(name, self.url, self.access_key, self.secret_key, region=self.region)
+
+    def env(self, name: str = 'fake') -> dict:
+        '''The ``MC_HOST_<name>`` variable pointing an alias at this server.'''
+        return {f'MC_HOST_{name}': self.url.replace('://', f'://{self.access_key}:{self.secret_key}@', 1)}
+
+    def put(self, bucket: str, key: str, data: bytes, content_type: str = None, metadata: dict = None):
+        with self.lock:
+            objects = self.buckets.setdefault(bucket, {'created': time.time(), 'objects': {}})['objects']
+            objects[key] = {
+                'data': data,
+                'etag': hashlib.md5(data).hexdigest(),
+                'mtime': time.time(),
+                'content_type': content_type or 'application/octet-stream',
+                'metadata': metadata or {},
+            }
+
+    def start(self) -> 'FakeS3Server':
+        self.httpd = FakeHTTPServer(('127.0.0.1', 0), self.handler_class)
+        self.httpd.fake = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='aiomc-fake-s3', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
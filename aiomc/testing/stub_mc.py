@@ -0,0 +1,217 @@
+'''A stand-in for the `mc` binary, with scripted behaviour.
+
+Run as ``python stub_mc.py ARGS...``, it prints what `mc --json`
+would for the mode set in ``AIOMC_STUB_MODE``:
+
+- ``echo``: one success record holding the arguments it got (the default),
+- ``lines``: ``AIOMC_STUB_LINES`` `ls` entries, padded to about
+  ``AIOMC_STUB_SIZE`` bytes each with a longer key,
+- ``error``: an indented error record and exit status 1,
+- ``sleep``: sleeps ``AIOMC_STUB_SLEEP`` seconds, then echoes,
+- ``hang``: like ``sleep``, but ignores SIGTERM,
+- ``tree``: a source of ``AIOMC_STUB_LINES`` folders and one top-level
+  file, for `ls`, `du` and `mirror`. Mirroring takes ``AIOMC_STUB_SLEEP``
+  seconds per folder it covers, the whole tree less the ``--exclude``-d
+  folders for the source itself.
+- ``cp``: copies ``AIOMC_STUB_LINES`` objects of ``AIOMC_STUB_SIZE``
+  bytes from a source ending with ``/``, one object otherwise, and fails
+  with an error record for a source with ``missing`` in it.
+
+``AIOMC_STUB_DELAY`` adds a delay, in seconds, before any output. With
+``AIOMC_STUB_STATE`` naming a file to count runs in, the first
+``AIOMC_STUB_FAILURES`` runs fail with the error code ``AIOMC_STUB_CODE``,
+and every ``AIOMC_STUB_SLOW_EVERY``-th run sleeps ``AIOMC_STUB_SLEEP``.
+'''
+
+import os
+import sys
+import json
+import time
+import shlex
+import signal
+import shutil
+import tempfile
+
+__all__ = [
+    'StubMc',
+]
+
+ENTRY = {'status': 'success', 'type': 'file', 'lastModified': '2020-06-01T12:25:04.163216097+01:00', 'etag': 'd41d8cd98f00b204e9800998ecf8427e'}
+
+
+def count_run(path: str) -> int:
+    '''Counts this run in the file at `path`, returns its number from 1.'''
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, b'.')
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+def error_record(code: str) -> dict:
+    cause = {'message': f'{code} error.', 'error': {'Code': code, 'Message': f'{code} error.'}}
+    return {'status': 'error', 'error': {'message': 'Unable to run command.', 'cause': cause}}
+
+
+def tree(args: list, env: dict, out) -> int:
+    folders = int(env.get('AIOMC_STUB_LINES', 10))
+    path = args[-1].rstrip('/')
+    if 'ls' in args:
+        for index in range(folders):
+            out.write(json.dumps(dict(ENTRY, type='folder', size=0, key=f'dir-{index}/')) + '\n')
+        out.write(json.dumps(dict(ENTRY, size=1, key='top.txt')) + '\n')
+    elif 'du' in args:
+        out.write(json.dumps({'status': 'success', 'prefix': path, 'size': 1 << 20, 'objects': 1}) + '\n')
+    elif 'mirror' in args:
+        source = args[-2].rstrip('/')
+        covered = 1 if source.rsplit('/', 1)[-1].startswith('dir-') else folders - args.count('--exclude')
+        time.sleep(float(env.get('AIOMC_STUB_SLEEP', 0)) * covered)
+        out.write(json.dumps({'status': 'success', 'source': f'{source}/obj', 'target': f'{path}/obj', 'size': 1 << 20}) + '\n')
+    return 0
+
+
+def copy(args: list, env: dict, out) -> int:
+    source, target = args[-2], args[-1]
+    if 'missing' in source:
+        out.write(json.dumps(error_record('NoSuchKey'), indent=1) + '\n')
+        return 1
+    size = int(env.get('AIOMC_STUB_SIZE', 0))
+    count = int(env.get('AIOMC_STUB_LINES', 10)) if source.endswith('/') else 1
+    for index in range(count):
+        name = f'{source}obj-{index}' if source.endswith('/') else source
+        out.write(json.dumps({'status': 'success', 'source': name, 'target': f"{target.rstrip('/')}/{name.rsplit('/', 1)[-1]}", 'size': size, 'totalCount': count, 'totalSize': size * count}) + '\n')
+        out.flush()
+    return 0
+
+
+def main(args: list, env: dict) -> int:
+    mode = env.get('AIOMC_STUB_MODE', 'echo')
+    time.sleep(float(env.get('AIOMC_STUB_DELAY', 0)))
+    run = count_run(env['AIOMC_STUB_STATE']) if env.get('AIOMC_STUB_STATE') else 0
+    if run and run <= int(env.get('AIOMC_STUB_FAILURES', 0)):
+        sys.stdout.write(json.dumps(error_record(env.get('AIOMC_STUB_CODE', 'SlowDown')), indent=1) + '\n')
+        return 1
+    slow_every = int(env.get('AIOMC_STUB_SLOW_EVERY', 0))
+    if run and slow_every and run % slow_every == 0:
+        time.sleep(float(env.get('AIOMC_STUB_SLEEP', 3600)))
+    if mode == 'hang':
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    if mode in ('sleep', 'hang'):
+        time.sleep(float(env.get('AIOMC_STUB_SLEEP', 3600)))
+    out = sys.stdout
+    if mode == 'tree':
+        return tree(args, env, out)
+    if mode == 'cp':
+        return copy(args, env, out)
+    if mode == 'lines':
+        size = int(env.get('AIOMC_STUB_SIZE', 0))
+        for index in range(int(env.get('AIOMC_STUB_LINES', 10))):
+            line = json.dumps(dict(ENTRY, size=index, key=f'dir/key-{index}'))
+            if len(line) < size:
+                line = json.dumps(dict(ENTRY, size=index, key=f'dir/key-{index}-' + 'x' * (size - len(line) - 1)))
+            out.write(line + '\n')
+        return 0
+    if mode == 'error':
+        out.write(json.dumps(error_record(env.get('AIOMC_STUB_CODE', 'AccessDenied')), indent=1) + '\n')
+        return 1
+    out.write(json.dumps({'status': 'success', 'args': args}) + '\n')
+    return 0
+
+
+class StubMc(object):
+    '''Installs a stub `mc` for the duration of a ``with`` block.
+
+    The stub is a small script in a temporary directory, used through
+    ``set_mc_binary``; the previous binary is restored on exit. With
+    `on_path`, the directory is also put first on ``PATH``, so that the
+    stub is found like an installed `mc` by aiomc and child processes.
+
+    Usage::
+
+      >>> with StubMc(mode='sleep', sleep=30):
+      ...     ls(target='s3/bucket', timeout=1)
+      Traceback (most recent call last):
+      CommandTimeoutError: Command timed out after 1.00s (timeout 1s): mc --json ls s3/bucket
+
+    :param mode: ``echo``, ``lines``, ``error``, ``sleep``, ``hang``, ``tree`` or ``cp``.
+    :param sleep: seconds slept by the ``sleep`` and ``hang`` modes, per folder by ``tree``.
+    :param lines: number of entries printed by the ``lines`` mode, folders of
+                  ``tree``, objects under a ``cp`` source.
+    :param delay: seconds waited before any output, in every mode.
+    :param failures: number of first runs failing with the error `code`.
+    :param code: error code of the ``error`` mode and of failing runs.
+    :param slow_every: make every n-th run sleep `sleep` seconds first.
+    :param size: approximate size in bytes of each ``lines`` entry, size of
+                 each object copied by ``cp``.
+    :param on_path: put the stub first on ``PATH`` too.
+    '''
+
+    def __init__(self, mode: str = 'echo', sleep: float = 3600, lines: int = 10, delay: float = 0, failures: int = 0, code: str = 'AccessDenied', slow_every: int = 0, size: int = 0, on_path: bool = False):
+        self.env = {
+            'AIOMC_STUB_MODE': mode,
+            'AIOMC_STUB_SLEEP': str(sleep),
+            'AIOMC_STUB_LINES': str(lines),
+            'AIOMC_STUB_SIZE': str(size),
+            'AIOMC_STUB_DELAY': str(delay),
+            'AIOMC_STUB_FAILURES': str(failures),
+            'AIOMC_STUB_CODE': code,
+            'AIOMC_STUB_SLOW_EVERY': str(slow_every),
+        }
+        self.on_path = on_path
+        self.directory = None
+        self.previous = None
+        self.previous_path = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, 'mc')
+
+    def install(self) -> 'StubMc':
+        # Imported here: the stub itself runs without importing aiomc.
+        from aiomc.utils.executor import get_mc_binary, set_mc_binary
+        self.directory = tempfile.mkdtemp(prefix='aiomc-stub-')
+        self.env['AIOMC_STUB_STATE'] = os.path.join(self.directory, 'runs')
+        exports = ' '.join(f'{name}={shlex.quote(value)}' for name, value in self.env.items())
+        with open(self.path, 'w') as script:
+            script.write(f'#!/bin/sh\n{exports} exec {shlex.quote(sys.executable)} -S {shlex.quote(os.path.abspath(__file__))} "$@"\n')
+        os.chmod(self.path, 0o755)
+        try:
+            self.previous = get_mc_binary()
+        except Exception:
+            self.previous = None
+        set_mc_binary(self.path)
+        if self.on_path:
+            self.previous_path = os.environ.get('PATH')
+            os.environ['PATH'] = os.pathsep.join(filter(None, (self.directory, self.previous_path)))
+        return self
+
+    @property
+    def runs(self) -> int:
+        '''Number of times the stub ran.'''
+        try:
+            return os.path.getsize(self.env['AIOMC_STUB_STATE'])
+        except OSError:
+            return 0
+
+    def uninstall(self):
+        from aiomc.utils.executor import set_mc_binary
+        set_mc_binary(self.previous)
+        if self.on_path:
+            if self.previous_path is None:
+                os.environ.pop('PATH', None)
+            else:
+                os.environ['PATH'] = self.previous_path
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:], os.environ))
@@ -1,8 +1,86 @@
 from .executor import (
     Command,
     AsyncCommand,
+    CommandSpec,
+    compile_command,
     Response,
     aiomcError,
+    CommandTimeoutError,
+    set_default_timeout,
+    get_default_timeout,
     check_error,
-    mc_binary_path
-)
\ No newline at end of file
+    get_mc_binary,
+    set_mc_binary,
+)
+from .errors import (
+    TransferStalledError,
+    MinioError,
+    TransientError,
+    ThrottledError,
+    NetworkError,
+    AccessDeniedError,
+    NotFoundError,
+    ConflictError,
+    InvalidRequestError,
+    classify_error,
+)
+from .retry import (
+    RetryBudget,
+    RetryPolicy,
+    HedgePolicy,
+    set_retry_policy,
+    set_hedge_policy,
+)
+from .listing import ListingFrame
+from .index import ListingIndex
+from .cache import (
+    CommandCache,
+    get_cache,
+    set_cache,
+    configure_cache,
+)
+from .coalesce import (
+    SingleFlight,
+    get_single_flight,
+    configure_coalescing,
+)
+from .instrument import (
+    CommandTiming,
+    add_listener,
+    remove_listener,
+    trace_commands,
+    configure_instrumentation,
+    export_histograms,
+    reset_histograms,
+)
+from .batch import (
+    map_commands,
+    batch,
+    get_thread_pool,
+    set_thread_pool,
+)
+from .loop import (
+    BackgroundLoop,
+    get_background_loop,
+    shutdown_background_loop,
+)
+from .alias import (
+    Alias,
+    register_alias,
+    unregister_alias,
+    registered_aliases,
+    use_private_config_dir,
+)
+from .scheduler import (
+    CommandScheduler,
+    get_scheduler,
+    set_scheduler,
+    configure_scheduler,
+)
+
+
+def __getattr__(name):
+    if name == 'mc_binary_path':
+        from . import executor
+        return executor.mc_binary_path
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
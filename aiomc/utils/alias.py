@@ -0,0 +1,290 @@
+'''Endpoint and credentials of `mc` aliases.'''
+
+import os
+import json
+import atexit
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import urlsplit, unquote, quote
+
+from .cache import get_cache
+
+__all__ = [
+    'Alias',
+    'load_alias',
+    'list_aliases',
+    'mc_config_path',
+    'host_variable',
+    'register_alias',
+    'unregister_alias',
+    'registered_aliases',
+    'use_private_config_dir',
+]
+
+MC_HOST_PREFIX = 'MC_HOST_'
+SHM_DIRECTORY = '/dev/shm'
+
+
+class Alias(object):
+    '''Endpoint and credentials of an `mc` alias.
+
+    Usage::
+
+      >>> alias = Alias('play', 'https://play.min.io', 'Q3AM3UQ867SPQQA43P2F', 'zuf+tfteSlswRu7BJ86wekitnifILbZam1KYY3TG')
+      >>> alias.host, alias.secure
+      ('play.min.io', True)
+    '''
+
+    __slots__ = ('name', 'url', 'access_key', 'secret_key', 'session_token', 'region', 'api', 'path')
+
+    def __init__(self, name: str, url: str, access_key: str = '', secret_key: str = '', session_token: Optional[str] = None, region: str = 'us-east-1', api: str = 's3v4', path: str = 'auto'):
+        self.name = name
+        self.url = url.rstrip('/')
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+        self.region = region or 'us-east-1'
+        self.api = api
+        self.path = path
+
+    @property
+    def secure(self) -> bool:
+        return urlsplit(self.url).scheme == 'https'
+
+    @property
+    def host(self) -> str:
+        '''Host and, when not the default for the scheme, port of the endpoint.'''
+        return urlsplit(self.url).netloc.rsplit('@', 1)[-1]
+
+    @classmethod
+    def from_env_url(cls, name: str, value: str) -> 'Alias':
+        '''Parses the ``MC_HOST_<alias>`` form ``https://ACCESS:SECRET[:TOKEN]@host:port``.'''
+        parts = urlsplit(value)
+        access_key = unquote(parts.username or '')
+        secret, _, token = (parts.password or '').partition(':')
+        netloc = parts.netloc.rsplit('@', 1)[-1]
+        return cls(name, f'{parts.scheme}://{netloc}', access_key, unquote(secret), unquote(token) or None)
+
+    @property
+    def env_url(self) -> str:
+        '''The ``MC_HOST_<alias>`` form of the alias, the inverse of ``from_env_url``.'''
+        parts = urlsplit(self.url)
+        if not self.access_key:
+            return f'{parts.scheme}://{parts.netloc}'
+        credentials = ':'.join(quote(value, safe='') for value in (self.access_key, self.secret_key, self.session_token) if value is not None)
+        return f'{parts.scheme}://{credentials}@{parts.netloc}'
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[name='{self.name}', url='{self.url}']"
+
+
+def mc_config_path() -> Path:
+    '''Location of the `mc` configuration file.'''
+    if _private_config_dir is not None:
+        return Path(private_config_dir()).joinpath('config.json')
+    config_dir = os.environ.get('MC_CONFIG_DIR')
+    root = Path(config_dir) if config_dir else Path.home().joinpath('.mc')
+    return root.joinpath('config.json')
+
+
+_config_cache = {}
+_config_lock = threading.Lock()
+
+
+def read_mc_config(path: Optional[Path] = None) -> dict:
+    '''Returns the aliases of the `mc` configuration, re-read when the file changes.'''
+    path = path or mc_config_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    with _config_lock:
+        cached = _config_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        config = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    hosts = config.get('aliases') or config.get('hosts') or {}
+    with _config_lock:
+        _config_cache[path] = (mtime, hosts)
+    return hosts
+
+
+def load_alias(name: str) -> Optional[Alias]:
+    '''Looks up an alias the way `mc` does.
+
+    Aliases registered with ``register_alias`` come first, then
+    ``MC_HOST_<alias>`` in the environment takes precedence over the `mc`
+    configuration file. Returns ``None`` for unknown aliases, which `mc`
+    treats as local paths.
+    '''
+    if not name:
+        return None
+    alias = _registry.get(name)
+    if alias is not None:
+        return alias
+    value = os.environ.get(f'{MC_HOST_PREFIX}{name}')
+    if value:
+        return Alias.from_env_url(name, value)
+    host = read_mc_config().get(name)
+    if not host:
+        return None
+    return Alias(
+        name,
+        host.get('url', ''),
+        access_key=host.get('accessKey', ''),
+        secret_key=host.get('secretKey', ''),
+        session_token=host.get('sessionToken') or None,
+        api=host.get('api', 's3v4'),
+        path=host.get('path', 'auto'),
+    )
+
+
+def list_aliases() -> list:
+    '''Names of the aliases `mc` knows: the registered ones, those of its configuration and of ``MC_HOST_<alias>`` variables.'''
+    names = set(read_mc_config())
+    names.update(_registry)
+    names.update(name[len(MC_HOST_PREFIX):] for name, value in os.environ.items() if name.startswith(MC_HOST_PREFIX) and value)
+    return sorted(names)
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+# Variables added to the environment of `mc`, None when there are none.
+_overrides = None
+_private_config_dir = None
+
+
+def _update_overrides():
+    global _overrides
+    _overrides = {f'{MC_HOST_PREFIX}{name}': alias.env_url for name, alias in _registry.items()} or None
+
+
+def _invalidate_cache(name: str):
+    # Cached reads of the alias may come from another endpoint or other credentials.
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate(name)
+
+
+def register_alias(alias: Union[Alias, str], url: Optional[str] = None, access_key: str = '', secret_key: str = '', session_token: Optional[str] = None) -> Alias:
+    '''Keeps an alias in memory and hands it to every `mc` process as ``MC_HOST_<alias>``.
+
+    Nothing is written to the `mc` configuration, so concurrent workers do
+    not contend for it, and the native backends see the alias too. A
+    registered alias takes precedence over one of the same name in the
+    environment or the configuration. Cached reads of the alias are dropped.
+
+    Usage::
+
+      >>> register_alias('prod', 'https://minio.prod:9000', 'admin', 'secret')
+      Alias[name='prod', url='https://minio.prod:9000']
+      >>> register_alias(Alias('dev', 'http://localhost:9000', 'minio', 'minio123'))
+      >>> admin_user_list(target='prod')
+
+    :param alias: name of the alias, or an ``Alias``.
+    :param url: endpoint of the alias, when `alias` is a name.
+    '''
+    if not isinstance(alias, Alias):
+        alias = Alias(alias, url or '', access_key, secret_key, session_token)
+    with _registry_lock:
+        _registry[alias.name] = alias
+        _update_overrides()
+    _invalidate_cache(alias.name)
+    return alias
+
+
+def unregister_alias(name: str) -> Optional[Alias]:
+    '''Forgets a registered alias, returning it or None if it was not registered.'''
+    with _registry_lock:
+        alias = _registry.pop(name, None)
+        _update_overrides()
+    if alias is not None:
+        _invalidate_cache(name)
+    return alias
+
+
+def registered_aliases() -> dict:
+    '''The aliases registered with ``register_alias``, keyed by name.'''
+    return dict(_registry)
+
+
+def use_private_config_dir(enabled: bool = True):
+    '''Gives this process an `mc` configuration directory of its own, on tmpfs when there is one.
+
+    `mc` runs with ``MC_CONFIG_DIR`` pointing at it, the same as
+    ``--config-dir``, so it never reads or locks the shared configuration.
+    The aliases of the shared configuration are copied once when the
+    directory is created; a forked worker gets its own directory.
+    '''
+    global _private_config_dir
+    with _registry_lock:
+        if enabled:
+            _private_config_dir = _private_config_dir or ''
+        else:
+            _remove_private_config_dir()
+            _private_config_dir = None
+
+
+def private_config_dir() -> Optional[str]:
+    '''Path of the private configuration directory, created on first use; None when not enabled.'''
+    global _private_config_dir
+    if _private_config_dir == '':
+        with _registry_lock:
+            # Concurrent first calls all see '', only the first one creates the directory.
+            if _private_config_dir == '':
+                directory = SHM_DIRECTORY if os.access(SHM_DIRECTORY, os.W_OK) else None
+                path = tempfile.mkdtemp(prefix=f'aiomc-mc-{os.getpid()}-', dir=directory)
+                shared = Path(os.environ.get('MC_CONFIG_DIR') or Path.home().joinpath('.mc')).joinpath('config.json')
+                try:
+                    shutil.copyfile(shared, os.path.join(path, 'config.json'))
+                except OSError:
+                    pass
+                _private_config_dir = path
+    return _private_config_dir or None
+
+
+def _remove_private_config_dir():
+    if _private_config_dir and os.path.basename(_private_config_dir).startswith(f'aiomc-mc-{os.getpid()}-'):
+        shutil.rmtree(_private_config_dir, ignore_errors=True)
+
+
+def host_variable(name: str) -> Optional[str]:
+    '''The ``MC_HOST_<alias>`` value `mc` gets for alias `name`, None when it reads the configuration instead.'''
+    if not name:
+        return None
+    variable = f'{MC_HOST_PREFIX}{name}'
+    overrides = _overrides
+    if overrides is not None and variable in overrides:
+        return overrides[variable]
+    return os.environ.get(variable)
+
+
+def alias_environment() -> Optional[dict]:
+    '''Environment of `mc` processes, None to inherit this process's when there is nothing to add.'''
+    overrides = _overrides
+    if overrides is None and _private_config_dir is None:
+        return None
+    environment = dict(os.environ)
+    environment.update(overrides or ())
+    if _private_config_dir is not None:
+        environment['MC_CONFIG_DIR'] = private_config_dir()
+    return environment
+
+
+def _reset_after_fork():
+    # The child creates its own directory on first use, the parent keeps removing its one.
+    global _private_config_dir, _registry_lock
+    _registry_lock = threading.Lock()
+    if _private_config_dir is not None:
+        _private_config_dir = ''
+
+
+atexit.register(_remove_private_config_dir)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,138 @@
+'''Concurrent execution of many sync commands on a shared thread pool.'''
+
+import os
+import threading
+import collections
+import concurrent.futures
+from typing import Callable, Iterable, Iterator, Optional
+
+from .scheduler import default_concurrency
+
+__all__ = [
+    'map_commands',
+    'batch',
+    'get_thread_pool',
+    'set_thread_pool',
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    '''Returns the thread pool running batched commands, created on first use.
+
+    It has ``default_concurrency()`` threads; each call to ``map_commands``
+    limits how many of them it occupies.
+    '''
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = concurrent.futures.ThreadPoolExecutor(default_concurrency(), thread_name_prefix='aiomc-batch')
+    return _pool
+
+
+def set_thread_pool(pool: Optional[concurrent.futures.ThreadPoolExecutor]):
+    '''Replaces the thread pool running batched commands, None to create a default one on next use.'''
+    global _pool
+    _pool = pool
+
+
+def _reset_after_fork():
+    # The pool threads do not exist in a forked child.
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _outcome(future: concurrent.futures.Future, return_exceptions: bool):
+    error = future.exception()
+    if error is None:
+        return future.result()
+    if return_exceptions and isinstance(error, Exception):
+        return error
+    raise error
+
+
+def map_commands(fn: Callable, kwargs_iter: Iterable[dict], max_workers: int = 8, ordered: bool = True, return_exceptions: bool = False) -> Iterator:
+    '''Runs ``fn(**kwargs)`` for each item of `kwargs_iter` on the shared thread pool.
+
+    At most `max_workers` calls run at once, and items are only pulled from
+    `kwargs_iter` as calls finish, so a huge or endless iterator is never
+    materialised. With `ordered`, results come in input order; otherwise
+    ``(index, result)`` pairs come as soon as each call finishes. Breaking
+    out of the loop drops the calls not started yet.
+
+    Usage::
+
+      >>> for response in map_commands(stat, ({'target': f's3/bucket/{key}'} for key in keys), max_workers=32):
+      ...     print(response.content['size'])
+      >>> for index, response in map_commands(admin_user_add, users, max_workers=16, ordered=False, return_exceptions=True):
+      ...     if isinstance(response, Exception): failed.append(index)
+
+    :param fn: a sync command, e.g. ``ls`` or ``admin_user_add``.
+    :param kwargs_iter: keyword arguments of each call.
+    :param max_workers: number of calls running at once.
+    :param ordered: yield results in input order, else ``(index, result)`` in completion order.
+    :param return_exceptions: yield exceptions raised by calls instead of raising them.
+    '''
+    pool = get_thread_pool()
+    items = enumerate(kwargs_iter)
+    running = set()
+    # Futures in input order, done ones included until their turn comes.
+    queue = collections.deque()
+    # In order, finished results wait for the slowest call; bound them too.
+    backlog = 2 * max_workers if ordered else max_workers
+    indexes = {}
+
+    def fill():
+        while len(running) < max_workers and len(queue) < backlog:
+            item = next(items, None)
+            if item is None:
+                return
+            future = pool.submit(fn, **item[1])
+            indexes[future] = item[0]
+            running.add(future)
+            if ordered:
+                queue.append(future)
+
+    try:
+        fill()
+        while running or queue:
+            if ordered and queue and queue[0].done():
+                future = queue.popleft()
+                indexes.pop(future)
+                fill()
+                yield _outcome(future, return_exceptions)
+                continue
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            running.difference_update(done)
+            fill()
+            if not ordered:
+                for future in done:
+                    yield indexes.pop(future), _outcome(future, return_exceptions)
+    finally:
+        for future in running:
+            future.cancel()
+
+
+def batch(calls: Iterable, max_workers: int = 8, return_exceptions: bool = False) -> list:
+    '''Runs a mixed batch of sync commands concurrently and returns their results in order.
+
+    Usage::
+
+      >>> user, policy = batch([
+            (admin_user_info, {'target': 'prod', 'username': 'rockstar'}),
+            (admin_policy_info, {'target': 'prod', 'name': 'readwrite'}),
+          ], max_workers=2)
+
+    :param calls: ``(fn, kwargs)`` pairs.
+    :param max_workers: number of calls running at once.
+    :param return_exceptions: return exceptions raised by calls instead of raising them.
+    '''
+    return list(map_commands(lambda fn, kwargs: fn(**kwargs), ({'fn': fn, 'kwargs': kwargs} for fn, kwargs in calls), max_workers=max_workers, return_exceptions=return_exceptions))
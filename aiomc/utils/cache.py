@@ -0,0 +1,229 @@
+'''Opt-in caching of read-only command results, invalidated by mutations.'''
+
+import time
+import threading
+import collections
+from typing import Optional
+
+from .scheduler import command_key
+
+__all__ = [
+    'CommandCache',
+    'READONLY_VERBS',
+    'get_cache',
+    'set_cache',
+    'configure_cache',
+]
+
+# Commands that do not change anything on the server, as their words after `mc`.
+READONLY_VERBS = frozenset({
+    ('ls',),
+    ('stat',),
+    ('find',),
+    ('du',),
+    ('config', 'host', 'list'),
+    ('admin', 'info'),
+    ('admin', 'user', 'info'),
+    ('admin', 'user', 'list'),
+    ('admin', 'user', 'svcacct', 'info'),
+    ('admin', 'user', 'svcacct', 'list'),
+    ('admin', 'group', 'info'),
+    ('admin', 'group', 'list'),
+    ('admin', 'policy', 'info'),
+    ('admin', 'policy', 'list'),
+})
+
+# Per-call options that do not change what a command returns.
+CALL_OPTIONS = frozenset({'backend', 'cache', 'coalesce', 'timeout', 'retry', 'hedge'})
+
+# Scope of the commands reading or writing the local `mc` configuration.
+CONFIG_SCOPE = '@config'
+
+
+def command_scopes(verb: tuple, kwargs: dict) -> tuple:
+    '''Scopes invalidated by `verb`, the first one is the scope it is cached under.'''
+    if verb[:1] == ('config',):
+        return (CONFIG_SCOPE, command_key(kwargs)) if verb not in READONLY_VERBS else (CONFIG_SCOPE,)
+    return (command_key(kwargs),)
+
+
+def freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    return value
+
+
+class CommandCache(object):
+    '''TTL and LRU bounded cache of read-only command responses.
+
+    Entries are keyed by ``(alias, command, arguments)``. Every alias has a
+    generation, bumped by each mutating command against it: entries cached
+    under an older generation are stale, including those of reads that were
+    still running when the mutation happened. Commands touching the `mc`
+    configuration share the ``'@config'`` scope.
+
+    Cached ``Response`` objects are shared between callers, do not mutate
+    their content.
+
+    Usage::
+
+      >>> configure_cache(ttl=10, maxsize=4096)
+      >>> admin_user_info(target='prod', username='rockstar')   # runs `mc`
+      >>> admin_user_info(target='prod', username='rockstar')   # cached
+      >>> admin_user_disable(target='prod', username='rockstar') # invalidates `prod`
+      >>> admin_user_info(target='prod', username='rockstar', cache=False)  # bypasses the cache
+      >>> get_cache().stats()['hits']
+      1
+
+    :param ttl: seconds an entry stays fresh.
+    :param maxsize: number of entries kept, least recently used ones are evicted first.
+    '''
+
+    def __init__(self, ttl: float = 5.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._generations = collections.defaultdict(int)
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, scope: str) -> tuple:
+        return (self._epoch, self._generations[scope])
+
+    def get(self, key: tuple):
+        '''Returns the fresh value of `key`, or None.'''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, generation, expires = entry
+                if generation == self.generation(key[0]) and expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, generation: tuple, value):
+        '''Stores `value`, unless the scope of `key` was invalidated since `generation` was read.'''
+        with self._lock:
+            if generation != self.generation(key[0]):
+                return
+            self._entries[key] = (value, generation, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, scope: Optional[str] = None):
+        '''Drops the entries of `scope`, or every entry.'''
+        with self._lock:
+            self.invalidations += 1
+            if scope is None:
+                self._entries.clear()
+                self._epoch += 1
+                return
+            self._generations[scope] += 1
+            for key in [key for key in self._entries if key[0] == scope]:
+                del self._entries[key]
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        '''Returns hit and miss counts, size and bounds.'''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[size={len(self._entries)}, maxsize={self.maxsize}, ttl={self.ttl}]"
+
+
+class CacheTicket(object):
+    '''What to do with the result of a command once it ran: store it, or invalidate its scopes.'''
+
+    __slots__ = ('cache', 'key', 'generation', 'scopes')
+
+    def __init__(self, cache: CommandCache, key: Optional[tuple], generation: tuple = (), scopes: tuple = ()):
+        self.cache = cache
+        self.key = key
+        self.generation = generation
+        self.scopes = scopes
+
+    def done(self, response=None):
+        if self.key is None:
+            for scope in self.scopes:
+                self.cache.invalidate(scope)
+        elif response is not None and response.status == 'success':
+            self.cache.put(self.key, self.generation, response)
+
+
+def cache_lookup(verb: tuple, kwargs: dict, use: bool = True):
+    '''Returns ``(response, ticket)`` for a command about to run.
+
+    `response` is the cached one, if any. Otherwise, ``ticket.done(response)``
+    must be called once the command ran, to cache its response or, for a
+    mutating command, invalidate what it touched. Both are None when there is
+    nothing to do.
+    '''
+    cache = _cache
+    if cache is None:
+        return None, None
+    scopes = command_scopes(verb, kwargs)
+    if verb not in READONLY_VERBS:
+        return None, CacheTicket(cache, None, scopes=scopes)
+    if not use:
+        return None, None
+    key = (scopes[0], verb, freeze({name: value for name, value in kwargs.items() if name not in CALL_OPTIONS}))
+    try:
+        hash(key)
+    except TypeError:
+        return None, None
+    generation = cache.generation(scopes[0])
+    response = cache.get(key)
+    if response is not None:
+        return response, None
+    return None, CacheTicket(cache, key, generation)
+
+
+_cache = None
+
+
+def get_cache() -> Optional[CommandCache]:
+    '''Returns the cache of read-only commands, None when caching is off.'''
+    return _cache
+
+
+def set_cache(cache: Optional[CommandCache]):
+    '''Installs `cache` for every command, None turns caching off.'''
+    global _cache
+    _cache = cache
+
+
+def configure_cache(ttl: float = 5.0, maxsize: int = 1024) -> CommandCache:
+    '''Turns caching of read-only commands on with the given bounds.'''
+    cache = CommandCache(ttl=ttl, maxsize=maxsize)
+    set_cache(cache)
+    return cache
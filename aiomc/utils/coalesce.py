@@ -0,0 +1,121 @@
+'''Single-flight coalescing of identical concurrent `mc` invocations.'''
+
+import os
+import asyncio
+import threading
+from typing import Optional
+
+from .cache import READONLY_VERBS
+
+__all__ = [
+    'SingleFlight',
+    'get_single_flight',
+    'configure_coalescing',
+]
+
+
+class _Call(object):
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    '''Shares the result of one running call between every caller asking for the same key.
+
+    The first caller of a key starts the call as a task, later callers wait
+    for that same task. A cancelled caller only stops waiting: the task, and
+    the `mc` process it runs, is cancelled once no caller is left waiting.
+    Calls are shared within an event loop, never across loops.
+
+    Usage::
+
+      >>> configure_coalescing(True)
+      >>> await asyncio.gather(*(async_admin_user_info(target='prod', username='x') for _ in range(100)))
+      >>> get_single_flight().stats()
+      {'hits': 99, 'misses': 1, 'cancelled': 0, 'in_flight': 0}
+    '''
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+
+    async def run(self, key, factory):
+        '''Returns the result of ``await factory()``, shared with concurrent callers of `key`.'''
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                self.misses += 1
+                call = self._calls[key] = _Call(loop.create_task(factory()))
+                call.task.add_done_callback(lambda _: self._forget(key, call))
+            else:
+                self.hits += 1
+            call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and not call.task.done()
+            if abandoned:
+                self.cancelled += 1
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key, call: _Call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        '''Returns how many callers shared a call (hits) or started one (misses).'''
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'cancelled': self.cancelled, 'in_flight': len(self._calls)}
+
+    def _reset_after_fork(self):
+        # Shared calls are tasks of the parent's loops, which do not run in a forked child.
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[in_flight={len(self._calls)}, hits={self.hits}, misses={self.misses}]"
+
+
+_single_flight = SingleFlight()
+_enabled = False
+
+
+def get_single_flight() -> SingleFlight:
+    return _single_flight
+
+
+def configure_coalescing(enabled: bool = True) -> SingleFlight:
+    '''Turns coalescing of identical read-only ``AsyncCommand`` runs on or off.
+
+    It can also be asked for per call with ``coalesce=True`` or ``False``.
+    '''
+    global _enabled
+    _enabled = enabled
+    return _single_flight
+
+
+def should_coalesce(verb: tuple, coalesce: Optional[bool] = None) -> bool:
+    '''Whether a run of `verb` is coalesced; only read-only commands ever are.'''
+    if verb not in READONLY_VERBS:
+        return False
+    return _enabled if coalesce is None else coalesce
+
+
+def _reset_after_fork():
+    _single_flight._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
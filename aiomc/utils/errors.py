@@ -0,0 +1,193 @@
+'''Exceptions raised by aiomc, and classification of the errors `mc` reports.'''
+
+from typing import Optional
+
+__all__ = [
+    'aiomcError',
+    'CommandTimeoutError',
+    'TransferStalledError',
+    'MinioError',
+    'TransientError',
+    'ThrottledError',
+    'NetworkError',
+    'AccessDeniedError',
+    'NotFoundError',
+    'ConflictError',
+    'InvalidRequestError',
+    'classify_error',
+]
+
+
+class aiomcError(Exception):
+    pass
+
+
+class CommandTimeoutError(aiomcError):
+    '''Raised when a command runs longer than its timeout. `mc` has been stopped by then.'''
+
+    def __init__(self, command: str, timeout: float, elapsed: float):
+        super().__init__(f'Command timed out after {elapsed:.2f}s (timeout {timeout}s): {command}')
+        self.command = command
+        self.timeout = timeout
+        self.elapsed = elapsed
+
+
+class TransferStalledError(aiomcError):
+    '''Raised when a transfer reports no progress for too long. `mc` has been stopped by then.'''
+
+    def __init__(self, command: str, stall_timeout: float, transferred: int):
+        super().__init__(f'No progress for {stall_timeout}s after {transferred} bytes: {command}')
+        self.command = command
+        self.stall_timeout = stall_timeout
+        self.transferred = transferred
+
+
+class MinioError(aiomcError):
+    '''An error record printed by `mc`, with the server error it wraps when there is one.
+
+    :param message: what `mc` was doing, e.g. ``'Unable to list folder.'``.
+    :param cause: the underlying error message.
+    :param code: the S3 or admin API error code, e.g. ``'SlowDown'``.
+    :param status_code: the HTTP status of the failed request, when known.
+    :param resource: the bucket or object the error is about.
+    :param record: the whole error record.
+    '''
+
+    def __init__(self, message: str = '', cause: str = '', code: str = '', status_code: Optional[int] = None, resource: Optional[str] = None, record: Optional[dict] = None):
+        super().__init__(f'{message}:{cause}')
+        self.message = message
+        self.cause = cause
+        self.code = code
+        self.status_code = status_code
+        self.resource = resource
+        self.record = record or {}
+
+    @property
+    def retryable(self) -> bool:
+        return isinstance(self, TransientError)
+
+
+class TransientError(MinioError):
+    '''A failure that may go away when the command is run again.'''
+    pass
+
+
+class ThrottledError(TransientError):
+    '''The server asked to slow down or is temporarily unavailable.'''
+    pass
+
+
+class NetworkError(TransientError):
+    '''The connection to the server failed or was reset.'''
+    pass
+
+
+class AccessDeniedError(MinioError):
+    pass
+
+
+class NotFoundError(MinioError):
+    pass
+
+
+class ConflictError(MinioError):
+    pass
+
+
+class InvalidRequestError(MinioError):
+    pass
+
+
+CODES = {
+    'SlowDown': ThrottledError,
+    'SlowDownRead': ThrottledError,
+    'SlowDownWrite': ThrottledError,
+    'ServiceUnavailable': ThrottledError,
+    'XMinioServerNotInitialized': ThrottledError,
+    'XMinioAdminRebalanceInProgress': ThrottledError,
+    'RequestTimeout': TransientError,
+    'RequestTimeTooSkewed': TransientError,
+    'InternalError': TransientError,
+    'XMinioStorageFull': TransientError,
+    'OperationTimedOut': TransientError,
+    'AccessDenied': AccessDeniedError,
+    'InvalidAccessKeyId': AccessDeniedError,
+    'SignatureDoesNotMatch': AccessDeniedError,
+    'XMinioAdminNoSuchUser': NotFoundError,
+    'XMinioAdminNoSuchGroup': NotFoundError,
+    'XMinioAdminNoSuchPolicy': NotFoundError,
+    'XMinioAdminNoSuchServiceAccount': NotFoundError,
+    'NoSuchBucket': NotFoundError,
+    'NoSuchKey': NotFoundError,
+    'NoSuchUpload': NotFoundError,
+    'NoSuchVersion': NotFoundError,
+    'BucketAlreadyExists': ConflictError,
+    'BucketAlreadyOwnedByYou': ConflictError,
+    'BucketNotEmpty': ConflictError,
+    'XMinioAdminGroupNotEmpty': ConflictError,
+}
+
+STATUS_CODES = {
+    429: ThrottledError,
+    500: TransientError,
+    502: TransientError,
+    503: ThrottledError,
+    504: TransientError,
+    400: InvalidRequestError,
+    403: AccessDeniedError,
+    404: NotFoundError,
+    409: ConflictError,
+}
+
+# Substrings of Go network errors, as `mc` prints them.
+NETWORK_ERRORS = (
+    'connection reset',
+    'connection refused',
+    'broken pipe',
+    'i/o timeout',
+    'no such host',
+    'network is unreachable',
+    'server closed idle connection',
+    'unexpected eof',
+    'tls handshake timeout',
+    'context deadline exceeded',
+)
+
+
+def classify_error(record: dict) -> MinioError:
+    '''Builds the ``MinioError`` subclass matching an `mc` error record.
+
+    The code and HTTP status in ``error.cause.error`` decide the class, then
+    the wording of the cause for network failures. Anything else is a plain
+    ``MinioError``.
+
+    Usage::
+
+      >>> error = classify_error(response.content)
+      >>> error.code, error.retryable
+      ('SlowDown', True)
+    '''
+    if not isinstance(record, dict):
+        return MinioError(record=None)
+    error = record.get('error') or {}
+    if isinstance(error, str):
+        error = {'message': error}
+    cause = error.get('cause') or {}
+    if isinstance(cause, str):
+        cause = {'message': cause}
+    details = cause.get('error') or {}
+    if not isinstance(details, dict):
+        details = {}
+    message, cause_message = error.get('message', ''), cause.get('message', '')
+    code = details.get('Code', '') or ''
+    status = details.get('StatusCode')
+    try:
+        status = int(status) if status else None
+    except (TypeError, ValueError):
+        status = None
+    resource = details.get('Resource') or details.get('Key') or details.get('BucketName')
+    cls = CODES.get(code) or STATUS_CODES.get(status)
+    if cls is None:
+        text = f'{message} {cause_message} {details.get("Message", "")}'.lower()
+        cls = NetworkError if any(pattern in text for pattern in NETWORK_ERRORS) else MinioError
+    return cls(message, cause_message, code=code, status_code=status, resource=resource, record=record)
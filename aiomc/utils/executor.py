@@ -1,20 +1,35 @@
+import io
 import os
 import re
 import sys
+import time
 import json
 import asyncio
 import subprocess
+import shlex
+import string
 import functools
-import anyio
-import sniffio
-from typing import Union, Coroutine
+import threading
+import selectors
+from typing import Union, Coroutine, Optional
+from .scheduler import get_scheduler, command_key
+from .cache import cache_lookup, READONLY_VERBS, CALL_OPTIONS
+from .errors import aiomcError, CommandTimeoutError, classify_error
+from .retry import run_with_retry, async_run_with_retry, get_retry_policy, get_hedge_policy
+from .coalesce import get_single_flight, should_coalesce
+from .loop import get_background_loop
+from .alias import alias_environment, host_variable
+from . import instrument
+from .instrument import CommandTiming, start_timing, finish_timing, record_parse
 
 PATTERN = re.compile('{(.+?)}')
 
-
-class aiomcError(Exception):
-    pass
-
+# Largest single line accepted from a streamed `mc` process.
+STREAM_LIMIT = 2 ** 20
+# Size of the reads of `mc` output when timing it.
+READ_SIZE = 2 ** 16
+# Seconds `mc` gets to exit after SIGTERM before it is sent SIGKILL.
+KILL_GRACE = 2.0
 
 
 def decoder(s: Union[bytes, str]):
@@ -43,15 +58,107 @@ def process_string(s, processors=processors):
         s = processor(s)
     return s
 
+_loads = None
+
+
+def get_json_decoder():
+    '''Returns the fastest JSON decoder installed: ``orjson``, ``msgspec``, else the standard library.
+
+    All of them accept ``bytes`` as well as ``str`` and raise a ``ValueError``
+    on malformed documents.
+    '''
+    global _loads
+    if _loads is None:
+        try:
+            import orjson
+            _loads = orjson.loads
+        except ImportError:
+            try:
+                import msgspec
+                _loads = msgspec.json.Decoder().decode
+            except ImportError:
+                _loads = json.loads
+    return _loads
+
+
+def set_json_decoder(loads=None):
+    '''Sets the function used to decode `mc` output, ``None`` picks the fastest installed again.'''
+    global _loads
+    _loads = loads
+
+
+class RecordDecoder(object):
+    '''Incremental decoder for the output of `mc --json`.
+
+    `mc` writes one JSON document per line, except for errors which are
+    indented over several lines. Lines that do not form a complete document
+    on their own are buffered until they do. Lines may be ``bytes`` or ``str``.
+    '''
+
+    __slots__ = ('max_pending', 'pending', 'loads')
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self.pending = []
+        self.loads = get_json_decoder()
+
+    def feed(self, line):
+        '''Feeds one line of output, returns the decoded record or None.'''
+        line = line.strip()
+        if not line:
+            return None
+        if self.pending:
+            self.pending.append(line)
+            text = line[:0].join(self.pending)
+        else:
+            text = line
+        try:
+            record = self.loads(text)
+        except ValueError:
+            if not self.pending:
+                if text[:1] in ('{', '[', b'{', b'['):
+                    self.pending.append(line)
+            elif len(self.pending) >= self.max_pending:
+                self.pending = []
+            return None
+        self.pending = []
+        return record
+
+    def decode(self, output) -> list:
+        '''Decodes the whole of `output` in a single pass over its lines.'''
+        records = []
+        append, loads, feed = records.append, self.loads, self.feed
+        for line in io.BytesIO(output) if isinstance(output, bytes) else io.StringIO(output):
+            if self.pending:
+                record = feed(line)
+            else:
+                try:
+                    record = loads(line)
+                except ValueError:
+                    record = feed(line)
+            if record is not None:
+                append(record)
+        return records
+
+
 def kwarg_to_flag(**kwargs):
-    _flags = []
+    return ' '.join(shlex.quote(arg) for arg in kwarg_to_args(**kwargs))
+
+
+def kwarg_to_args(**kwargs):
+    '''Turns keyword arguments into `mc` flags: ``recursive=True`` into
+    ``['--recursive']``, ``older_than='7d'`` into ``['--older-than', '7d']``.
+    ``False`` and ``None`` leave the flag out.
+    '''
+    _args = []
     for _key, _value in kwargs.items():
+        if _value is None or _value is False:
+            continue
         key = '--' + _key.replace('_', '-')
-        if _value in (True, False):
-            _flags.append(key)
-        else:
-            _flags.append(f'{key} {_value}')
-    return ' '.join(_flags)
+        _args.append(key)
+        if _value is not True:
+            _args.append(str(_value))
+    return _args
 
 
 def flag_to_kwarg(flag: str):
@@ -78,51 +185,350 @@ def get_params(cmd_template: str, pattern=PATTERN):
     return dict(zip(params, [None] * len(params)))
 
 
+LITERAL, FLAGS, FIELD, FORMAT = range(4)
+
+
+class CommandSpec(object):
+    '''A command template parsed once into an argv builder.
+
+    Each whitespace separated token of the template gives at most one
+    argument, whatever spaces or shell metacharacters the values contain.
+    ``{flags}`` expands to the keyword arguments that are not placeholders,
+    a placeholder given a list expands to one argument per item, and a
+    placeholder given an empty value is dropped.
+
+    Specs are immutable and shared, get them with ``compile_command``.
+
+    Usage::
+
+      >>> spec = compile_command('mc {flags} ls {target}')
+      >>> spec.build({'target': 'local/my bucket', 'recursive': True, 'json': True})
+      ['mc', '--recursive', '--json', 'ls', 'local/my bucket']
+    '''
+
+    __slots__ = ('template', 'params', 'tokens', 'verb')
+
+    def __init__(self, template: str):
+        tokens, params = [], set()
+        for token in template.split():
+            fields = [field.split('.')[0].split('[')[0] for _, field, _, _ in string.Formatter().parse(token) if field is not None]
+            params.update(fields)
+            if token == '{flags}':
+                tokens.append((FLAGS, None))
+            elif len(fields) == 1 and token == '{' + fields[0] + '}':
+                tokens.append((FIELD, fields[0]))
+            elif fields:
+                tokens.append((FORMAT, token))
+            else:
+                tokens.append((LITERAL, token.replace('{{', '{').replace('}}', '}')))
+        object.__setattr__(self, 'template', template)
+        object.__setattr__(self, 'params', frozenset(params))
+        object.__setattr__(self, 'tokens', tuple(tokens))
+        verb = []
+        for kind, value in tokens[1:]:
+            if kind is FLAGS:
+                continue
+            if kind is not LITERAL or '=' in value:
+                break
+            verb.append(value)
+        object.__setattr__(self, 'verb', tuple(verb))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.template}')"
+
+    def build(self, kwargs: dict) -> list:
+        '''Renders the argument list for the values in `kwargs`.'''
+        _args = []
+        for kind, value in self.tokens:
+            if kind is LITERAL:
+                _args.append(value)
+            elif kind is FIELD:
+                value = kwargs[value]
+                if isinstance(value, (list, tuple)):
+                    _args.extend(str(item) for item in value)
+                elif value is not None and value != '':
+                    _args.append(str(value))
+            elif kind is FLAGS:
+                flags = kwargs.get('flags')
+                if flags is None:
+                    params = self.params
+                    _args.extend(kwarg_to_args(**{key: value for key, value in kwargs.items() if key not in params}))
+                else:
+                    _args.extend(shlex.split(flags) if isinstance(flags, str) else flags)
+            else:
+                _args.append(value.format(**kwargs))
+        return _args
+
+
+_specs = {}
+
+
+def compile_command(cmd_template: str) -> CommandSpec:
+    '''Returns the shared ``CommandSpec`` of `cmd_template`, parsing it on first use.'''
+    spec = _specs.get(cmd_template)
+    if spec is None:
+        spec = _specs.setdefault(cmd_template, CommandSpec(cmd_template))
+    return spec
+
+
+def make_command_args(cmd_template: str, **kwargs):
+    '''Renders `cmd_template` into an argument list, ready to be executed without a shell.'''
+    return compile_command(cmd_template).build(kwargs)
+
+
+def join_args(args) -> str:
+    return ' '.join(shlex.quote(arg) for arg in args)
+
+
 def make_command_string(cmd_template: str, **kwargs):
-    cmd_params = get_params(cmd_template)
-    _flags = {key: value for key, value in kwargs.items() if key not in cmd_params}
-    flags = kwarg_to_flag(**_flags)
-    kwargs.setdefault('flags', flags)
-    return cmd_template.format(**kwargs)
+    return join_args(make_command_args(cmd_template, **kwargs))
 
 
-def execute_command(command: 'Command', wrapper_cls=None):
-    wrapper_cls = wrapper_cls or Response
-    arguments_list = command.command_string.split()
+_default_timeout = None
+
+
+def set_default_timeout(timeout: Optional[float] = None):
+    '''Sets the timeout, in seconds, of commands that do not pass ``timeout=``. None waits forever.'''
+    global _default_timeout
+    _default_timeout = timeout
+
+
+def get_default_timeout() -> Optional[float]:
+    return _default_timeout
+
+
+def stop_process(process: subprocess.Popen, grace: float = KILL_GRACE):
+    '''Stops `process` with SIGTERM, then SIGKILL after `grace` seconds, and drains its pipes.'''
+    if process.poll() is None:
+        process.terminate()
     try:
-        _output = subprocess.check_output(arguments_list)
-    except subprocess.CalledProcessError as e:
-        output = e.output
-    else:
-        output = _output
-    return wrapper_cls(
+        process.communicate(timeout=grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+    except ValueError:
+        # Pipes already closed by a reader.
+        process.wait()
+
+
+async def async_stop_process(process: asyncio.subprocess.Process, grace: float = KILL_GRACE):
+    '''Async version of ``stop_process``.'''
+    if process.returncode is None:
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+    for stream in (process.stdout, process.stderr):
+        if stream is not None:
+            try:
+                await asyncio.wait_for(stream.read(), grace)
+            except (asyncio.TimeoutError, OSError, ValueError):
+                pass
+
+
+def read_output(process: subprocess.Popen, timing: CommandTiming, timeout: Optional[float] = None) -> bytes:
+    '''Reads the output of `process` until it exits, timing its first byte and its exit.
+
+    Raises ``subprocess.TimeoutExpired`` like ``communicate`` does.
+    '''
+    deadline = None if timeout is None else time.monotonic() + timeout
+    chunks = []
+    with selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ)
+        fd = process.stdout.fileno()
+        while True:
+            if deadline is not None and not selector.select(max(0, deadline - time.monotonic())):
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            chunk = os.read(fd, READ_SIZE)
+            if not chunk:
+                break
+            if not chunks:
+                timing.first_byte = timing.lap()
+            chunks.append(chunk)
+    process.stdout.close()
+    process.wait(None if deadline is None else max(0, deadline - time.monotonic()))
+    timing.exit = timing.lap()
+    return b''.join(chunks)
+
+
+async def async_read_output(process: asyncio.subprocess.Process, timing: CommandTiming) -> bytes:
+    '''Async version of ``read_output``, without the timeout.'''
+    chunks = []
+    while True:
+        chunk = await process.stdout.read(READ_SIZE)
+        if not chunk:
+            break
+        if not chunks:
+            timing.first_byte = timing.lap()
+        chunks.append(chunk)
+    await process.wait()
+    timing.exit = timing.lap()
+    return b''.join(chunks)
+
+
+def timed_response(wrapper_cls, command: 'Invocation', output, timing: Optional[CommandTiming], returncode: Optional[int]):
+    response = wrapper_cls(
         command=command.command_string,
         name=command.name,
         output=output,
     )
+    if timing is not None:
+        timing.decode = timing.lap()
+        timing.output_bytes = len(output) if isinstance(output, (bytes, str)) else 0
+        timing.returncode = returncode
+        response.timing = timing
+        finish_timing(timing)
+    return response
 
 
-async def async_execute_command(command: 'AsyncCommand', wrapper_cls = None):
+def execute_command(command: 'Invocation', wrapper_cls=None):
     wrapper_cls = wrapper_cls or Response
-    process = await asyncio.subprocess.create_subprocess_shell(command.command_string, stdout = asyncio.subprocess.PIPE, stderr = asyncio.subprocess.PIPE)
+    timing = start_timing(command.label, command.command_string, command.render)
+    start = time.monotonic()
+    process = subprocess.Popen(resolve_args(command.command_args), stdout=subprocess.PIPE, env=alias_environment())
     try:
-        stdout, stderr = await process.communicate()
-        output = stdout.decode('UTF-8').strip()
+        if timing is None:
+            output, _ = process.communicate(timeout=command.timeout)
+        else:
+            timing.spawn = timing.lap()
+            output = read_output(process, timing, command.timeout)
+    except subprocess.TimeoutExpired:
+        stop_process(process)
+        error = CommandTimeoutError(command.command_string, command.timeout, time.monotonic() - start)
+        finish_timing(timing, error)
+        raise error from None
+    except BaseException as e:
+        stop_process(process)
+        finish_timing(timing, e)
+        raise
+    return timed_response(wrapper_cls, command, output, timing, process.returncode)
+
+
+async def async_execute_command(command: 'Invocation', wrapper_cls = None):
+    wrapper_cls = wrapper_cls or Response
+    timing = start_timing(command.label, command.command_string, command.render)
+    start = time.monotonic()
+    process = await asyncio.subprocess.create_subprocess_exec(*resolve_args(command.command_args), stdout = asyncio.subprocess.PIPE, stderr = asyncio.subprocess.DEVNULL, env = alias_environment())
+    try:
+        if timing is None:
+            output, _ = await asyncio.wait_for(process.communicate(), command.timeout)
+        else:
+            timing.spawn = timing.lap()
+            output = await asyncio.wait_for(async_read_output(process, timing), command.timeout)
     except (BrokenPipeError, ConnectionResetError) as e:
         output = e
-    return wrapper_cls(
-        command = command.command_string,
-        name = command.name,
-        output = output,
-    )
+    except asyncio.TimeoutError:
+        await async_stop_process(process)
+        error = CommandTimeoutError(command.command_string, command.timeout, time.monotonic() - start)
+        finish_timing(timing, error)
+        raise error from None
+    except BaseException as e:
+        await asyncio.shield(async_stop_process(process))
+        finish_timing(timing, e)
+        raise
+    return timed_response(wrapper_cls, command, output, timing, process.returncode)
+
+def stream_command(command: 'Invocation'):
+    '''Runs `command` and yields each JSON record as soon as `mc` writes it.
+
+    With a timeout, a watchdog stops `mc` once it expires and the iterator
+    raises ``CommandTimeoutError``.
+    '''
+    start = time.monotonic()
+    process = subprocess.Popen(resolve_args(command.command_args), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=alias_environment())
+    expired = threading.Event()
+    watchdog = None
+    if command.timeout is not None:
+        def expire():
+            # The reader is blocked on the pipe until `mc` exits, so SIGKILL it if SIGTERM is not enough.
+            expired.set()
+            if process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(KILL_GRACE)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        watchdog = threading.Timer(command.timeout, expire)
+        watchdog.daemon = True
+        watchdog.start()
+    records = RecordDecoder()
+    try:
+        for line in process.stdout:
+            record = records.feed(line)
+            if record is not None:
+                yield record
+        process.wait()
+        if expired.is_set():
+            raise CommandTimeoutError(command.command_string, command.timeout, time.monotonic() - start)
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+        stop_process(process)
+
+
+async def async_stream_command(command: 'Invocation', limit: int = STREAM_LIMIT):
+    '''Runs `command` and yields each JSON record as soon as `mc` writes it.
+
+    Output is read one line at a time and only when the consumer asks for the
+    next record, so a slow consumer fills the pipe and pauses `mc` instead of
+    buffering the listing in memory. Closing the iterator early stops `mc`.
+    With a timeout, the time spent reading counts against it.
+    '''
+    start = time.monotonic()
+    deadline = None if command.timeout is None else start + command.timeout
+    process = await asyncio.subprocess.create_subprocess_exec(*resolve_args(command.command_args), stdout = asyncio.subprocess.PIPE, stderr = asyncio.subprocess.DEVNULL, limit = limit, env = alias_environment())
+    records = RecordDecoder()
+    try:
+        while True:
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), None if deadline is None else max(0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise CommandTimeoutError(command.command_string, command.timeout, time.monotonic() - start) from None
+            if not line:
+                break
+            record = records.feed(line)
+            if record is not None:
+                yield record
+        await process.wait()
+    finally:
+        await asyncio.shield(async_stop_process(process))
+
+
+async def scheduled_stream(key: str, records):
+    '''Holds a scheduler slot for `key` while `records` is being consumed.'''
+    async with get_scheduler().slot(key):
+        try:
+            async for record in records:
+                yield record
+        finally:
+            await records.aclose()
+
 
 def get_async_lib():
+    import sniffio
     try:
        return sniffio.current_async_library()
     except sniffio.AsyncLibraryNotFoundError:
        return None
 
 def run_sync(func: Coroutine, *args, **kwargs):
+    '''Runs the coroutine function `func` from sync code and returns its result.
+
+    The coroutine runs on the shared background loop, see
+    ``aiomc.utils.loop.BackgroundLoop``, so it works the same from the main
+    thread, worker threads and sync code called by a coroutine.
+    '''
+    return get_background_loop().run(func(*args, **kwargs))
+
+
+def run_sync_per_call(func: Coroutine, *args, **kwargs):
+    '''Runs `func` in an event loop of its own, created and closed for this call.'''
+    import anyio
     current_async_module = get_async_lib()
     partial_f = functools.partial(func, *args, **kwargs)
     if current_async_module is None:
@@ -130,73 +536,264 @@ def run_sync(func: Coroutine, *args, **kwargs):
     return anyio.from_thread.run(partial_f)
 
 class Response(object):
-    '''Response object for mc command line interface output.'''
+    '''Response object for mc command line interface output.
+
+    ``content`` is decoded on first access: a single record as a dict,
+    several records as a list. ``status`` does not decode anything unless
+    the output mentions an error. ``timing`` holds the ``CommandTiming``
+    of the run while instrumentation is on, else None.
+    '''
+
+    __slots__ = ('command', 'name', 'output', 'timing', '_content', '_status')
 
     def __init__(self, command=None, name=None, output=None):
         self.command = command
         self.name = name
         self.output = output
-        self.json = make_json(self.output)
+        self.timing = None
+        self._content = None
+        self._status = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            if self.timing is None:
+                self._content = self.decode()
+            else:
+                start = time.perf_counter()
+                self._content = self.decode()
+                record_parse(self.timing, time.perf_counter() - start)
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+        self._status = None
+
+    @property
+    def status(self) -> str:
+        if self._status is None:
+            output = self.output
+            if self._content is None and isinstance(output, (bytes, str)) and (b'"error"' if isinstance(output, bytes) else '"error"') not in output:
+                self._status = 'success'
+            else:
+                content = self.content
+                self._status = content.get('status', 'success') if isinstance(content, dict) else 'success'
+        return self._status
+
+    @property
+    def json(self) -> str:
+        '''``content`` as a JSON string.'''
+        return json.dumps(self.content)
+
+    def decode(self):
+        output = self.output
+        if not isinstance(output, (bytes, str)):
+            return {}
+        records = RecordDecoder().decode(output)
+        if len(records) == 1:
+            return records[0]
+        if records or not output.strip():
+            return records
         try:
-            self.content = json.loads(self.json)
-        except:
-            self.content = {}
-        try:
-            self.status = self.content.get('status', 'success')
-        except AttributeError:
-            self.status = 'success'
-
+            return json.loads(make_json(output))
+        except ValueError:
+            return {}
 
     def __repr__(self):
         return f"{self.__class__.__name__}[name='{self.name}', status='{self.status}']"
 
 
+class Invocation(object):
+    '''One run of a command: the values it was called with and the arguments they render to.
+
+    Invocations hold all the per-call state, so commands and specs can be
+    shared between concurrent tasks and threads.
+    '''
+
+    __slots__ = ('spec', 'name', 'kwargs', 'command_args', 'timeout', 'render', '_command_string')
+
+    def __init__(self, spec: CommandSpec, name: str, kwargs: dict, timeout: Optional[float] = None):
+        self.spec = spec
+        self.name = name
+        self.kwargs = kwargs
+        if instrument.active:
+            start = time.perf_counter()
+            self.command_args = spec.build(kwargs)
+            self.render = time.perf_counter() - start
+        else:
+            self.command_args = spec.build(kwargs)
+            self.render = None
+        self.timeout = timeout
+        self._command_string = None
+
+    @property
+    def label(self) -> str:
+        '''Name of the command in timings: its verb, e.g. ``'admin user info'``.'''
+        return ' '.join(self.spec.verb) or self.name
+
+    @property
+    def command_string(self) -> str:
+        '''The shell-quoted command line, for logs and error reports.'''
+        if self._command_string is None:
+            self._command_string = join_args(self.command_args)
+        return self._command_string
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[{self.command_string}]"
+
+
+class CallOptions(object):
+    '''Options of one call that steer how the command runs and are never passed to `mc`.'''
+
+    __slots__ = tuple(sorted(CALL_OPTIONS))
+
+    def __init__(self):
+        self.backend = None
+        self.cache = True
+        self.coalesce = None
+        self.timeout = None
+        self.retry = None
+        self.hedge = None
+
+
+def pop_call_options(kwargs: dict) -> CallOptions:
+    '''Removes every call option (``cache.CALL_OPTIONS``) from `kwargs`, so none of them becomes an `mc` flag.'''
+    options = CallOptions()
+    for name in CALL_OPTIONS:
+        if name in kwargs:
+            setattr(options, name, kwargs.pop(name))
+    return options
+
+
 class Command(object):
-    def __init__(self, cmd_template = None, name = None, action = None, flags = None, docstrings = None):
-        '''Command base class for MinIO mc.'''
+    def __init__(self, cmd_template = None, name = None, action = None, flags = None, docstrings = None, timeout = None):
+        '''Command base class for MinIO mc.
+
+        :param timeout: seconds a run may take before `mc` is stopped and
+                        ``CommandTimeoutError`` raised. Calls can override it
+                        with ``timeout=``, it defaults to the global one, see
+                        ``set_default_timeout``.
+        '''
         if flags is None:
             flags = {'json': True}
         self.name = name or self.__class__.__name__
-        self.cmd_template = cmd_template
+        self.spec = compile_command(cmd_template)
         self.action = action or execute_command
         self.flags = flags
+        self.timeout = timeout
         self.__doc__ = docstrings
 
-    def __call__(self, **kwargs):
+    @property
+    def cmd_template(self) -> str:
+        return self.spec.template
+
+    def invoke(self, kwargs: dict, options: Optional[CallOptions] = None) -> Invocation:
+        if options is None:
+            options = pop_call_options(kwargs)
+        timeout = options.timeout
+        if timeout is None:
+            timeout = self.timeout if self.timeout is not None else _default_timeout
         if self.flags:
             kwargs.update(self.flags)
-        self.command_string = make_command_string(self.cmd_template, **kwargs)
-        self.result = self.action(self)
-        return self.result
+        return Invocation(self.spec, self.name, kwargs, timeout)
 
+    def retry_policy(self, options: CallOptions):
+        '''The policy of ``retry=``, else the global one for read-only commands only.
 
-class AsyncCommand(object):
-    def __init__(self, cmd_template = None, name = None, action = None, flags = None, docstrings = None):
+        A mutating command may have gone through before failing, so it is
+        only retried when the call asks for it.
+        '''
+        if options.retry is None:
+            return get_retry_policy() if self.spec.verb in READONLY_VERBS else None
+        return options.retry or None
+
+    def __call__(self, **kwargs):
+        '''Runs the command. ``coalesce`` and ``hedge`` only apply to ``AsyncCommand`` and are ignored here.'''
+        options = pop_call_options(kwargs)
+        response, ticket = cache_lookup(self.spec.verb, kwargs, options.cache)
+        if response is not None:
+            return response
+        retry = self.retry_policy(options)
+        invocation = self.invoke(kwargs, options)
+        try:
+            response = run_with_retry(lambda: self.action(invocation), retry)
+        finally:
+            if ticket is not None:
+                ticket.done(response)
+        return response
+
+    def stream(self, **kwargs):
+        '''Runs the command and yields its JSON records as they are written.
+
+        Of the call options, only ``timeout`` applies to streams.
+        '''
+        return stream_command(self.invoke(kwargs))
+
+
+class AsyncCommand(Command):
+    def __init__(self, cmd_template = None, name = None, action = None, flags = None, docstrings = None, timeout = None):
         '''Command base class for MinIO mc.'''
-        if flags is None: flags = {'json': True}
-        self.name = name or self.__class__.__name__
-        self.cmd_template = cmd_template
-        self.action = action or async_execute_command
-        self.flags = flags
-        self.__doc__ = docstrings
+        super().__init__(cmd_template, name=name, action=action or async_execute_command, flags=flags, docstrings=docstrings, timeout=timeout)
 
     async def run(self, **kwargs):
-        if self.flags: kwargs.update(self.flags)
-        self.command_string = make_command_string(self.cmd_template, **kwargs)
-        self.result = await self.action(self)
-        return self.result
+        options = pop_call_options(kwargs)
+        response, ticket = cache_lookup(self.spec.verb, kwargs, options.cache)
+        if response is not None:
+            return response
+        coalesce = should_coalesce(self.spec.verb, options.coalesce)
+        retry = self.retry_policy(options)
+        hedge = options.hedge
+        if hedge is None:
+            hedge = get_hedge_policy()
+        if self.spec.verb not in READONLY_VERBS:
+            hedge = None
+        key = command_key(kwargs)
+        invocation = self.invoke(kwargs, options)
+
+        async def attempt():
+            async with get_scheduler().slot(key):
+                return await self.action(invocation)
+
+        async def execute():
+            if hedge:
+                return await async_run_with_retry(lambda: hedge.run((self.spec.verb, key), attempt), retry)
+            return await async_run_with_retry(attempt, retry)
+        try:
+            if coalesce:
+                # Same arguments are not enough: the credentials and the deadline of the run must match too.
+                flight = (self.action, tuple(invocation.command_args), invocation.timeout, host_variable(key))
+                response = await get_single_flight().run(flight, execute)
+            else:
+                response = await execute()
+        finally:
+            if ticket is not None:
+                ticket.done(response)
+        return response
+
+    def stream(self, **kwargs):
+        '''Runs the command and asynchronously yields its JSON records as they are written.
+
+        Usage::
+
+          >>> async for record in AsyncCommand('mc {flags} ls {target}').stream(target='s3/bucket', recursive=True):
+          ...     print(record['key'])
+
+        Of the call options, only ``timeout`` applies to streams.
+        '''
+        invocation = self.invoke(kwargs)
+        return scheduled_stream(command_key(kwargs), async_stream_command(invocation))
 
     def __call__(self, **kwargs):
         return run_sync(self.run, **kwargs)
 
 
 def check_error(response: Response):
-    """Checks response status and raises a 'BMCError' exception with the error message.
+    """Checks response status and raises the ``MinioError`` subclass matching the error,
+    see ``aiomc.utils.errors.classify_error``.
     """
     if response.status == 'error':
-        message = response.content.get('error', {}).get('message', '')
-        cause = response.content.get('error', {}).get('cause', {}).get('message', '')
-        raise aiomcError(f'{message}:{cause}')
+        raise classify_error(response.content)
 
 
 ## Check for mc
@@ -222,4 +819,53 @@ def get_binary_path(executable: str = 'mc'):
         if os.path.isfile(binary) and os.access(binary, os.X_OK): return binary
     return None
 
-mc_binary_path = get_binary_path('mc')
\ No newline at end of file
+
+MC_BINARY_ENV = 'AIOMC_MC_BINARY'
+
+_mc_binary = None
+_mc_binary_lock = threading.Lock()
+
+
+def set_mc_binary(path: Optional[str] = None):
+    """
+    Sets the `mc` binary used to run commands. ``None`` forgets the cached
+    location so that it is looked up again on the next command.
+    :param path: Path to the binary, or None
+    """
+    global _mc_binary
+    _mc_binary = path
+
+
+def get_mc_binary() -> str:
+    """
+    Returns the `mc` binary used to run commands. It is looked up once, on
+    first use: the ``AIOMC_MC_BINARY`` environment variable if set, else the
+    first `mc` in PATH.
+    :return: Absolute path
+    """
+    global _mc_binary
+    if _mc_binary is None:
+        with _mc_binary_lock:
+            if _mc_binary is None:
+                binary = os.environ.get(MC_BINARY_ENV) or get_binary_path('mc')
+                if binary is None:
+                    raise aiomcError('Unable to locate the `mc` binary required to run this module.')
+                _mc_binary = binary
+    return _mc_binary
+
+
+def resolve_args(args: list) -> list:
+    """Returns `args` with `mc` resolved to its binary."""
+    if args and args[0] == 'mc':
+        return [get_mc_binary()] + list(args[1:])
+    return args
+
+
+def __getattr__(name):
+    # `mc_binary_path` used to be computed at import time, it is now resolved on access.
+    if name == 'mc_binary_path':
+        try:
+            return get_mc_binary()
+        except aiomcError:
+            return None
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,279 @@
+'''On-disk snapshots of bucket listings, refreshed incrementally.'''
+
+import time
+import datetime
+import threading
+from typing import Iterable, Optional
+
+from .executor import Command
+from .errors import classify_error
+from .listing import ListingFrame, parse_timestamp, pack_etag, NO_ETAG, FOLDER, FILE
+
+__all__ = [
+    'ListingIndex',
+]
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    target TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag BLOB NOT NULL,
+    mtime INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    PRIMARY KEY (target, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    target TEXT PRIMARY KEY,
+    refreshed REAL,
+    reconciled REAL
+);
+'''
+
+# Objects written while a listing runs may be missed by it, incremental
+# refreshes look this far behind the previous one.
+REFRESH_OVERLAP = 60
+# Rows read per query by ``ListingIndex.scan``.
+SCAN_PAGE = 1000
+MAX_CHAR = 0x10FFFF
+SURROGATES = (0xD800, 0xDFFF)
+
+
+def prefix_range(prefix: str) -> tuple:
+    '''Bounds ``(low, high)`` of the keys starting with `prefix`, high is None when unbounded.
+
+    High is the smallest string past every key with the prefix: trailing
+    ``U+10FFFF`` characters are dropped and the last one left is
+    incremented, skipping the surrogates SQLite cannot store.
+    '''
+    stem = prefix.rstrip(chr(MAX_CHAR))
+    if not stem:
+        return prefix, None
+    code = ord(stem[-1]) + 1
+    if SURROGATES[0] <= code <= SURROGATES[1]:
+        code = SURROGATES[1] + 1
+    return prefix, stem[:-1] + chr(code)
+
+
+def isoformat(value: Optional[float]) -> Optional[str]:
+    return datetime.datetime.fromtimestamp(value, datetime.timezone.utc).isoformat() if value else None
+
+
+class ListingIndex(object):
+    '''SQLite snapshot of the listings of buckets or prefixes.
+
+    ``reconcile`` lists a target recursively and makes the snapshot match
+    it, additions, modifications and deletions included. ``refresh`` only
+    asks `mc find` for the objects modified since the previous refresh, so it
+    is cheap to run often but does not see deletions: run ``reconcile`` now
+    and then, ``status`` tells when it last ran. Lookups and prefix scans
+    read the snapshot and never spawn `mc`.
+
+    Keys are stored relative to the target, like `mc ls` prints them.
+
+    Usage::
+
+      >>> index = ListingIndex('/var/lib/inventory/listings.db')
+      >>> index.reconcile('s3/photos')
+      {'added': 120433, 'modified': 0, 'removed': 0, 'seconds': 41.2}
+      >>> index.refresh('s3/photos')
+      {'added': 12, 'modified': 3, 'removed': 0, 'seconds': 1.3}
+      >>> index.get('s3/photos', '2020/cat.jpg')['size']
+      807
+      >>> index.status('s3/photos')['reconciled_at']
+      '2020-06-01T12:25:04+00:00'
+
+    The index can be shared between threads: they take turns on its one
+    connection, and a reader waits for a refresh in progress to commit.
+
+    :param path: database file, ``':memory:'`` for a throwaway index.
+    :param lister: callable taking ``(verb, target, **flags)`` and returning
+                   the records `mc --json` prints, for the ``ls`` and ``find``
+                   verbs. Defaults to streaming them from `mc`.
+    '''
+
+    def __init__(self, path: str, lister=None):
+        import sqlite3
+        self.path = path
+        self.lister = lister or self.stream_mc
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    @staticmethod
+    def stream_mc(verb: str, target: str, **flags):
+        return Command('mc {flags} ' + verb + ' {target}').stream(target=target, **flags)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Updating
+
+    def rows(self, records: Iterable[dict], strip: str = ''):
+        for record in records:
+            if record.get('status', 'success') != 'success':
+                raise classify_error(record)
+            key = record.get('key', '')
+            if strip and key.startswith(strip):
+                key = key[len(strip):]
+            yield (
+                key,
+                record.get('size') or 0,
+                pack_etag(record.get('etag') or ''),
+                parse_timestamp(record.get('lastModified') or ''),
+                FOLDER if record.get('type') == 'folder' else FILE,
+            )
+
+    def apply(self, target: str, rows, prefix: Optional[str] = None) -> dict:
+        '''Stages `rows` and merges them into the snapshot of `target`.
+
+        With a `prefix`, entries under it that were not staged are removed,
+        ``''`` covers the whole target. Nothing is written if listing fails.
+        '''
+        with self.lock:
+            return self._apply(target, rows, prefix)
+
+    def _apply(self, target: str, rows, prefix: Optional[str]) -> dict:
+        start, now = time.perf_counter(), time.time()
+        db = self.db
+        db.execute('BEGIN')
+        try:
+            db.execute('CREATE TEMP TABLE IF NOT EXISTS staged (key TEXT PRIMARY KEY, size INTEGER, etag BLOB, mtime INTEGER, type INTEGER) WITHOUT ROWID')
+            db.execute('DELETE FROM staged')
+            db.executemany('INSERT OR REPLACE INTO staged VALUES (?, ?, ?, ?, ?)', rows)
+            added, = db.execute('SELECT count(*) FROM staged s WHERE NOT EXISTS (SELECT 1 FROM entries e WHERE e.target = ? AND e.key = s.key)', (target,)).fetchone()
+            modified, = db.execute(
+                'SELECT count(*) FROM staged s JOIN entries e ON e.target = ? AND e.key = s.key '
+                'WHERE e.size != s.size OR e.etag != s.etag OR e.mtime != s.mtime OR e.type != s.type', (target,)
+            ).fetchone()
+            removed = 0
+            if prefix is not None:
+                low, high = prefix_range(prefix)
+                where = 'target = ? AND key >= ?' + (' AND key < ?' if high is not None else '') + ' AND key NOT IN (SELECT key FROM staged)'
+                params = (target, low) + ((high,) if high is not None else ())
+                removed = db.execute('DELETE FROM entries WHERE ' + where, params).rowcount
+            db.execute('INSERT OR REPLACE INTO entries SELECT ?, key, size, etag, mtime, type FROM staged', (target,))
+            db.execute('DELETE FROM staged')
+            db.execute('INSERT OR IGNORE INTO snapshots (target) VALUES (?)', (target,))
+            db.execute('UPDATE snapshots SET refreshed = ? WHERE target = ?', (now, target))
+            if prefix == '':
+                db.execute('UPDATE snapshots SET reconciled = ? WHERE target = ?', (now, target))
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return {'added': added, 'modified': modified, 'removed': removed, 'seconds': time.perf_counter() - start}
+
+    def reconcile(self, target: str, prefixes: Optional[Iterable[str]] = None, **flags) -> dict:
+        '''Re-lists `target` and makes its snapshot match, deletions included.
+
+        :param prefixes: re-list only these prefixes of the target, each one
+                         separately, instead of the whole of it. The snapshot
+                         is then not marked as fully reconciled.
+        '''
+        target = target.rstrip('/')
+        if prefixes is None:
+            return self.apply(target, self.rows(self.lister('ls', target, recursive=True, **flags)), prefix='')
+        totals = {'added': 0, 'modified': 0, 'removed': 0, 'seconds': 0.0}
+        for prefix in prefixes:
+            records = self.lister('ls', f'{target}/{prefix}', recursive=True, **flags)
+            report = self.apply(target, self.rows(self.prefixed(records, prefix)), prefix=prefix)
+            for name in totals:
+                totals[name] += report[name]
+        return totals
+
+    @staticmethod
+    def prefixed(records: Iterable[dict], prefix: str):
+        '''Records listed under `prefix`, with their keys made relative to the target again.'''
+        base = prefix[:prefix.rfind('/') + 1]
+        for record in records:
+            if 'key' in record:
+                record = dict(record, key=base + record['key'])
+            yield record
+
+    def refresh(self, target: str, newer_than: Optional[float] = None, **flags) -> dict:
+        '''Adds or updates the objects of `target` modified recently, without seeing deletions.
+
+        :param newer_than: age in seconds of the oldest modification to pick
+                           up. Defaults to the time since the previous refresh,
+                           plus a minute; a target never listed is reconciled.
+        '''
+        target = target.rstrip('/')
+        if newer_than is None:
+            refreshed = self.status(target)['refreshed']
+            if refreshed is None:
+                return self.reconcile(target, **flags)
+            newer_than = time.time() - refreshed + REFRESH_OVERLAP
+        records = self.lister('find', target, newer_than=f'{int(newer_than) + 1}s', **flags)
+        return self.apply(target, self.rows(records, strip=target + '/'))
+
+    def forget(self, target: str):
+        '''Drops the snapshot of `target`.'''
+        target = target.rstrip('/')
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM entries WHERE target = ?', (target,))
+            self.db.execute('DELETE FROM snapshots WHERE target = ?', (target,))
+
+    # Reading
+
+    @staticmethod
+    def record(key: str, size: int, etag: bytes, mtime: int, kind: int) -> dict:
+        return {
+            'status': 'success',
+            'type': 'folder' if kind == FOLDER else 'file',
+            'lastModified': isoformat(mtime) or '',
+            'size': size,
+            'key': key,
+            'etag': '' if etag == NO_ETAG else etag.hex(),
+        }
+
+    def get(self, target: str, key: str) -> Optional[dict]:
+        '''The entry of `key` in the snapshot, or None.'''
+        with self.lock:
+            row = self.db.execute('SELECT key, size, etag, mtime, type FROM entries WHERE target = ? AND key = ?', (target.rstrip('/'), key)).fetchone()
+        return self.record(*row) if row is not None else None
+
+    def scan(self, target: str, prefix: str = ''):
+        '''Yields the entries of the snapshot under `prefix`, in key order.
+
+        Entries are read a page at a time, so other threads can use the
+        index while the caller goes through a large prefix.
+        '''
+        low, high = prefix_range(prefix)
+        bound = (' AND key < ?', (high,)) if high is not None else ('', ())
+        target, start = target.rstrip('/'), '>='
+        while True:
+            query = f'SELECT key, size, etag, mtime, type FROM entries WHERE target = ? AND key {start} ?{bound[0]} ORDER BY key LIMIT {SCAN_PAGE}'
+            with self.lock:
+                rows = self.db.execute(query, (target, low) + bound[1]).fetchall()
+            for row in rows:
+                yield self.record(*row)
+            if len(rows) < SCAN_PAGE:
+                return
+            # The next page starts after the last key read.
+            low, start = rows[-1][0], '>'
+
+    def frame(self, target: str, prefix: str = '') -> ListingFrame:
+        '''The entries under `prefix` as a ``ListingFrame``.'''
+        return ListingFrame.from_records(self.scan(target, prefix))
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute('SELECT count(*) FROM entries').fetchone()[0]
+
+    def status(self, target: str) -> dict:
+        '''Entry count and times of the last refresh and full reconcile of `target`.'''
+        target = target.rstrip('/')
+        with self.lock:
+            entries, = self.db.execute('SELECT count(*) FROM entries WHERE target = ?', (target,)).fetchone()
+            row = self.db.execute('SELECT refreshed, reconciled FROM snapshots WHERE target = ?', (target,)).fetchone() or (None, None)
+        return {'target': target, 'entries': entries, 'refreshed': row[0], 'reconciled': row[1], 'reconciled_at': isoformat(row[1])}
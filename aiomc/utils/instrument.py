@@ -0,0 +1,249 @@
+'''Per-phase timings of every `mc` run, for listeners, traces and histograms.
+
+Instrumentation costs nothing until it is turned on, by adding a listener,
+opening a trace or enabling histograms.
+
+Usage::
+
+  >>> configure_instrumentation(histograms=True)
+  >>> add_listener(lambda timing: print(timing.name, timing.total, timing.first_byte))
+  >>> with trace_commands() as timings:
+  ...     ls(target='s3/bucket')
+  >>> timings[0].as_dict()
+  {'name': 'ls', 'render': 1.2e-05, 'spawn': 0.0021, 'first_byte': 0.031, 'exit': 0.0004, ...}
+  >>> export_histograms()['ls']['phases']['total']['p99']
+'''
+
+import time
+import bisect
+import logging
+import threading
+import contextlib
+import contextvars
+from typing import Optional
+
+__all__ = [
+    'CommandTiming',
+    'Histogram',
+    'add_listener',
+    'remove_listener',
+    'trace_commands',
+    'configure_instrumentation',
+    'export_histograms',
+    'reset_histograms',
+]
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('render', 'spawn', 'first_byte', 'exit', 'decode', 'parse', 'total')
+
+
+class CommandTiming(object):
+    '''Timings, in seconds, of one run of a command.
+
+    - ``render``: building the argument list from the template,
+    - ``spawn``: starting the `mc` process,
+    - ``first_byte``: from the start of `mc` to its first byte of output,
+    - ``exit``: from its last byte of output to its exit,
+    - ``decode``: collecting the output and wrapping it in a ``Response``,
+    - ``parse``: decoding the JSON records, filled in when ``content`` is first read,
+    - ``total``: from render to the ``Response``, parse excluded.
+
+    Phases that did not happen are None, e.g. ``first_byte`` without output.
+    '''
+
+    __slots__ = ('name', 'command', 'started', 'render', 'spawn', 'first_byte', 'exit', 'decode', 'parse', 'total', 'output_bytes', 'returncode', 'error', '_start', '_clock')
+
+    def __init__(self, name: str, command: str, render: float = None):
+        self.name = name
+        self.command = command
+        self.started = time.time()
+        self.render = render
+        self.spawn = self.first_byte = self.exit = self.decode = self.parse = self.total = None
+        self.output_bytes = 0
+        self.returncode = None
+        self.error = None
+        self._start = self._clock = time.perf_counter()
+
+    def lap(self) -> float:
+        '''Seconds since the previous lap.'''
+        now = time.perf_counter()
+        elapsed, self._clock = now - self._clock, now
+        return elapsed
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith('_')}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[name='{self.name}', total={self.total}]"
+
+
+class Histogram(object):
+    '''Latency histogram with exponential buckets, from 10 microseconds to about 20 minutes.'''
+
+    BOUNDS = tuple(1e-5 * 2 ** index for index in range(27))
+
+    __slots__ = ('counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        '''Upper bound of the bucket holding `percentile`, capped by the largest value seen.'''
+        if not self.count:
+            return None
+        rank = self.count * percentile / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.BOUNDS[index], self.max) if index < len(self.BOUNDS) else self.max
+        return self.max
+
+    def export(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': [[bound, count] for bound, count in zip(self.BOUNDS + (float('inf'),), self.counts) if count],
+        }
+
+
+_listeners = []
+_histograms = None
+_traces = 0
+_lock = threading.Lock()
+_trace = contextvars.ContextVar('aiomc_trace', default=None)
+# Whether anything consumes timings; checked on the hot path.
+active = False
+
+
+def _update_active():
+    global active
+    active = bool(_listeners) or _histograms is not None or _traces > 0
+
+
+def add_listener(listener):
+    '''Calls ``listener(timing)`` with the ``CommandTiming`` of every finished run.
+
+    A listener that raises is logged and skipped, the command and the other
+    listeners are not affected.
+    '''
+    with _lock:
+        _listeners.append(listener)
+        _update_active()
+
+
+def remove_listener(listener):
+    with _lock:
+        _listeners.remove(listener)
+        _update_active()
+
+
+@contextlib.contextmanager
+def trace_commands():
+    '''Collects the timings of the runs made in this context, tasks started from it included.'''
+    global _traces
+    timings = []
+    token = _trace.set(timings)
+    with _lock:
+        _traces += 1
+        _update_active()
+    try:
+        yield timings
+    finally:
+        _trace.reset(token)
+        with _lock:
+            _traces -= 1
+            _update_active()
+
+
+def configure_instrumentation(histograms: bool = True):
+    '''Turns aggregation of timings into per-command histograms on or off.'''
+    global _histograms
+    with _lock:
+        _histograms = ({} if _histograms is None else _histograms) if histograms else None
+        _update_active()
+
+
+def start_timing(name: str, command: str, render: float = None) -> Optional[CommandTiming]:
+    '''A ``CommandTiming`` for a run about to start, or None when nothing consumes timings.'''
+    if not active:
+        return None
+    return CommandTiming(name, command, render)
+
+
+def _aggregate(timing: CommandTiming, phases=PHASES):
+    with _lock:
+        if _histograms is None:
+            return
+        stats = _histograms.get(timing.name)
+        if stats is None:
+            stats = _histograms[timing.name] = {'runs': 0, 'errors': 0, 'output_bytes': 0, 'phases': {}}
+        if phases is PHASES:
+            stats['runs'] += 1
+            stats['errors'] += timing.error is not None or bool(timing.returncode)
+            stats['output_bytes'] += timing.output_bytes
+        for phase in phases:
+            value = getattr(timing, phase)
+            if value is not None:
+                histogram = stats['phases'].get(phase)
+                if histogram is None:
+                    histogram = stats['phases'][phase] = Histogram()
+                histogram.record(value)
+
+
+def finish_timing(timing: Optional[CommandTiming], error: Optional[BaseException] = None):
+    '''Completes `timing` and hands it to the listeners, the current trace and the histograms.'''
+    if timing is None:
+        return
+    timing.total = (timing.render or 0) + time.perf_counter() - timing._start
+    if error is not None:
+        timing.error = repr(error)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append(timing)
+    for listener in list(_listeners):
+        try:
+            listener(timing)
+        except Exception:
+            logger.exception('Timing listener %r failed', listener)
+    _aggregate(timing)
+
+
+def record_parse(timing: Optional[CommandTiming], elapsed: float):
+    '''Adds the parse time of a response, measured when its content is first read.'''
+    if timing is None:
+        return
+    timing.parse = elapsed
+    _aggregate(timing, phases=('parse',))
+
+
+def export_histograms() -> dict:
+    '''Returns, per command name, run, error and byte counts and a histogram per phase.'''
+    with _lock:
+        return {
+            name: dict(stats, phases={phase: histogram.export() for phase, histogram in stats['phases'].items()})
+            for name, stats in (_histograms or {}).items()
+        }
+
+
+def reset_histograms():
+    with _lock:
+        if _histograms is not None:
+            _histograms.clear()
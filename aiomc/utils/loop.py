@@ -0,0 +1,182 @@
+'''A long-lived event loop in a daemon thread, running the coroutines of the sync API.'''
+
+import os
+import atexit
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+from typing import Optional
+
+__all__ = [
+    'BackgroundLoop',
+    'get_background_loop',
+    'shutdown_background_loop',
+]
+
+# Seconds given to pending commands to stop their `mc` when the loop shuts down.
+SHUTDOWN_GRACE = 5.0
+
+
+class LoopFuture(concurrent.futures.Future):
+    '''Future of a coroutine submitted to a ``BackgroundLoop``; cancelling it cancels the task.'''
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        super().__init__()
+        self.loop = loop
+        self.task = None
+
+    def cancel(self) -> bool:
+        if self.task is None:
+            return super().cancel()
+        if not self.done():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        return True
+
+    def copy_result(self, task: asyncio.Task):
+        if task.cancelled():
+            super().cancel()
+        elif task.exception() is not None:
+            self.set_exception(task.exception())
+        else:
+            self.set_result(task.result())
+
+
+class BackgroundLoop(object):
+    '''An asyncio event loop running forever in a daemon thread.
+
+    Coroutines submitted from any thread run as tasks of this loop, in a
+    copy of the submitter's context, and their results come back through
+    thread-safe futures. Sharing one loop saves creating and tearing down a
+    loop per call, and lets concurrent sync callers share coalesced runs.
+
+    Usage::
+
+      >>> loop = get_background_loop()
+      >>> loop.run(async_ls(target='s3/bucket'))
+      >>> future = loop.submit(async_stat(target='s3/bucket/key'))
+      >>> future.result(timeout=10)
+    '''
+
+    def __init__(self, name: str = 'aiomc-loop'):
+        self.name = name
+        self.loop = None
+        self.thread = None
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) -> 'BackgroundLoop':
+        with self._lock:
+            if not self.running:
+                self._started.clear()
+                self.thread = threading.Thread(target=self._main, name=self.name, daemon=True)
+                self.thread.start()
+                self._started.wait()
+        return self
+
+    def _main(self):
+        loop = self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.call_soon(self._started.set)
+        try:
+            loop.run_forever()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.wait(tasks, timeout=SHUTDOWN_GRACE))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def submit(self, coro) -> LoopFuture:
+        '''Schedules `coro` on the loop and returns a ``concurrent.futures.Future`` of its result.
+
+        Cancelling the future cancels the task, which stops its `mc`.
+        '''
+        if not self.running:
+            self.start()
+        if threading.current_thread() is self.thread:
+            coro.close()
+            raise RuntimeError('Cannot wait for the background loop from its own thread, await the coroutine instead')
+        loop = self.loop
+        future = LoopFuture(loop)
+        context = contextvars.copy_context()
+
+        def start():
+            if future.cancelled():
+                coro.close()
+                return
+            # Tasks copy the current context, so the task runs in the submitter's one.
+            future.task = context.run(loop.create_task, coro)
+            future.task.add_done_callback(future.copy_result)
+        loop.call_soon_threadsafe(start)
+        return future
+
+    def run(self, coro, timeout: Optional[float] = None):
+        '''Runs `coro` on the loop and waits for its result.
+
+        If waiting is interrupted, e.g. by ``KeyboardInterrupt``, the task is
+        cancelled and given a moment to stop its `mc` before re-raising.
+        '''
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            if not future.done():
+                future.cancel()
+                concurrent.futures.wait([future], timeout=SHUTDOWN_GRACE)
+            raise
+
+    def stop(self, timeout: Optional[float] = SHUTDOWN_GRACE + 1):
+        '''Cancels pending tasks, stops the loop and waits for its thread.'''
+        with self._lock:
+            thread, loop = self.thread, self.loop
+            if thread is None or not thread.is_alive():
+                return
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            self.thread = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[name='{self.name}', running={self.running}]"
+
+
+_background_loop = None
+_background_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    '''Returns the loop running the coroutines of sync calls, started on first use.'''
+    global _background_loop
+    if _background_loop is None:
+        with _background_lock:
+            if _background_loop is None:
+                _background_loop = BackgroundLoop()
+    return _background_loop
+
+
+def shutdown_background_loop():
+    '''Stops the background loop; it is started again by the next sync call. Runs at exit.'''
+    global _background_loop
+    with _background_lock:
+        loop, _background_loop = _background_loop, None
+    if loop is not None:
+        loop.stop()
+
+
+def _reset_after_fork():
+    # The loop thread does not exist in a forked child: start afresh there.
+    global _background_loop, _background_lock
+    _background_loop = None
+    _background_lock = threading.Lock()
+
+
+atexit.register(shutdown_background_loop)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,257 @@
+'''Retries with backoff, and hedged duplicates of slow reads.'''
+
+import time
+import random
+import asyncio
+import threading
+import collections
+from typing import Optional, Tuple, Type
+
+from .errors import TransientError, CommandTimeoutError, classify_error
+
+__all__ = [
+    'RetryBudget',
+    'RetryPolicy',
+    'HedgePolicy',
+    'get_retry_policy',
+    'set_retry_policy',
+    'get_hedge_policy',
+    'set_hedge_policy',
+]
+
+
+class RetryBudget(object):
+    '''Caps retries to a fraction of calls, so that retries cannot multiply load during an outage.
+
+    Every call deposits `ratio` tokens, every retry withdraws one. The
+    budget starts with, and never holds more than, `reserve` tokens.
+    '''
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    '''How failed commands are retried: which errors, how many times, and how long to wait.
+
+    A response is retried when its error record classifies as one of
+    `retry_on` (transient errors by default), and so is a timeout. Delays
+    grow exponentially from `base` up to `cap`, with "full jitter": the
+    actual delay is drawn uniformly below the exponential one.
+
+    The policy set with ``set_retry_policy`` only covers read-only commands.
+    A mutating command (`cp`, `rm`, `admin user add`...) may have taken
+    effect before failing, and is only retried with an explicit ``retry=``.
+
+    Usage::
+
+      >>> set_retry_policy(RetryPolicy(max_attempts=5, base=0.1, cap=5))
+      >>> ls(target='prod/bucket')                  # retried on SlowDown, 503, resets...
+      >>> ls(target='prod/bucket', retry=False)     # or not, for this call
+      >>> cp(source='a.txt', target='prod/bucket', retry=RetryPolicy())  # mutations opt in
+
+    :param max_attempts: attempts in total, the first one included.
+    :param base: delay before the first retry, before jitter.
+    :param cap: longest delay between two attempts.
+    :param jitter: draw delays at random below the exponential backoff.
+    :param budget: ``RetryBudget`` shared by the calls using this policy, None for no budget.
+    :param retry_on: exception classes worth a retry.
+    '''
+
+    def __init__(self, max_attempts: int = 3, base: float = 0.2, cap: float = 10.0, jitter: bool = True,
+                 budget: Optional[RetryBudget] = None, retry_on: Tuple[Type[Exception], ...] = (TransientError, CommandTimeoutError)):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self.budget = budget if budget is not None else RetryBudget()
+        self.retry_on = retry_on
+        self.retries = 0
+        self.exhausted = 0
+
+    def backoff(self, attempt: int) -> float:
+        '''Delay before attempt number ``attempt + 1``.'''
+        delay = min(self.cap, self.base * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        '''Delay before retrying after `error` on attempt `attempt`, None to give up.'''
+        if not isinstance(error, self.retry_on):
+            return None
+        if attempt >= self.max_attempts or (self.budget is not None and not self.budget.withdraw()):
+            self.exhausted += 1
+            return None
+        self.retries += 1
+        return self.backoff(attempt)
+
+    def stats(self) -> dict:
+        return {'retries': self.retries, 'exhausted': self.exhausted, 'budget': self.budget.tokens if self.budget is not None else None}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}[max_attempts={self.max_attempts}, base={self.base}, cap={self.cap}]'
+
+
+def response_error(response):
+    '''The classified error of a failed response, else None.'''
+    if response is None or response.status != 'error':
+        return None
+    return classify_error(response.content)
+
+
+def run_with_retry(call, policy: Optional[RetryPolicy]):
+    '''Runs ``call()`` and retries it as `policy` says. The last response is returned, even a failed one.'''
+    if policy is None:
+        return call()
+    if policy.budget is not None:
+        policy.budget.deposit()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = call()
+            error = response_error(response)
+        except policy.retry_on as e:
+            response, error = None, e
+        delay = None if error is None else policy.next_delay(attempt, error)
+        if delay is None:
+            if response is None:
+                raise error
+            return response
+        time.sleep(delay)
+
+
+async def async_run_with_retry(call, policy: Optional[RetryPolicy]):
+    '''Async version of ``run_with_retry``, `call` returns an awaitable.'''
+    if policy is None:
+        return await call()
+    if policy.budget is not None:
+        policy.budget.deposit()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = await call()
+            error = response_error(response)
+        except policy.retry_on as e:
+            response, error = None, e
+        delay = None if error is None else policy.next_delay(attempt, error)
+        if delay is None:
+            if response is None:
+                raise error
+            return response
+        await asyncio.sleep(delay)
+
+
+class HedgePolicy(object):
+    '''Starts a duplicate of a read once it runs slower than most recent ones, and keeps the first answer.
+
+    Latencies are tracked per command over the last `window` runs. When a
+    run exceeds their `percentile`, a second one is started; whichever
+    succeeds first wins and the other is cancelled, which stops its `mc`.
+    Only used for read-only commands run by ``AsyncCommand``; sync calls
+    and streams accept ``hedge=`` and ignore it.
+
+    Usage::
+
+      >>> set_hedge_policy(HedgePolicy(percentile=95))
+      >>> await async_admin_user_info(target='prod', username='rockstar')
+
+    :param percentile: latency percentile past which a duplicate is started.
+    :param min_samples: runs to observe before hedging a command.
+    :param window: runs kept per command to compute the percentile.
+    :param min_delay: never hedge before this many seconds.
+    '''
+
+    def __init__(self, percentile: float = 95.0, min_samples: int = 20, window: int = 200, min_delay: float = 0.01):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, key, elapsed: float):
+        self._latencies[key].append(elapsed)
+
+    def threshold(self, key) -> Optional[float]:
+        '''Seconds after which a run of `key` is hedged, None while there are too few samples.'''
+        samples = self._latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    async def run(self, key, call):
+        '''Runs ``await call()``, hedged with a second call if the first one is slow.'''
+        start = time.monotonic()
+        threshold = self.threshold(key)
+        first = asyncio.ensure_future(call())
+        if threshold is None:
+            response = await first
+            self.record(key, time.monotonic() - start)
+            return response
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(call()))
+            failure = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and response_error(task.result()) is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        self.record(key, time.monotonic() - start)
+                        return task.result()
+                    failure = task
+            return failure.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.shield(asyncio.wait(tasks))
+
+    def stats(self) -> dict:
+        return {'hedges': self.hedges, 'hedge_wins': self.hedge_wins}
+
+
+_retry_policy = None
+_hedge_policy = None
+
+
+def get_retry_policy() -> Optional[RetryPolicy]:
+    return _retry_policy
+
+
+def set_retry_policy(policy: Optional[RetryPolicy]):
+    '''Sets the retry policy of read-only commands that do not pass ``retry=``, None to not retry.'''
+    global _retry_policy
+    _retry_policy = policy
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    return _hedge_policy
+
+
+def set_hedge_policy(policy: Optional[HedgePolicy]):
+    '''Sets the hedging policy of read-only async commands that do not pass ``hedge=``, None to not hedge.'''
+    global _hedge_policy
+    _hedge_policy = policy
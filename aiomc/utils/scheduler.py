@@ -0,0 +1,292 @@
+'''Bounded-concurrency scheduling of `mc` processes.'''
+
+import os
+import time
+import asyncio
+import itertools
+import threading
+import contextlib
+import collections
+from typing import Optional
+
+# Pipes and bookkeeping descriptors the parent holds for every running `mc`.
+FDS_PER_PROCESS = 4
+# `mc` is network bound, so several processes per core keep the links busy.
+PROCESSES_PER_CPU = 8
+
+__all__ = [
+    'CommandScheduler',
+    'default_concurrency',
+    'command_key',
+    'get_scheduler',
+    'set_scheduler',
+    'configure_scheduler',
+]
+
+
+def default_concurrency() -> int:
+    '''Default number of `mc` processes allowed to run at once.
+
+    Derived from the soft ``RLIMIT_NOFILE`` (half of the descriptor table is
+    left for the rest of the application) and the number of CPUs.
+    '''
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, ValueError, OSError):
+        soft = 1024
+    if soft < 0:
+        soft = 1 << 16
+    cpus = os.cpu_count() or 1
+    return max(1, min(soft // 2 // FDS_PER_PROCESS, cpus * PROCESSES_PER_CPU))
+
+
+def command_key(kwargs: dict) -> str:
+    '''Returns the alias a command talks to, used to apply per-alias limits.
+
+    The alias is the first path component of ``target``, ``alias`` or
+    ``source``, in that order. Local paths map to the empty key.
+    '''
+    for name in ('target', 'alias', 'source'):
+        value = kwargs.get(name)
+        if value and isinstance(value, str):
+            if value.startswith(('/', '.', '~')):
+                return ''
+            return value.split('/', 1)[0]
+    return ''
+
+
+class _Waiter(object):
+    __slots__ = ('key', 'future', 'enqueued', 'sequence', 'granted', 'abandoned')
+
+    def __init__(self, key, future, sequence):
+        self.key = key
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.sequence = sequence
+        self.granted = False
+        # Cancelled before being granted, dropped when it reaches the head of its queue.
+        self.abandoned = False
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class CommandScheduler(object):
+    '''Limits how many `mc` processes run at once, globally and per alias.
+
+    Commands over the limit wait in one FIFO queue per alias, and a free
+    slot goes to the oldest waiter among the aliases that are not
+    saturated, so a busy alias cannot starve the others. The scheduler is thread safe and can be shared by
+    event loops running in different threads.
+
+    Usage::
+
+      >>> scheduler = CommandScheduler(max_concurrency=64, per_key_limit=16)
+      >>> scheduler.set_limit('prod', 4)
+      >>> set_scheduler(scheduler)
+      >>> scheduler.stats()
+      {'max_concurrency': 64, 'in_flight': 0, 'queue_depth': 0, 'acquired': 0,
+       'average_wait': 0.0, 'max_wait': 0.0, 'in_flight_per_key': {}}
+
+    :param max_concurrency: maximum number of processes running at once.
+                            Defaults to ``default_concurrency()``.
+    :param per_key_limit: maximum number of processes per alias. Defaults to
+                          ``None``, only the global limit applies.
+    '''
+
+    def __init__(self, max_concurrency: Optional[int] = None, per_key_limit: Optional[int] = None):
+        self.max_concurrency = max_concurrency or default_concurrency()
+        self.per_key_limit = per_key_limit
+        self.key_limits = {}
+        self.in_flight = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._active = collections.Counter()
+        self._queues = {}
+        self._waiting = 0
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def set_limit(self, key: str, limit: Optional[int]):
+        '''Sets the concurrency limit for one alias, ``None`` removes it.'''
+        with self._lock:
+            if limit is None:
+                self.key_limits.pop(key, None)
+            else:
+                self.key_limits[key] = limit
+            ready = self._dispatch()
+        self._wake_all(ready)
+
+    def limit_for(self, key: str) -> Optional[int]:
+        return self.key_limits.get(key, self.per_key_limit)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def _has_capacity(self, key):
+        if self.in_flight >= self.max_concurrency:
+            return False
+        limit = self.limit_for(key)
+        return limit is None or self._active[key] < limit
+
+    def _grant(self, key, waited):
+        self.in_flight += 1
+        self._active[key] += 1
+        self.acquired += 1
+        self.total_wait += waited
+        if waited > self.max_wait:
+            self.max_wait = waited
+
+    def _head(self, key):
+        queue = self._queues[key]
+        while queue and (queue[0].abandoned or queue[0].future.cancelled()):
+            waiter = queue.popleft()
+            if not waiter.abandoned:
+                waiter.abandoned = True
+                self._waiting -= 1
+        return queue[0] if queue else None
+
+    def _dispatch(self):
+        '''Grants free slots, oldest waiter first among the aliases under their limit.'''
+        ready = []
+        now = time.monotonic()
+        while self._waiting and self.in_flight < self.max_concurrency:
+            chosen = None
+            for key in list(self._queues):
+                waiter = self._head(key)
+                if waiter is None:
+                    del self._queues[key]
+                elif self._has_capacity(key) and (chosen is None or waiter.sequence < chosen.sequence):
+                    chosen = waiter
+            if chosen is None:
+                break
+            self._queues[chosen.key].popleft()
+            self._waiting -= 1
+            chosen.granted = True
+            self._grant(chosen.key, now - chosen.enqueued)
+            ready.append(chosen)
+        return ready
+
+    def _wake_all(self, waiters):
+        for waiter in waiters:
+            loop = waiter.future.get_loop()
+            try:
+                loop.call_soon_threadsafe(_wake, waiter.future)
+            except RuntimeError:
+                # The loop is closed and nobody will use the slot granted to it.
+                self.release(waiter.key)
+
+    async def acquire(self, key: str = '') -> float:
+        '''Waits for a free slot for `key` and returns the time spent queued.'''
+        with self._lock:
+            if self._has_capacity(key):
+                self._grant(key, 0.0)
+                return 0.0
+            waiter = _Waiter(key, asyncio.get_running_loop().create_future(), next(self._sequence))
+            self._queues.setdefault(key, collections.deque()).append(waiter)
+            self._waiting += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted and not waiter.abandoned:
+                    waiter.abandoned = True
+                    self._waiting -= 1
+            if granted:
+                self.release(key)
+            raise
+        return time.monotonic() - waiter.enqueued
+
+    def release(self, key: str = ''):
+        '''Returns the slot held for `key` and wakes the next eligible waiters.'''
+        with self._lock:
+            self.in_flight -= 1
+            self._active[key] -= 1
+            if not self._active[key]:
+                del self._active[key]
+            ready = self._dispatch()
+        self._wake_all(ready)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: str = ''):
+        '''Holds a slot for `key` for the duration of the ``async with`` block.'''
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def stats(self) -> dict:
+        '''Returns queue depth, in-flight counts and wait times.'''
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'queue_depth': self._waiting,
+                'acquired': self.acquired,
+                'average_wait': self.total_wait / self.acquired if self.acquired else 0.0,
+                'max_wait': self.max_wait,
+                'in_flight_per_key': dict(self._active),
+            }
+
+    def _reset_after_fork(self):
+        # The threads and loops holding slots or waiting for one are gone in a forked child, limits stay.
+        self.in_flight = 0
+        self._active = collections.Counter()
+        self._queues = {}
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[max_concurrency={self.max_concurrency}, in_flight={self.in_flight}, queue_depth={self._waiting}]"
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> CommandScheduler:
+    '''Returns the scheduler every ``AsyncCommand`` goes through.'''
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = CommandScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: CommandScheduler):
+    '''Replaces the scheduler every ``AsyncCommand`` goes through.'''
+    global _scheduler
+    _scheduler = scheduler
+
+
+def configure_scheduler(max_concurrency: Optional[int] = None, per_key_limit: Optional[int] = None, key_limits: Optional[dict] = None) -> CommandScheduler:
+    '''Installs a new global scheduler with the given limits.
+
+    Usage::
+
+      >>> configure_scheduler(max_concurrency=32, key_limits={'prod': 8})
+    '''
+    scheduler = CommandScheduler(max_concurrency=max_concurrency, per_key_limit=per_key_limit)
+    for key, limit in (key_limits or {}).items():
+        scheduler.set_limit(key, limit)
+    set_scheduler(scheduler)
+    return scheduler
+
+
+def _reset_after_fork():
+    global _scheduler_lock
+    _scheduler_lock = threading.Lock()
+    if _scheduler is not None:
+        _scheduler._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
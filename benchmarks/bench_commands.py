@@ -0,0 +1,203 @@
+'''Overhead of running commands through aiomc, against a stub `mc` on PATH.
+
+Each suite runs `mc ls` against ``aiomc.testing.StubMc``, which prints
+``--lines`` entries of about ``--size`` bytes each after ``--latency``
+seconds, so that the numbers only depend on aiomc and process creation:
+
+- ``command``: ``Command`` called in a loop,
+- ``async_command``: ``AsyncCommand.run`` awaited in a loop, in one event loop,
+- ``run_sync``: ``AsyncCommand`` called synchronously, through ``run_sync``,
+- ``response``: parsing the same output in process, without spawning `mc`,
+- ``concurrency``: ``AsyncCommand.run`` calls gathered at several concurrency levels.
+
+Every call reads ``Response.content``. Results hold calls per second,
+p50/p99 latencies in milliseconds and the peak RSS of the benchmark and of
+its children, as JSON; ``--compare`` prints the ratios between two results.
+
+Usage::
+
+    python benchmarks/bench_commands.py --calls 200 --lines 100 --size 256 --output after.json
+    python benchmarks/bench_commands.py --compare before.json after.json
+'''
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiomc.testing import StubMc
+from aiomc.utils.executor import Command, AsyncCommand, Response, get_json_decoder
+from aiomc.utils.scheduler import CommandScheduler, set_scheduler
+
+TEMPLATE = 'mc {flags} ls {target}'
+TARGET = 'stub/bucket'
+
+
+def peak_rss_mib(who=resource.RUSAGE_SELF) -> float:
+    '''Peak resident set size; ``ru_maxrss`` is in KiB on Linux, in bytes on macOS.'''
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def percentile(ordered: list, percent: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        'calls': len(ordered),
+        'calls_per_s': len(ordered) / elapsed,
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'peak_rss_mib': peak_rss_mib(),
+        'children_peak_rss_mib': peak_rss_mib(resource.RUSAGE_CHILDREN),
+    }
+
+
+def bench_command(calls: int, lines: int) -> dict:
+    command = Command(TEMPLATE)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        begin = time.perf_counter()
+        assert len(command(target=TARGET).content) == lines
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_async_command(calls: int, lines: int) -> dict:
+    command = AsyncCommand(TEMPLATE)
+
+    async def run():
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(calls):
+            begin = time.perf_counter()
+            assert len((await command.run(target=TARGET)).content) == lines
+            latencies.append(time.perf_counter() - begin)
+        return latencies, time.perf_counter() - start
+    return summarize(*asyncio.run(run()))
+
+
+def bench_run_sync(calls: int, lines: int) -> dict:
+    command = AsyncCommand(TEMPLATE)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        begin = time.perf_counter()
+        assert len(command(target=TARGET).content) == lines
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_response(calls: int, lines: int) -> dict:
+    output = Command(TEMPLATE)(target=TARGET).output
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        begin = time.perf_counter()
+        assert len(Response(output=output).content) == lines
+        latencies.append(time.perf_counter() - begin)
+    return dict(summarize(latencies, time.perf_counter() - start), output_bytes=len(output))
+
+
+def bench_concurrency(calls: int, lines: int, levels: list) -> dict:
+    command = AsyncCommand(TEMPLATE)
+    results = {}
+
+    async def run(level: int):
+        semaphore = asyncio.Semaphore(level)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                begin = time.perf_counter()
+                assert len((await command.run(target=TARGET)).content) == lines
+                latencies.append(time.perf_counter() - begin)
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(calls)))
+        return latencies, time.perf_counter() - start
+    set_scheduler(CommandScheduler(max_concurrency=max(levels)))
+    try:
+        for level in levels:
+            results[str(level)] = summarize(*asyncio.run(run(level)))
+    finally:
+        set_scheduler(None)
+    return results
+
+
+SUITES = {
+    'command': bench_command,
+    'async_command': bench_async_command,
+    'run_sync': bench_run_sync,
+    'response': bench_response,
+    'concurrency': bench_concurrency,
+}
+
+
+def measure(calls: int, lines: int, size: int, latency: float, levels: list, suites: list) -> dict:
+    results = {
+        'benchmark': 'commands',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'decoder': f'{get_json_decoder().__module__}.{get_json_decoder().__qualname__}',
+        'calls': calls,
+        'lines': lines,
+        'size': size,
+        'latency': latency,
+        'suites': {},
+    }
+    with StubMc(mode='lines', lines=lines, size=size, delay=latency, on_path=True):
+        for name in suites:
+            if name == 'concurrency':
+                results['suites'][name] = bench_concurrency(calls, lines, levels)
+            else:
+                results['suites'][name] = SUITES[name](calls, lines)
+    return results
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def compare(before: dict, after: dict) -> dict:
+    '''Ratios after / before of every number under ``suites`` in both results.'''
+    old, new = flatten(before['suites']), flatten(after['suites'])
+    return {key: new[key] / old[key] for key in old if key in new and old[key]}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=100)
+    parser.add_argument('--size', type=int, default=256, help='bytes per line of output')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before the stub prints anything')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--suites', nargs='+', choices=list(SUITES), default=list(SUITES))
+    parser.add_argument('--output', help='write the results to this file as well')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files instead of running')
+    options = parser.parse_args()
+    if options.compare:
+        with open(options.compare[0]) as before, open(options.compare[1]) as after:
+            print(json.dumps(compare(json.load(before), json.load(after)), indent=2))
+        sys.exit(0)
+    results = measure(options.calls, options.lines, options.size, options.latency, options.levels, options.suites)
+    text = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, 'w') as output:
+            output.write(text + '\n')
+    print(text)
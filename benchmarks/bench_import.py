@@ -0,0 +1,50 @@
+'''Cold-start cost of `import aiomc`.
+
+Each sample imports the package in a fresh interpreter, so nothing is cached
+in `sys.modules`. The import must not print anything nor require `mc`.
+
+Usage::
+
+    python benchmarks/bench_import.py --repeat 20
+'''
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import sys, json, time
+start = time.perf_counter()
+import aiomc
+elapsed = time.perf_counter() - start
+sys.stderr.write(json.dumps([elapsed, len([name for name in sys.modules if name.startswith('aiomc')])]))
+'''
+
+
+def measure(repeat: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT, PATH='/nonexistent')
+    samples, modules = [], 0
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', PROBE], env=env, capture_output=True, text=True, check=True)
+        if result.stdout:
+            raise AssertionError(f'`import aiomc` printed to stdout: {result.stdout!r}')
+        elapsed, modules = json.loads(result.stderr.splitlines()[-1])
+        samples.append(elapsed)
+    return {
+        'benchmark': 'import',
+        'repeat': repeat,
+        'p50_ms': statistics.median(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+        'aiomc_modules_loaded': modules,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    print(json.dumps(measure(parser.parse_args().repeat)))
@@ -0,0 +1,60 @@
+'''Wall time of a sharded ``mirror`` as the number of shards grows.
+
+The stub `mc` in ``tree`` mode serves a source of `folders` equally sized
+folders, each taking ``--per-folder`` seconds to mirror, so the ideal time
+with `n` shards is ``folders * per_folder / n``. ``efficiency`` is the
+speedup over one shard divided by the number of shards: 1.0 is linear
+scaling, the shortfall is the cost of listing and sizing the source with
+`mc ls` and `mc du` and of starting one `mc mirror` per folder. With
+``--by prefixes`` the folders are not sized, so `mc du` does not run. The
+scheduler is sized so that it never caps the shards.
+
+Usage::
+
+    python benchmarks/bench_mirror.py --folders 32 --per-folder 0.5 --shards 1 2 4 8
+    python benchmarks/bench_mirror.py --by prefixes
+'''
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiomc.testing import StubMc
+from aiomc.api.mirror import mirror, list_prefixes
+from aiomc.utils.scheduler import configure_scheduler
+
+
+def measure(folders: int, per_folder: float, levels: list, by: str = 'bytes') -> dict:
+    results = {'benchmark': 'mirror', 'folders': folders, 'per_folder': per_folder, 'by': by, 'shards': {}}
+    configure_scheduler(max_concurrency=max(64, 2 * max(levels)))
+    with StubMc(mode='tree', lines=folders, sleep=per_folder):
+        start = time.perf_counter()
+        asyncio.run(list_prefixes('stub/source', sized=by != 'prefixes'))
+        results['listing'] = time.perf_counter() - start
+        for shards in levels:
+            start = time.perf_counter()
+            summary = mirror('stub/source', 'stub/target', shards=shards, by=by)
+            elapsed = time.perf_counter() - start
+            if not summary.ok:
+                raise AssertionError(f'mirror failed with {shards} shards: {summary.failed_jobs}')
+            results['shards'][shards] = {'elapsed': elapsed, 'ideal': folders * per_folder / shards, 'jobs': len(summary.results)}
+    base = results['shards'][levels[0]]['elapsed'] * levels[0]
+    for shards, result in results['shards'].items():
+        result['speedup'] = base / result['elapsed']
+        result['efficiency'] = result['speedup'] / shards
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--folders', type=int, default=32)
+    parser.add_argument('--per-folder', type=float, default=0.5)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--by', choices=['bytes', 'objects', 'prefixes'], default='bytes')
+    options = parser.parse_args()
+    print(json.dumps(measure(options.folders, options.per_folder, options.shards, options.by), indent=2))
@@ -0,0 +1,74 @@
+'''Parse time and peak memory of ``Response`` on a large `mc ls --json` listing.
+
+Compares the current lazy, single pass decoding with the string rewriting
+it replaced (``make_json`` then ``json.loads``). Peak memory is the
+``tracemalloc`` peak while decoding, on top of the output itself; the
+decoded records alone account for the retained part of it.
+
+Usage::
+
+    python benchmarks/bench_response.py --lines 1000000
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiomc.utils.executor import Response, make_json, get_json_decoder
+
+RECORD = '{"status":"success","type":"file","lastModified":"2020-06-01T12:25:04.163216097+01:00","size":%d,"key":"dir/key-%d","etag":"d41d8cd98f00b204e9800998ecf8427e","url":"s3/bucket/","versionOrdinal":1,"storageClass":"STANDARD"}'
+
+
+def make_output(lines: int) -> bytes:
+    return '\n'.join(RECORD % (i, i) for i in range(lines)).encode('utf-8')
+
+
+def string_rewriting(output: bytes):
+    return json.loads(make_json(output))
+
+
+def lazy_response(output: bytes):
+    return Response(output=output).content
+
+
+def measure_one(parse, output: bytes) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    content = parse(output)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(content) == output.count(b'\n') + 1
+    del content
+    # tracemalloc slows allocation down, time again without it.
+    start = time.perf_counter()
+    parse(output)
+    return {'seconds': time.perf_counter() - start, 'seconds_traced': elapsed, 'peak_mib': peak / 2 ** 20, 'retained_mib': retained / 2 ** 20}
+
+
+def measure(lines: int) -> dict:
+    output = make_output(lines)
+    results = {
+        'benchmark': 'response',
+        'lines': lines,
+        'output_mib': len(output) / 2 ** 20,
+        'decoder': f'{get_json_decoder().__module__}.{get_json_decoder().__qualname__}',
+        'status_only_seconds': None,
+    }
+    start = time.perf_counter()
+    Response(output=output).status
+    results['status_only_seconds'] = time.perf_counter() - start
+    results['string_rewriting'] = measure_one(string_rewriting, output)
+    results['lazy_response'] = measure_one(lazy_response, output)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=1000000)
+    print(json.dumps(measure(parser.parse_args().lines), indent=2))
@@ -0,0 +1,65 @@
+'''Calls per second of the sync API: a loop per call versus the shared background loop.
+
+``per_call`` is the former ``run_sync``, which runs every coroutine in an
+event loop created for it with ``anyio.run``; ``background`` submits it to
+the long-lived loop. Both run a bare coroutine, to isolate the loop
+overhead, and an ``AsyncCommand`` against the stub `mc`, from the main
+thread and from a pool of worker threads.
+
+Usage::
+
+    python benchmarks/bench_run_sync.py --calls 2000 --command-calls 100 --threads 8
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import concurrent.futures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiomc.testing import StubMc
+from aiomc.utils.executor import AsyncCommand, run_sync, run_sync_per_call
+
+RUNNERS = {'per_call': run_sync_per_call, 'background': run_sync}
+
+
+async def noop():
+    return None
+
+
+def rate(call, calls: int, threads: int) -> float:
+    start = time.perf_counter()
+    if threads <= 1:
+        for _ in range(calls):
+            call()
+    else:
+        with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+            for _ in pool.map(lambda _: call(), range(calls)):
+                pass
+    return calls / (time.perf_counter() - start)
+
+
+def measure(calls: int, command_calls: int, threads: int) -> dict:
+    results = {'benchmark': 'run_sync', 'calls': calls, 'command_calls': command_calls, 'threads': threads}
+    command = AsyncCommand('mc {flags} ls {target}')
+    with StubMc(mode='lines', lines=10, on_path=True):
+        for name, runner in RUNNERS.items():
+            results[f'{name}_noop_per_s'] = rate(lambda: runner(noop), calls, 1)
+            results[f'{name}_noop_threads_per_s'] = rate(lambda: runner(noop), calls, threads)
+            results[f'{name}_command_per_s'] = rate(lambda: runner(command.run, target='stub/bucket'), command_calls, 1)
+            results[f'{name}_command_threads_per_s'] = rate(lambda: runner(command.run, target='stub/bucket'), command_calls, threads)
+    for case in ('noop', 'noop_threads', 'command', 'command_threads'):
+        results[f'{case}_speedup'] = results[f'background_{case}_per_s'] / results[f'per_call_{case}_per_s']
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--command-calls', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=8)
+    options = parser.parse_args()
+    print(json.dumps(measure(options.calls, options.command_calls, options.threads), indent=2))
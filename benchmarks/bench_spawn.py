@@ -0,0 +1,67 @@
+'''Spawn rate of commands run through `/bin/sh` versus exec'd directly.
+
+`mc` is replaced by `true`, so each sample only measures process creation
+and teardown, the part of a command that exec'ing argv lists saves on.
+
+Usage::
+
+    python benchmarks/bench_spawn.py --count 500 --concurrency 16
+'''
+
+import json
+import time
+import shlex
+import shutil
+import asyncio
+import argparse
+import subprocess
+
+
+async def spawn_shell(args: list):
+    process = await asyncio.create_subprocess_shell(' '.join(shlex.quote(arg) for arg in args), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    await process.communicate()
+
+
+async def spawn_exec(args: list):
+    process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    await process.communicate()
+
+
+async def run_async(spawn, args: list, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await spawn(args)
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - start
+
+
+def run_sync(args: list, count: int, shell: bool) -> float:
+    command = ' '.join(shlex.quote(arg) for arg in args) if shell else args
+    start = time.perf_counter()
+    for _ in range(count):
+        subprocess.run(command, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return time.perf_counter() - start
+
+
+def measure(count: int, concurrency: int) -> dict:
+    args = [shutil.which('true') or '/bin/true', '--json', 'ls', 'alias/bucket/with space']
+    results = {'benchmark': 'spawn', 'count': count, 'concurrency': concurrency}
+    for name, elapsed in (
+        ('sync_shell', run_sync(args, count, shell=True)),
+        ('sync_exec', run_sync(args, count, shell=False)),
+        ('async_shell', asyncio.run(run_async(spawn_shell, args, count, concurrency))),
+        ('async_exec', asyncio.run(run_async(spawn_exec, args, count, concurrency))),
+    ):
+        results[f'{name}_per_s'] = count / elapsed
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    options = parser.parse_args()
+    print(json.dumps(measure(options.count, options.concurrency)))
@@ -13,10 +13,15 @@ root = Path(__file__).parent
 
 
 requirements = ['anyio']
+extras = {
+    # Encrypted payloads of the MinIO admin API used by the native backend.
+    'native': ['cryptography', 'argon2-cffi'],
+}
 
 args = {
     'packages': find_packages(include = ['aiomc', 'aiomc.*',]),
     'install_requires': requirements,
+    'extras_require': extras,
     'include_package_data': True,
     'long_description': root.joinpath('README.md').read_text(encoding='utf-8'),
     'entry_points': {
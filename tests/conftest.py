@@ -0,0 +1,60 @@
+import os
+import socket
+import threading
+
+import pytest
+
+from aiomc.testing import FakeS3Server, FakeMinioServer, StubMc
+
+
+def running(stub: StubMc) -> int:
+    '''Number of live stub processes started by `stub`.'''
+    count = 0
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as cmdline:
+                args = cmdline.read().split(b'\0')
+            with open(f'/proc/{pid}/stat') as stat:
+                state = stat.read().rsplit(')', 1)[1].split()[0]
+        except OSError:
+            continue
+        if state != 'Z' and any(stub.directory.encode() in arg for arg in args):
+            count += 1
+    return count
+
+
+@pytest.fixture
+def s3_server(monkeypatch):
+    with FakeS3Server() as server:
+        monkeypatch.setenv('MC_HOST_fake', server.env('fake')['MC_HOST_fake'])
+        yield server
+
+
+@pytest.fixture
+def minio_server(monkeypatch):
+    with FakeMinioServer() as server:
+        monkeypatch.setenv('MC_HOST_fake', server.env('fake')['MC_HOST_fake'])
+        yield server
+
+
+@pytest.fixture
+def hung_server(monkeypatch):
+    '''Accepts connections and never answers.'''
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    accepted = []
+
+    def accept():
+        while True:
+            try:
+                accepted.append(listener.accept()[0])
+            except OSError:
+                return
+    threading.Thread(target=accept, daemon=True).start()
+    host, port = listener.getsockname()
+    monkeypatch.setenv('MC_HOST_hung', f'http://minioadmin:minioadmin@{host}:{port}')
+    yield f'{host}:{port}'
+    listener.close()
+    for connection in accepted:
+        connection.close()
@@ -0,0 +1,100 @@
+import time
+import threading
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils.batch import map_commands, batch
+
+
+@pytest.fixture
+def stub():
+    with StubMc() as stub:
+        yield stub
+
+
+class Probe(object):
+    '''A command recording how many of its calls run at once.'''
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, value, fail: bool = False):
+        with self.lock:
+            self.calls.append(value)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise ValueError(value)
+            return value
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def test_results_come_in_input_order(stub):
+    targets = [f's3/bucket/{index}' for index in range(20)]
+    responses = list(map_commands(aiomc.stat, ({'target': target} for target in targets), max_workers=4))
+    assert [response.content['args'][-1] for response in responses] == targets
+    assert stub.runs == 20
+
+
+def test_unordered_results_carry_their_index():
+    # The first call is the slowest, so it does not come first.
+    probe = Probe()
+    slow = Probe(delay=0.2)
+    results = list(map_commands(lambda value: (probe if value else slow)(value), ({'value': value} for value in range(6)), max_workers=3, ordered=False))
+    assert sorted(results) == [(index, index) for index in range(6)]
+    assert results[0] != (0, 0)
+
+
+def test_concurrency_is_bounded():
+    probe = Probe()
+    assert list(map_commands(probe, ({'value': value} for value in range(30)), max_workers=3)) == list(range(30))
+    assert probe.peak == 3
+
+
+def test_items_are_pulled_as_calls_finish():
+    probe = Probe()
+    pulled = []
+
+    def items():
+        for value in range(1000):
+            pulled.append(value)
+            yield {'value': value}
+    results = map_commands(probe, items(), max_workers=2)
+    assert next(results) == 0
+    # Two running, and at most twice as many finished ones held for ordering.
+    assert len(pulled) <= 5
+    results.close()
+    time.sleep(0.1)
+    # Calls not started when the loop stopped are dropped.
+    assert len(probe.calls) <= 5
+
+
+def test_exceptions_are_raised_or_returned():
+    probe = Probe()
+    calls = [{'value': value, 'fail': value == 2} for value in range(4)]
+    with pytest.raises(ValueError):
+        list(map_commands(probe, iter(calls), max_workers=2))
+    results = list(map_commands(probe, iter(calls), max_workers=2, return_exceptions=True))
+    assert results[:2] + results[3:] == [0, 1, 3]
+    assert isinstance(results[2], ValueError)
+
+
+def test_batch_runs_mixed_commands(stub):
+    info, stat, failure = batch([
+        (aiomc.admin_user_info, {'target': 'prod', 'username': 'rockstar'}),
+        (aiomc.stat, {'target': 'prod/bucket/key'}),
+        (Probe(), {'value': 'x', 'fail': True}),
+    ], max_workers=2, return_exceptions=True)
+    assert info.content['args'] == ['--json', 'admin', 'user', 'info', 'prod', 'rockstar']
+    assert stat.content['args'] == ['--json', 'stat', 'prod/bucket/key']
+    assert isinstance(failure, ValueError)
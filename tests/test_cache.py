@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils import cache as cache_module
+from aiomc.utils.cache import CommandCache, configure_cache, set_cache
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(clock):
+    cache = configure_cache(ttl=5, maxsize=3)
+    yield cache
+    set_cache(None)
+
+
+@pytest.fixture
+def stub():
+    with StubMc() as stub:
+        yield stub
+
+
+def test_reads_are_served_from_the_cache(cache, stub):
+    first = aiomc.admin_user_info(target='prod', username='rockstar')
+    assert aiomc.admin_user_info(target='prod', username='rockstar') is first
+    aiomc.admin_user_info(target='prod', username='other')
+    assert stub.runs == 2
+    assert cache.stats()['hits'] == 1
+
+
+def test_entries_expire_after_the_ttl(cache, stub, clock):
+    aiomc.ls(target='prod/bucket')
+    clock.now += 4.9
+    aiomc.ls(target='prod/bucket')
+    assert stub.runs == 1
+    clock.now += 0.2
+    aiomc.ls(target='prod/bucket')
+    assert stub.runs == 2
+    assert cache.stats()['expired'] == 1
+
+
+def test_mutation_invalidates_its_alias_only(cache, stub):
+    aiomc.admin_user_info(target='prod', username='rockstar')
+    aiomc.admin_user_info(target='dev', username='rockstar')
+    aiomc.admin_user_disable(target='prod', username='rockstar')
+    aiomc.admin_user_info(target='prod', username='rockstar')
+    aiomc.admin_user_info(target='dev', username='rockstar')
+    # info prod, info dev, disable prod, info prod again.
+    assert stub.runs == 4
+
+
+def test_config_changes_invalidate_config_reads(cache, stub):
+    aiomc.config_host_list()
+    aiomc.config_host_add(alias='prod', url='https://minio.example.com', username='a', password='b')
+    aiomc.config_host_list()
+    assert stub.runs == 3
+
+
+def test_bypass_and_errors_are_not_cached(cache):
+    with StubMc() as stub:
+        aiomc.ls(target='prod/bucket')
+        aiomc.ls(target='prod/bucket', cache=False)
+        assert stub.runs == 2
+    with StubMc(mode='error') as stub:
+        aiomc.stat(target='prod/bucket/key')
+        aiomc.stat(target='prod/bucket/key')
+        assert stub.runs == 2
+
+
+def test_least_recently_used_entries_are_evicted(cache, stub):
+    for name in ('a', 'b', 'c'):
+        aiomc.ls(target=f'prod/{name}')
+    aiomc.ls(target='prod/a')
+    aiomc.ls(target='prod/d')
+    assert cache.stats()['evictions'] == 1
+    aiomc.ls(target='prod/a')
+    assert stub.runs == 4
+    aiomc.ls(target='prod/b')
+    assert stub.runs == 5
+
+
+def test_async_reads_share_the_cache(cache, stub):
+    async def main():
+        await aiomc.async_admin_user_list(target='prod')
+        await aiomc.async_admin_user_list(target='prod')
+        await aiomc.async_admin_user_remove(target='prod', username='rockstar')
+        await aiomc.async_admin_user_list(target='prod')
+    asyncio.run(main())
+    assert stub.runs == 3
+
+
+def test_read_overtaken_by_a_mutation_is_not_stored(clock):
+    cache = CommandCache(ttl=5)
+    key = ('prod', ('ls',), ())
+    generation = cache.generation('prod')
+    cache.invalidate('prod')
+    cache.put(key, generation, 'stale')
+    assert cache.get(key) is None
+    cache.put(key, cache.generation('prod'), 'fresh')
+    assert cache.get(key) == 'fresh'
+    cache.clear()
+    assert len(cache) == 0
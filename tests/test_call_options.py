@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils.executor import Command, AsyncCommand, pop_call_options
+from aiomc.utils.cache import CALL_OPTIONS
+
+
+def args_of(response) -> list:
+    content = response.content
+    return (content if isinstance(content, dict) else content[0])['args']
+
+
+def assert_no_option_flags(args: list):
+    assert not [arg for arg in args if arg.lstrip('-') in CALL_OPTIONS]
+
+
+@pytest.fixture
+def stub():
+    with StubMc() as stub:
+        yield stub
+
+
+def test_pop_call_options_strips_every_option():
+    kwargs = {name: object() for name in CALL_OPTIONS}
+    kwargs['target'] = 'prod'
+    options = pop_call_options(kwargs)
+    assert kwargs == {'target': 'prod'}
+    assert {name for name in CALL_OPTIONS if getattr(options, name) is not None} == set(CALL_OPTIONS)
+
+
+@pytest.mark.parametrize('option', ['coalesce', 'cache', 'retry', 'backend'])
+def test_sync_call_does_not_pass_options_to_mc(stub, option):
+    args = args_of(aiomc.admin_user_info(target='prod', username='y', **{option: False}))
+    assert args[-4:] == ['user', 'info', 'prod', 'y']
+    assert_no_option_flags(args)
+
+
+def test_async_run_does_not_pass_options_to_mc(stub):
+    response = asyncio.run(aiomc.async_admin_user_info(target='prod', username='y', coalesce=True, cache=False))
+    assert_no_option_flags(args_of(response))
+
+
+def test_streams_do_not_pass_options_to_mc(stub):
+    records = list(Command('mc {flags} ls {target}').stream(target='prod/bucket', coalesce=True, cache=False, timeout=30))
+    assert_no_option_flags(records[0]['args'])
+
+    async def collect():
+        return [record async for record in AsyncCommand('mc {flags} ls {target}').stream(target='prod/bucket', coalesce=True, retry=False)]
+    assert_no_option_flags(asyncio.run(collect())[0]['args'])
+
+
+def test_hedge_is_ignored_by_sync_calls_and_streams(stub):
+    policy = aiomc.HedgePolicy(min_samples=1)
+    assert_no_option_flags(args_of(aiomc.admin_user_info(target='prod', username='y', hedge=policy)))
+    records = list(Command('mc {flags} ls {target}').stream(target='prod/bucket', hedge=policy))
+    assert_no_option_flags(records[0]['args'])
+    assert policy.hedges == 0
+
+
+def test_hedge_applies_to_async_runs():
+    policy = aiomc.HedgePolicy(min_samples=3, min_delay=0.05)
+
+    async def main():
+        responses = []
+        for _ in range(4):
+            responses.append(await aiomc.async_admin_user_info(target='prod', username='y', hedge=policy))
+        return responses
+    # The fourth run sleeps, its hedge is the fifth one.
+    with StubMc(slow_every=4, sleep=30) as stub:
+        responses = asyncio.run(asyncio.wait_for(main(), 20))
+        assert stub.runs == 5
+    assert policy.hedges == 1
+    for response in responses:
+        assert_no_option_flags(args_of(response))
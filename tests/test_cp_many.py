@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+
+
+@pytest.fixture
+def stub():
+    with StubMc(mode='cp', lines=3, size=100) as stub:
+        yield stub
+
+
+def test_results_are_aggregated_in_submission_order(stub):
+    jobs = [
+        ('backup/2014/', 's3/archive/2014/', {'recursive': True}),
+        ('backup/missing.txt', 's3/archive/'),
+        {'source': 'backup/notes.txt', 'target': 's3/archive/', 'preserve': True},
+    ]
+    summary = asyncio.run(aiomc.async_cp_many(jobs, concurrency=2))
+    assert [result.source for result in summary.results] == ['backup/2014/', 'backup/missing.txt', 'backup/notes.txt']
+    assert [result.status for result in summary.results] == ['success', 'error', 'success']
+    assert summary.results[0].bytes == 300
+    assert summary.bytes == 400
+    assert not summary.ok
+    assert len(summary.succeeded) == 2
+    assert 'NoSuchKey' in summary.failed[0].error
+    assert summary.failed_jobs == [('backup/missing.txt', 's3/archive/', {})]
+    assert summary.results[2].flags == {'preserve': True}
+    assert stub.runs == 3
+
+
+def test_jobs_from_an_async_iterable(stub):
+    async def jobs():
+        for index in range(10):
+            yield (f'backup/{index}.txt', 's3/archive/')
+    summary = asyncio.run(aiomc.async_cp_many(jobs(), concurrency=4))
+    assert summary.ok
+    assert [result.source for result in summary.results] == [f'backup/{index}.txt' for index in range(10)]
+    assert summary.bytes == 1000
+
+
+def test_jobs_are_pulled_as_workers_free_up(stub):
+    pulled = []
+
+    def jobs():
+        for index in range(20):
+            pulled.append(index)
+            yield (f'backup/{index}.txt', 's3/archive/')
+
+    async def main():
+        task = asyncio.ensure_future(aiomc.async_cp_many(jobs(), concurrency=2))
+        await asyncio.sleep(0)
+        # The producer stops at the bounded queue, before running any copy.
+        assert len(pulled) <= 2 * 2 + 1
+        return await task
+    assert asyncio.run(main()).ok
+    assert len(pulled) == 20
+
+
+def test_failed_jobs_can_be_resubmitted(stub):
+    summary = aiomc.cp_many([('backup/missing.txt', 's3/archive/'), ('backup/a.txt', 's3/archive/')], concurrency=2)
+    assert len(summary.failed) == 1
+    retried = aiomc.cp_many([(source.replace('missing', 'found'), target, flags) for source, target, flags in summary.failed_jobs])
+    assert retried.ok
+    assert retried.results[0].source == 'backup/found.txt'
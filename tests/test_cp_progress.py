@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.api.cp import Throughput, ObjectCopied, CopyFailed
+from aiomc.utils.errors import NotFoundError, TransferStalledError
+from aiomc.utils.scheduler import get_scheduler
+
+from conftest import running
+
+
+def events(limit: int = None, **kwargs) -> list:
+    async def collect():
+        collected = []
+        progress = aiomc.async_cp_progress(**kwargs)
+        try:
+            async for event in progress:
+                collected.append(event)
+                if len(collected) == limit:
+                    break
+        finally:
+            await progress.aclose()
+        return collected
+    return asyncio.run(collect())
+
+
+def test_each_object_is_reported_with_running_totals():
+    with StubMc(mode='cp', lines=4, size=250):
+        copied = events(source='backup/2014/', target='s3/archive/2014/', recursive=True)
+    assert all(type(event) is ObjectCopied for event in copied)
+    assert [event.source for event in copied] == [f'backup/2014/obj-{index}' for index in range(4)]
+    assert copied[0].target == 's3/archive/2014/obj-0'
+    assert [event.transferred for event in copied] == [250, 500, 750, 1000]
+    assert [event.fraction for event in copied] == [0.25, 0.5, 0.75, 1.0]
+    assert all(event.total == 1000 and event.size == 250 for event in copied)
+    assert all(event.throughput >= 0 and event.elapsed >= 0 for event in copied)
+    assert get_scheduler().stats()['in_flight'] == 0
+
+
+def test_error_records_are_reported_as_failures():
+    with StubMc(mode='cp'):
+        failed, = events(source='backup/missing.txt', target='s3/archive/')
+    assert type(failed) is CopyFailed
+    assert isinstance(failed.error, NotFoundError)
+    assert (failed.transferred, failed.fraction) == (0, None)
+
+
+def test_stalled_copy_is_stopped():
+    with StubMc(mode='cp', delay=5) as stub:
+        with pytest.raises(TransferStalledError) as error:
+            events(source='backup/notes.txt', target='s3/archive/', stall_timeout=0.3)
+        assert running(stub) == 0
+    assert error.value.stall_timeout == 0.3
+    assert error.value.transferred == 0
+    assert get_scheduler().stats()['in_flight'] == 0
+
+
+def test_stopping_the_iteration_stops_mc():
+    # Far more records than a pipe holds, so `mc` is still writing when the consumer stops.
+    with StubMc(mode='cp', lines=200000) as stub:
+        first, = events(limit=1, source='backup/', target='s3/archive/', recursive=True)
+        assert first.source == 'backup/obj-0'
+        assert running(stub) == 0
+
+
+def test_throughput_is_measured_over_the_window():
+    meter = Throughput(window=10)
+    assert meter.rate(0) == 0.0
+    meter.add(0, 0)
+    meter.add(5, 500)
+    assert meter.rate(5) == 100
+    # Samples older than the window are dropped, the rate follows recent progress.
+    meter.add(15, 600)
+    meter.add(20, 1600)
+    assert meter.rate(20) == pytest.approx(1100 / 15)
+    meter.add(30, 1600)
+    assert meter.rate(30) == 0
@@ -0,0 +1,70 @@
+import os
+import time
+import signal
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils.executor import run_sync
+from aiomc.utils.loop import get_background_loop
+from aiomc.utils.scheduler import configure_scheduler, get_scheduler, set_scheduler
+from aiomc.utils.coalesce import get_single_flight
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+
+
+def in_child(check) -> int:
+    '''Runs `check` in a forked child and returns its exit status: 0 when it returned True.'''
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(10)
+        try:
+            status = 0 if check() else 1
+        except BaseException:
+            status = 2
+        os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+@pytest.fixture
+def busy_parent():
+    '''The scheduler's only slot is held, and a coalesced call is in flight, in the parent.'''
+    configure_scheduler(max_concurrency=1, key_limits={'prod': 1})
+    with StubMc(mode='sleep', sleep=30):
+        loop = get_background_loop()
+        futures = [
+            loop.submit(aiomc.async_ls(target='prod/bucket')),
+            loop.submit(aiomc.async_ls(target='prod/bucket')),
+            loop.submit(aiomc.async_stat(target='prod/bucket/key', coalesce=True, cache=False)),
+        ]
+        deadline = time.monotonic() + 5
+        while get_scheduler().queue_depth < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        yield
+        for future in futures:
+            future.cancel()
+        for future in futures:
+            try:
+                future.result(10)
+            except BaseException:
+                pass
+    set_scheduler(None)
+
+
+def test_child_starts_with_free_slots(busy_parent):
+    def check():
+        scheduler = get_scheduler()
+        assert (scheduler.in_flight, scheduler.queue_depth) == (0, 0)
+        assert (scheduler.max_concurrency, scheduler.limit_for('prod')) == (1, 1)
+        assert get_single_flight().stats()['in_flight'] == 0
+        with StubMc():
+            response = run_sync(aiomc.async_ls, target='prod/bucket')
+            coalesced = asyncio.run(aiomc.async_stat(target='prod/bucket/key', coalesce=True, cache=False))
+        return response.status == coalesced.status == 'success' and get_scheduler().in_flight == 0
+    assert get_scheduler().in_flight == 1
+    assert in_child(check) == 0
+    # The parent is left as it was.
+    assert get_scheduler().in_flight == 1
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from aiomc.api import iam
+from aiomc.api.iam import IAMState, plan_iam
+
+
+def current_state():
+    return IAMState.from_dict({
+        'users': {'alice': {'policy': 'readwrite'}, 'bob': {'policy': 'readonly,diagnostics'}},
+        'groups': {'devs': {'members': ['alice'], 'policy': 'readonly'}},
+    })
+
+
+def plan_for(desired: dict):
+    return plan_iam(current_state(), IAMState.from_dict(desired), 'prod')
+
+
+def described(plan) -> list:
+    return [operation.describe() for operation in plan.operations]
+
+
+def test_no_changes():
+    plan = plan_for({'users': {'alice': {'policy': 'readwrite'}}, 'groups': {'devs': {'members': ['alice'], 'policy': 'readonly'}}})
+    assert plan.empty
+
+
+def test_empty_policy_detaches():
+    plan = plan_for({'users': {'alice': {'policy': ''}, 'bob': {'policy': []}}, 'groups': {'devs': {'members': ['alice'], 'policy': None}}})
+    assert described(plan) == [
+        'unset policy readwrite (user=alice)',
+        'unset policy diagnostics,readonly (user=bob)',
+    ]
+    assert plan.operations[1].kwargs == {'name': 'diagnostics,readonly', 'user': 'bob'}
+
+
+def test_omitted_policy_is_left_alone():
+    assert plan_for({'users': {'alice': {}}, 'groups': {'devs': {'members': ['alice']}}}).empty
+
+
+def test_changed_policy_is_set():
+    plan = plan_for({'groups': {'devs': {'members': ['alice'], 'policy': 'readwrite'}}})
+    assert described(plan) == ['set policy readwrite (group=devs)']
+
+
+def test_new_empty_group_is_rejected():
+    with pytest.raises(ValueError):
+        plan_for({'groups': {'empty': {'members': []}}})
+
+
+def test_existing_group_can_be_emptied():
+    plan = plan_for({'groups': {'devs': {'members': []}}})
+    assert described(plan) == ['update group devs (-alice)']
+
+
+def test_new_user_needs_a_secret():
+    with pytest.raises(ValueError):
+        plan_for({'users': {'carol': {}}})
+
+
+def test_new_users_and_groups_change_status_after_being_created():
+    plan = plan_for({'users': {'carol': {'secret': 'verysecretpassword', 'status': 'disabled'}}, 'groups': {'ops': {'members': ['carol'], 'status': 'disabled'}}})
+    assert [(operation.phase, operation.describe()) for operation in plan.operations] == [
+        ('users', 'add user carol'),
+        ('status', 'disable user carol'),
+        ('groups', 'add group ops (+carol)'),
+        ('status', 'disable group ops'),
+    ]
+    assert plan.describe().splitlines() == ['users:', '  add user carol', 'groups:', '  add group ops (+carol)', 'status:', '  disable user carol', '  disable group ops']
+
+
+def test_reconcile_disables_new_users_once_created(monkeypatch):
+    calls = []
+
+    def command(name: str, delay: float = 0):
+        async def call(target: str, **kwargs):
+            # The slow creation would finish last if both ran at once.
+            await asyncio.sleep(delay)
+            calls.append(name)
+        return call
+
+    async def fetch(target, policies=None):
+        return current_state()
+    monkeypatch.setattr(iam, 'fetch_iam_state', fetch)
+    monkeypatch.setattr(iam, 'records', lambda response: [])
+    monkeypatch.setattr(iam, 'async_admin_user_add', command('add user', delay=0.1))
+    monkeypatch.setattr(iam, 'async_admin_user_disable', command('disable user'))
+    monkeypatch.setattr(iam, 'async_admin_group_add', command('add group', delay=0.1))
+    monkeypatch.setattr(iam, 'async_admin_group_disable', command('disable group'))
+    report = asyncio.run(iam.async_reconcile({'users': {'carol': {'secret': 'verysecretpassword', 'status': 'disabled'}}, 'groups': {'ops': {'members': ['carol'], 'status': 'disabled'}}}, 'prod'))
+    assert report.ok
+    assert calls == ['add user', 'add group', 'disable user', 'disable group']
@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous: the import takes well under a millisecond, the bound only catches regressions to eager imports.
+IMPORT_BOUND = 0.05
+
+PROBE = '''
+import sys, json, time
+start = time.perf_counter()
+import aiomc
+elapsed = time.perf_counter() - start
+executor = sys.modules.get('aiomc.utils.executor')
+print(json.dumps({
+    'elapsed': elapsed,
+    'modules': sorted(name for name in sys.modules if name.startswith('aiomc')),
+    'subprocess': 'subprocess' in sys.modules,
+    'mc_binary': executor and executor._mc_binary,
+}))
+'''
+
+
+def probe() -> dict:
+    # With no `mc` reachable, an eager lookup would fail or show up below.
+    env = dict(os.environ, PYTHONPATH=ROOT, PATH='/nonexistent')
+    env.pop('AIOMC_MC_BINARY', None)
+    result = subprocess.run([sys.executable, '-c', PROBE], env=env, capture_output=True, text=True, check=True, cwd=ROOT)
+    assert result.stderr == ''
+    return json.loads(result.stdout)
+
+
+def test_import_is_lazy():
+    result = probe()
+    assert not [name for name in result['modules'] if name.startswith('aiomc.api')]
+    assert result['modules'] == ['aiomc']
+    assert not result['subprocess']
+
+
+def test_import_does_not_look_up_mc():
+    assert probe()['mc_binary'] is None
+
+
+def test_import_time():
+    assert min(probe()['elapsed'] for _ in range(3)) < IMPORT_BOUND
+
+
+def test_attribute_access_imports_on_demand():
+    import aiomc
+    assert callable(aiomc.ls)
+    assert 'aiomc.api.ls' in sys.modules
@@ -0,0 +1,162 @@
+import time
+import threading
+import datetime
+
+import pytest
+
+from aiomc.utils import index as index_module
+from aiomc.utils.index import ListingIndex, prefix_range
+from aiomc.utils.errors import NotFoundError
+
+TOP = chr(0x10FFFF)
+
+
+def iso(seconds: float) -> str:
+    return datetime.datetime.fromtimestamp(int(seconds), datetime.timezone.utc).isoformat()
+
+
+class Bucket(object):
+    '''A lister over an in-memory bucket, printing keys the way `mc ls` and `mc find` do.'''
+
+    def __init__(self, target='s3/bucket'):
+        self.target = target
+        self.objects = {}
+        self.calls = []
+        self.error = None
+
+    def put(self, key: str, size: int = 1, age: float = 0):
+        self.objects[key] = (size, time.time() - age)
+
+    def record(self, key: str, printed: str) -> dict:
+        size, mtime = self.objects[key]
+        return {'status': 'success', 'type': 'file', 'lastModified': iso(mtime), 'size': size, 'key': printed, 'etag': ''}
+
+    def __call__(self, verb: str, target: str, **flags):
+        self.calls.append((verb, target, flags))
+        if self.error is not None:
+            return [self.error]
+        if verb == 'find':
+            cutoff = time.time() - int(flags['newer_than'].rstrip('s'))
+            return [self.record(key, f'{self.target}/{key}') for key in sorted(self.objects) if self.objects[key][1] >= cutoff]
+        prefix = target[len(self.target) + 1:]
+        base = prefix[:prefix.rfind('/') + 1]
+        return [self.record(key, key[len(base):]) for key in sorted(self.objects) if key.startswith(prefix)]
+
+
+@pytest.fixture
+def bucket():
+    bucket = Bucket()
+    for name in ('a.txt', 'logs/1.log', 'logs/2.log', 'photos/cat.jpg'):
+        bucket.put(name, age=3600)
+    return bucket
+
+
+@pytest.fixture
+def index(bucket):
+    with ListingIndex(':memory:', lister=bucket) as index:
+        yield index
+
+
+def test_refresh_picks_up_changes_since_the_last_one(index, bucket):
+    assert index.reconcile('s3/bucket/')['added'] == 4
+    assert index.status('s3/bucket')['reconciled_at'] is not None
+    bucket.put('logs/3.log', size=5)
+    bucket.put('a.txt', size=7)
+    del bucket.objects['photos/cat.jpg']
+    report = index.refresh('s3/bucket')
+    assert (report['added'], report['modified'], report['removed']) == (1, 1, 0)
+    verb, target, flags = bucket.calls[-1]
+    assert (verb, target) == ('find', 's3/bucket')
+    # Looks back to the previous refresh, plus the overlap.
+    assert int(flags['newer_than'].rstrip('s')) <= index_module.REFRESH_OVERLAP + 5
+    assert index.get('s3/bucket', 'logs/3.log')['size'] == 5
+    assert index.get('s3/bucket', 'a.txt')['size'] == 7
+    # Deletions are only seen by a reconcile.
+    assert index.get('s3/bucket', 'photos/cat.jpg') is not None
+    assert index.reconcile('s3/bucket')['removed'] == 1
+    assert index.get('s3/bucket', 'photos/cat.jpg') is None
+    assert index.status('s3/bucket')['entries'] == 4
+
+
+def test_first_refresh_reconciles(index, bucket):
+    assert index.refresh('s3/bucket')['added'] == 4
+    assert bucket.calls[0][0] == 'ls'
+    assert index.status('s3/bucket')['reconciled'] is not None
+
+
+def test_reconcile_of_a_prefix_only_touches_that_prefix(index, bucket):
+    index.reconcile('s3/bucket')
+    del bucket.objects['logs/1.log']
+    del bucket.objects['a.txt']
+    report = index.reconcile('s3/bucket', prefixes=['logs/'])
+    assert report['removed'] == 1
+    assert [entry['key'] for entry in index.scan('s3/bucket')] == ['a.txt', 'logs/2.log', 'photos/cat.jpg']
+
+
+def test_failed_listing_leaves_the_snapshot_alone(index, bucket):
+    index.reconcile('s3/bucket')
+    bucket.error = {'status': 'error', 'error': {'message': 'Bucket does not exist.', 'cause': {'error': {'Code': 'NoSuchBucket'}}}}
+    with pytest.raises(NotFoundError):
+        index.reconcile('s3/bucket')
+    assert index.status('s3/bucket')['entries'] == 4
+
+
+# Keys around U+10FFFF, and around the surrogates, which cannot be stored.
+KEYS = ['a', 'a' + TOP, 'a' + TOP + 'b', 'a' + TOP + TOP, 'b', TOP, TOP + 'x', 'z\ud7ff', 'z\ud7ffq', 'z\ue000', 'zz']
+
+
+@pytest.mark.parametrize('prefix', ['', 'a', 'a' + TOP, 'a' + TOP + TOP, TOP, 'z\ud7ff', 'z', 'zzz'])
+def test_prefix_scan(prefix):
+    bucket = Bucket()
+    for key in KEYS:
+        bucket.put(key)
+    with ListingIndex(':memory:', lister=bucket) as index:
+        index.reconcile('s3/bucket')
+        found = [entry['key'] for entry in index.scan('s3/bucket', prefix)]
+    assert found == sorted(key for key in KEYS if key.startswith(prefix))
+
+
+def test_prefix_range_at_the_top_of_the_code_space():
+    assert prefix_range('') == ('', None)
+    assert prefix_range('ab') == ('ab', 'ac')
+    assert prefix_range('a' + TOP) == ('a' + TOP, 'b')
+    assert prefix_range(TOP + TOP) == (TOP + TOP, None)
+    assert prefix_range('\ud7ff') == ('\ud7ff', '\ue000')
+
+
+def test_scan_reads_page_by_page(index, bucket, monkeypatch):
+    monkeypatch.setattr(index_module, 'SCAN_PAGE', 3)
+    for number in range(10):
+        bucket.put(f'logs/{number:02}.gz')
+    index.reconcile('s3/bucket')
+    assert [entry['key'] for entry in index.scan('s3/bucket', 'logs/')] == sorted(key for key in bucket.objects if key.startswith('logs/'))
+    assert len(index.frame('s3/bucket', 'logs/0')) == 10
+
+
+def test_threads_share_the_index(bucket, tmp_path):
+    for number in range(200):
+        bucket.put(f'logs/{number:03}.gz')
+    errors = []
+    with ListingIndex(str(tmp_path / 'listings.db'), lister=bucket) as index:
+        index.reconcile('s3/bucket')
+
+        def work(job):
+            try:
+                for _ in range(20):
+                    job()
+            except Exception as e:
+                errors.append(e)
+        jobs = [
+            lambda: index.reconcile('s3/bucket'),
+            lambda: index.refresh('s3/bucket'),
+            lambda: list(index.scan('s3/bucket', 'logs/')),
+            lambda: index.get('s3/bucket', 'a.txt'),
+            lambda: index.status('s3/bucket'),
+        ]
+        threads = [threading.Thread(target=work, args=(job,)) for job in jobs * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert index.status('s3/bucket')['entries'] == 204
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils import instrument
+from aiomc.utils.instrument import (
+    Histogram, add_listener, remove_listener, trace_commands, configure_instrumentation,
+    export_histograms, reset_histograms,
+)
+from aiomc.utils.errors import CommandTimeoutError
+
+
+@pytest.fixture
+def stub():
+    with StubMc(mode='lines', lines=5) as stub:
+        yield stub
+
+
+@pytest.fixture
+def timings():
+    timings = []
+    add_listener(timings.append)
+    yield timings
+    remove_listener(timings.append)
+
+
+@pytest.fixture
+def histograms():
+    configure_instrumentation(histograms=True)
+    yield
+    reset_histograms()
+    configure_instrumentation(histograms=False)
+
+
+def test_nothing_is_timed_while_nobody_listens(stub):
+    assert not instrument.active
+    assert aiomc.ls(target='s3/bucket').timing is None
+
+
+def test_listeners_get_every_phase(stub, timings):
+    response = aiomc.ls(target='s3/bucket')
+    asyncio.run(aiomc.async_ls(target='s3/bucket'))
+    assert len(timings) == 2
+    for timing in timings:
+        assert timing.name == 'ls'
+        assert timing.returncode == 0
+        assert timing.output_bytes > 0
+        assert timing.error is None
+        for phase in ('render', 'spawn', 'first_byte', 'exit', 'decode', 'total'):
+            assert getattr(timing, phase) >= 0
+        assert timing.total >= timing.spawn + timing.first_byte
+    assert response.timing is timings[0]
+    assert timings[0].parse is None
+    response.content
+    assert timings[0].parse >= 0
+
+
+def test_failing_listener_is_logged_and_skipped(stub, timings, caplog):
+    def broken(timing):
+        raise RuntimeError('listener bug')
+    add_listener(broken)
+    try:
+        with caplog.at_level(logging.ERROR, logger='aiomc.utils.instrument'):
+            assert aiomc.ls(target='s3/bucket').status == 'success'
+            assert asyncio.run(aiomc.async_ls(target='s3/bucket')).status == 'success'
+    finally:
+        remove_listener(broken)
+    assert len(timings) == 2
+    assert [record.exc_info[1].args for record in caplog.records] == [('listener bug',)] * 2
+
+
+def test_timeouts_are_recorded(timings):
+    with StubMc(mode='sleep', sleep=30):
+        with pytest.raises(CommandTimeoutError):
+            aiomc.ls(target='s3/bucket', timeout=0.2)
+    assert timings[0].error.startswith('CommandTimeoutError')
+    assert timings[0].total >= 0.2
+
+
+def test_trace_collects_the_runs_of_its_context(stub):
+    async def traced():
+        with trace_commands() as timings:
+            await asyncio.gather(aiomc.async_ls(target='s3/a'), aiomc.async_stat(target='s3/a/b'))
+        await aiomc.async_ls(target='s3/c')
+        return timings
+    timings = asyncio.run(traced())
+    assert sorted(timing.name for timing in timings) == ['ls', 'stat']
+    assert not instrument.active
+
+
+def test_histograms_aggregate_per_command(stub, histograms):
+    for _ in range(3):
+        aiomc.ls(target='s3/bucket').content
+    with StubMc(mode='error'):
+        aiomc.stat(target='s3/bucket/key')
+    stats = export_histograms()
+    assert (stats['ls']['runs'], stats['ls']['errors']) == (3, 0)
+    assert (stats['stat']['runs'], stats['stat']['errors']) == (1, 1)
+    total = stats['ls']['phases']['total']
+    assert total['count'] == 3
+    assert total['min'] <= total['p50'] <= total['max']
+    assert stats['ls']['phases']['parse']['count'] == 3
+    reset_histograms()
+    assert export_histograms() == {}
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    for value in [0.001] * 90 + [0.5] * 9 + [3.0]:
+        histogram.record(value)
+    assert 0.001 <= histogram.percentile(50) < 0.002
+    assert 0.5 <= histogram.percentile(99) < 1.0
+    assert histogram.percentile(100) == 3.0
+    exported = histogram.export()
+    assert exported['count'] == 100
+    assert sum(count for _, count in exported['buckets']) == 100
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils import listing
+from aiomc.utils.listing import ListingFrame, parse_timestamp
+
+NOW = parse_timestamp('2024-01-01T00:00:00Z')
+DAY = 86400
+
+RECORDS = [
+    {'status': 'success', 'type': 'folder', 'lastModified': '2023-12-31T00:00:00Z', 'size': 0, 'key': 'logs/', 'etag': ''},
+    {'status': 'success', 'type': 'file', 'lastModified': '2023-01-01T00:00:00Z', 'size': 5 << 20, 'key': 'logs/2023/01.tar', 'etag': 'd41d8cd98f00b204e9800998ecf8427e'},
+    {'status': 'success', 'type': 'file', 'lastModified': '2023-12-01T00:00:00+01:00', 'size': 10, 'key': 'logs/2023/12.txt', 'etag': 'd41d8cd98f00b204e9800998ecf8427e-3'},
+    {'status': 'success', 'type': 'file', 'lastModified': '2022-06-01T12:00:00.5Z', 'size': 2 << 20, 'key': 'log', 'etag': ''},
+    {'status': 'success', 'type': 'file', 'lastModified': '2023-06-01T00:00:00Z', 'size': 1 << 20, 'key': 'données/été.csv', 'etag': ''},
+    {'status': 'error', 'error': {'message': 'Unable to list folder.'}},
+]
+
+
+@pytest.fixture(params=['numpy', 'plain'])
+def frame(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(listing, 'get_numpy', lambda: None)
+    return ListingFrame.from_records(RECORDS)
+
+
+def test_records_round_trip(frame):
+    assert len(frame) == 5
+    assert frame.errors == [RECORDS[-1]]
+    assert frame[1] == dict(RECORDS[1], lastModified='2023-01-01T00:00:00+00:00')
+    assert frame[2]['etag'] == 'd41d8cd98f00b204e9800998ecf8427e'
+    assert frame[-1]['key'] == 'données/été.csv'
+    assert frame.total_size == (5 << 20) + 10 + (2 << 20) + (1 << 20)
+    with pytest.raises(IndexError):
+        frame[5]
+
+
+def test_parse_timestamp():
+    assert parse_timestamp('1970-01-02T00:00:00Z') == DAY
+    assert parse_timestamp('1970-01-02T01:00:00.163216097+01:00') == DAY
+    assert parse_timestamp('1970-01-01T00:00:00-00:30') == 1800
+    assert parse_timestamp('') == 0
+
+
+@pytest.mark.parametrize('prefix, expected', [
+    ('logs/', ['logs/', 'logs/2023/01.tar', 'logs/2023/12.txt']),
+    ('log', ['logs/', 'logs/2023/01.tar', 'logs/2023/12.txt', 'log']),
+    ('logs/2023/1', ['logs/2023/12.txt']),
+    ('données/', ['données/été.csv']),
+    ('logs/2023/12.txt.gz', []),
+    ('zzz', []),
+])
+def test_prefix_filter(frame, prefix, expected):
+    assert frame.filter(prefix=prefix).keys() == expected
+
+
+def test_combined_filters(frame):
+    assert frame.filter(prefix='logs/', min_size=1 << 20, now=NOW).keys() == ['logs/2023/01.tar']
+    assert frame.filter(older_than=180 * DAY, files_only=True, now=NOW).keys() == ['logs/2023/01.tar', 'log', 'données/été.csv']
+    assert frame.filter(newer_than=7 * DAY, now=NOW).keys() == ['logs/']
+    assert frame.filter(max_size=10, files_only=True).keys() == ['logs/2023/12.txt']
+    assert frame.filter(prefix='logs/').errors == frame.errors
+
+
+def test_sort(frame):
+    assert frame.sort().keys() == ['données/été.csv', 'log', 'logs/', 'logs/2023/01.tar', 'logs/2023/12.txt']
+    assert frame.sort('size', reverse=True).keys()[:2] == ['logs/2023/01.tar', 'log']
+    assert frame.sort('mtime').keys()[0] == 'log'
+    with pytest.raises(ValueError):
+        frame.sort('etag')
+
+
+def test_column_is_a_copy_and_the_frame_keeps_growing(frame):
+    sizes = frame.column('sizes')
+    frame.append({'key': 'late', 'size': 7})
+    assert list(sizes) == [0, 5 << 20, 10, 2 << 20, 1 << 20]
+    assert list(frame.column('sizes'))[-1] == 7
+    assert frame.filter(prefix='la').keys() == ['late']
+
+
+def test_empty_frame(frame):
+    empty = ListingFrame()
+    assert len(empty) == 0
+    assert empty.total_size == 0
+    assert empty.filter(prefix='a', min_size=1).keys() == []
+    assert empty.sort('size').keys() == []
+
+
+def test_columnar_ls():
+    with StubMc(mode='lines', lines=100):
+        frame = aiomc.ls(target='s3/bucket', recursive=True, columnar=True)
+        async_frame = asyncio.run(aiomc.async_ls(target='s3/bucket', recursive=True, columnar=True))
+    assert isinstance(frame, ListingFrame)
+    assert frame.keys() == async_frame.keys() == [f'dir/key-{index}' for index in range(100)]
+    assert frame.filter(prefix='dir/key-9').keys() == ['dir/key-9'] + [f'dir/key-{index}' for index in range(90, 100)]
@@ -0,0 +1,37 @@
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.api.mirror import balance
+
+
+PREFIXES = [('', 1, 1), ('a/', 10, 1), ('b/', 6, 5), ('c/', 4, 9)]
+
+
+def test_balance_puts_the_largest_prefixes_on_the_lightest_shards():
+    plan = balance(PREFIXES, 2)
+    assert [shard.prefixes for shard in plan] == [['a/', ''], ['b/', 'c/']]
+    assert [shard.bytes for shard in plan] == [11, 10]
+    plan = balance(PREFIXES, 2, by='objects')
+    assert [shard.prefixes for shard in plan] == [['c/'], ['b/', '', 'a/']]
+
+
+def test_balance_by_prefixes_keeps_the_listing_order():
+    plan = balance(PREFIXES, 2, by='prefixes')
+    assert [shard.prefixes for shard in plan] == [['', 'b/'], ['a/', 'c/']]
+    with pytest.raises(ValueError):
+        balance(PREFIXES, 2, by='size')
+
+
+@pytest.mark.parametrize('by, runs', [
+    # One `mc ls`, one `mc du` per folder, one `mc mirror` per folder and one for the top-level files.
+    ('bytes', 1 + 4 + 5),
+    ('prefixes', 1 + 5),
+])
+def test_sharded_mirror_sizes_folders_unless_balanced_by_prefixes(by, runs):
+    with StubMc(mode='tree', lines=4, sleep=0) as stub:
+        summary = aiomc.mirror('s3/source', 'backup/target', shards=2, by=by)
+        assert stub.runs == runs
+    assert summary.ok
+    assert [result.source for result in summary.results] == ['s3/source'] + [f's3/source/dir-{index}/' for index in range(4)]
+    assert summary.objects == 5
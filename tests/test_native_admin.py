@@ -0,0 +1,79 @@
+import json
+import time
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.utils.errors import CommandTimeoutError
+
+pytest.importorskip('cryptography')
+
+
+def records(response):
+    content = response.content
+    return content if isinstance(content, list) else [content]
+
+
+def test_user_lifecycle(minio_server):
+    added = records(aiomc.admin_user_add(target='fake', username='rockstar', password='verysecret', backend='native'))[0]
+    assert added['status'] == 'success'
+    assert minio_server.users['rockstar']['status'] == 'enabled'
+    aiomc.admin_user_disable(target='fake', username='rockstar', backend='native')
+    assert minio_server.users['rockstar']['status'] == 'disabled'
+    listed = records(aiomc.admin_user_list(target='fake', backend='native'))
+    assert [(record['accessKey'], record['userStatus']) for record in listed] == [('rockstar', 'disabled')]
+    info = records(aiomc.admin_user_info(target='fake', username='rockstar', backend='native'))[0]
+    assert info['userStatus'] == 'disabled'
+    aiomc.admin_user_remove(target='fake', username='rockstar', backend='native')
+    assert 'rockstar' not in minio_server.users
+
+
+def test_missing_user_is_an_error_record(minio_server):
+    response = aiomc.admin_user_info(target='fake', username='ghost', backend='native')
+    assert response.status == 'error'
+
+
+def test_group_lifecycle(minio_server):
+    for username in ('alice', 'bob'):
+        aiomc.admin_user_add(target='fake', username=username, password='verysecret', backend='native')
+    aiomc.admin_group_add(target='fake', group='devs', members=['alice', 'bob'], backend='native')
+    info = records(aiomc.admin_group_info(target='fake', group='devs', backend='native'))[0]
+    assert sorted(info['members']) == ['alice', 'bob']
+    aiomc.admin_group_remove(target='fake', group='devs', members=['bob'], backend='native')
+    aiomc.admin_group_disable(target='fake', group='devs', backend='native')
+    info = records(aiomc.admin_group_info(target='fake', group='devs', backend='native'))[0]
+    assert info['members'] == ['alice']
+    assert info['groupStatus'] == 'disabled'
+    assert records(aiomc.admin_group_list(target='fake', backend='native'))[0]['groups'] == ['devs']
+
+
+def test_policy_lifecycle(minio_server, tmp_path):
+    document = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': ['s3:GetObject'], 'Resource': ['arn:aws:s3:::photos/*']}]}
+    path = tmp_path / 'policy.json'
+    path.write_text(json.dumps(document))
+    aiomc.admin_user_add(target='fake', username='alice', password='verysecret', backend='native')
+    aiomc.admin_policy_add(target='fake', name='photos', file=str(path), backend='native')
+    assert 'photos' in [record['policy'] for record in records(aiomc.admin_policy_list(target='fake', backend='native'))]
+    info = records(aiomc.admin_policy_info(target='fake', name='photos', backend='native'))[0]
+    assert info['policyJSON']['Statement'] == document['Statement']
+    aiomc.admin_policy_set(target='fake', name='photos', user='alice', backend='native')
+    assert records(aiomc.admin_user_info(target='fake', username='alice', backend='native'))[0]['policyName'] == 'photos'
+    aiomc.admin_policy_remove(target='fake', name='photos', backend='native')
+    assert 'photos' not in minio_server.policies
+
+
+def test_async_admin_calls(minio_server):
+    async def main():
+        await aiomc.async_admin_user_add(target='fake', username='alice', password='verysecret', backend='native')
+        return await aiomc.async_admin_user_list(target='fake', backend='native')
+    assert records(asyncio.run(main()))[0]['accessKey'] == 'alice'
+
+
+def test_timeout_on_hung_server(hung_server):
+    start = time.monotonic()
+    with pytest.raises(CommandTimeoutError):
+        aiomc.admin_user_info(target='hung', username='alice', backend='native', timeout=0.5)
+    with pytest.raises(CommandTimeoutError):
+        asyncio.run(aiomc.async_admin_group_list(target='hung', backend='native', timeout=0.5))
+    assert time.monotonic() - start < 5
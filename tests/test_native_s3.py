@@ -0,0 +1,90 @@
+import time
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.utils.errors import CommandTimeoutError
+
+
+def records(response):
+    content = response.content
+    return content if isinstance(content, list) else [content]
+
+
+def test_ls_bucket_and_prefixes(s3_server):
+    s3_server.put('bucket', 'photos/cat.jpg', b'meow')
+    s3_server.put('bucket', 'photos/2024/dog.jpg', b'woof!')
+    s3_server.put('bucket', 'readme.txt', b'hi')
+    top = records(aiomc.ls(target='fake/bucket', backend='native'))
+    assert sorted((record['type'], record['key']) for record in top) == [('file', 'readme.txt'), ('folder', 'photos/')]
+    nested = records(aiomc.ls(target='fake/bucket/photos/', recursive=True, backend='native'))
+    assert sorted(record['key'] for record in nested) == ['2024/dog.jpg', 'cat.jpg']
+    assert {record['key']: record['size'] for record in nested}['cat.jpg'] == 4
+
+
+def test_ls_follows_pagination(monkeypatch):
+    from aiomc.testing import FakeS3Server
+    with FakeS3Server(max_keys=3) as server:
+        monkeypatch.setenv('MC_HOST_fake', server.env('fake')['MC_HOST_fake'])
+        for index in range(10):
+            server.put('bucket', f'key-{index:02d}', b'x')
+        listed = records(aiomc.ls(target='fake/bucket', backend='native'))
+    assert [record['key'] for record in listed] == [f'key-{index:02d}' for index in range(10)]
+
+
+def test_ls_missing_bucket_is_an_error_record(s3_server):
+    response = aiomc.ls(target='fake/nope', backend='native')
+    assert response.status == 'error'
+
+
+def test_stat_object(s3_server):
+    s3_server.put('bucket', 'a/b.txt', b'hello', content_type='text/plain')
+    record = records(aiomc.stat(target='fake/bucket/a/b.txt', backend='native'))[0]
+    assert record['status'] == 'success'
+    assert record['name'] == 'b.txt'
+    assert record['size'] == 5
+    assert record['metadata']['content-type'] == 'text/plain'
+
+
+def test_cp_upload_download_and_server_side(s3_server, tmp_path):
+    s3_server.put('bucket', 'existing', b'')
+    source = tmp_path / 'source.bin'
+    source.write_bytes(b'payload' * 100)
+    uploaded = records(aiomc.cp(source=str(source), target='fake/bucket/dir/', backend='native'))[0]
+    assert uploaded['status'] == 'success'
+    assert uploaded['target'] == 'fake/bucket/dir/source.bin'
+    copied = records(aiomc.cp(source='fake/bucket/dir/source.bin', target='fake/bucket/copy.bin', backend='native'))[0]
+    assert copied['size'] == 700
+    downloaded = tmp_path / 'out.bin'
+    records(aiomc.cp(source='fake/bucket/copy.bin', target=str(downloaded), backend='native'))
+    assert downloaded.read_bytes() == source.read_bytes()
+
+
+def test_requests_reuse_connections(s3_server):
+    s3_server.put('bucket', 'key', b'x')
+    for _ in range(5):
+        aiomc.stat(target='fake/bucket/key', backend='native')
+    assert s3_server.connections <= 2
+
+
+def test_async_ls(s3_server):
+    s3_server.put('bucket', 'key', b'x')
+    response = asyncio.run(aiomc.async_ls(target='fake/bucket', backend='native'))
+    assert records(response)[0]['key'] == 'key'
+
+
+def test_timeout_on_hung_server(hung_server):
+    start = time.monotonic()
+    with pytest.raises(CommandTimeoutError):
+        aiomc.ls(target='hung/bucket', backend='native', timeout=0.5)
+    assert time.monotonic() - start < 5
+
+
+def test_default_timeout_on_hung_server(hung_server):
+    aiomc.set_default_timeout(0.5)
+    try:
+        with pytest.raises(CommandTimeoutError):
+            asyncio.run(aiomc.async_stat(target='hung/bucket/key', backend='native'))
+    finally:
+        aiomc.set_default_timeout(None)
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.api.policy import normalized_policy, policy_hash
+
+SCALAR = {'Version': '2012-10-17', 'Statement': {'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': 'arn:aws:s3:::photos/*'}}
+# The same policy as MinIO returns it.
+STORED = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': ['s3:GetObject'], 'Resource': ['arn:aws:s3:::photos/*']}]}
+
+
+def test_normalized_policy_matches_server_form():
+    assert normalized_policy(SCALAR) == normalized_policy(STORED)
+    assert policy_hash(SCALAR) == policy_hash(STORED)
+
+
+def test_normalized_policy_sorts_lists_and_conditions():
+    first = {'Statement': [{'Action': ['s3:PutObject', 's3:GetObject'], 'Condition': {'StringLike': {'s3:prefix': 'home/'}}}]}
+    second = {'Statement': [{'Action': ['s3:GetObject', 's3:PutObject'], 'Condition': {'StringLike': {'s3:prefix': ['home/']}}}]}
+    assert normalized_policy(first) == normalized_policy(second)
+    assert normalized_policy(first) != normalized_policy({'Statement': [{'Action': ['s3:GetObject']}]})
+
+
+def test_document_and_file_are_exclusive(tmp_path):
+    with pytest.raises(ValueError):
+        aiomc.admin_policy_add(target='prod', name='photos', document=SCALAR, file=str(tmp_path / 'policy.json'))
+    with pytest.raises(ValueError):
+        asyncio.run(aiomc.async_admin_policy_add(target='prod', name='photos', document=SCALAR, file=str(tmp_path / 'policy.json')))
+
+
+def test_identical_upload_is_skipped(minio_server):
+    pytest.importorskip('cryptography')
+    minio_server.policies['photos'] = STORED
+    response = aiomc.admin_policy_add(target='fake', name='photos', document=SCALAR, backend='native')
+    assert response.content['unchanged'] is True
+    changed = dict(SCALAR, Statement=dict(SCALAR['Statement'], Action='s3:PutObject'))
+    response = aiomc.admin_policy_add(target='fake', name='photos', document=changed, backend='native')
+    assert 'unchanged' not in response.content
+    assert minio_server.policies['photos']['Statement']['Action'] == 's3:PutObject'
@@ -0,0 +1,83 @@
+import sys
+import json
+import types
+
+import pytest
+
+from aiomc.utils import executor
+from aiomc.utils.executor import Response, get_json_decoder, set_json_decoder
+
+
+@pytest.fixture
+def counting_decoder():
+    calls = []
+
+    def loads(text):
+        calls.append(text)
+        return json.loads(text)
+    set_json_decoder(loads)
+    yield calls
+    set_json_decoder(None)
+
+
+def test_content_is_decoded_once_on_first_access(counting_decoder):
+    response = Response(name='ls', output=b'{"status": "success", "key": "a"}\n{"status": "success", "key": "b"}\n')
+    assert counting_decoder == []
+    assert [record['key'] for record in response.content] == ['a', 'b']
+    decoded = len(counting_decoder)
+    assert response.content is response.content
+    assert len(counting_decoder) == decoded
+
+
+def test_status_does_not_decode_successful_output(counting_decoder):
+    response = Response(output=b'{"status": "success", "key": "a"}\n')
+    assert response.status == 'success'
+    assert counting_decoder == []
+
+
+def test_status_decodes_output_mentioning_an_error(counting_decoder):
+    output = json.dumps({'status': 'error', 'error': {'message': 'Unable to stat.'}}, indent=1).encode()
+    response = Response(output=output)
+    assert response.status == 'error'
+    assert counting_decoder
+    assert response.content['error']['message'] == 'Unable to stat.'
+
+
+def test_single_record_decodes_to_a_dict_and_str_output_is_accepted():
+    assert Response(output='{"status": "success"}\n').content == {'status': 'success'}
+    assert Response(output=b'').content == []
+    assert Response(output=BrokenPipeError()).content == {}
+
+
+def test_content_setter_resets_status():
+    response = Response(output=b'{"status": "success"}')
+    assert response.status == 'success'
+    response.content = {'status': 'error'}
+    assert response.status == 'error'
+
+
+def test_response_has_no_instance_dict():
+    with pytest.raises(AttributeError):
+        Response().anything = 1
+
+
+@pytest.mark.parametrize('installed, expected', [
+    (('orjson', 'msgspec'), 'orjson'),
+    (('msgspec',), 'msgspec'),
+    ((), 'json'),
+])
+def test_fastest_installed_decoder_is_picked(monkeypatch, installed, expected):
+    modules = {
+        'orjson': types.SimpleNamespace(loads=lambda text: ('orjson', text)),
+        'msgspec': types.SimpleNamespace(json=types.SimpleNamespace(Decoder=lambda: types.SimpleNamespace(decode=lambda text: ('msgspec', text)))),
+    }
+    for name, module in modules.items():
+        # A None entry makes the import fail, as if the package were missing.
+        monkeypatch.setitem(sys.modules, name, module if name in installed else None)
+    monkeypatch.setattr(executor, '_loads', None)
+    loads = get_json_decoder()
+    if expected == 'json':
+        assert loads is json.loads
+    else:
+        assert loads('{}') == (expected, '{}')
+    assert get_json_decoder() is loads
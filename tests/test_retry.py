@@ -0,0 +1,153 @@
+import json
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils.errors import (
+    MinioError, TransientError, ThrottledError, NetworkError, AccessDeniedError,
+    NotFoundError, ConflictError, InvalidRequestError, CommandTimeoutError, classify_error,
+)
+from aiomc.utils.executor import Response
+from aiomc.utils.retry import RetryBudget, RetryPolicy, run_with_retry, async_run_with_retry, set_retry_policy
+
+
+def record(code: str = '', status=None, message: str = 'Unable to list folder.', cause: str = '') -> dict:
+    details = {'Code': code}
+    if status is not None:
+        details['StatusCode'] = status
+    return {'status': 'error', 'error': {'message': message, 'cause': {'message': cause, 'error': details}}}
+
+
+@pytest.mark.parametrize('error, cls', [
+    (record('SlowDown'), ThrottledError),
+    (record('InternalError'), TransientError),
+    (record('AccessDenied'), AccessDeniedError),
+    (record('NoSuchBucket'), NotFoundError),
+    (record('BucketNotEmpty'), ConflictError),
+    (record(status=503), ThrottledError),
+    (record(status='500'), TransientError),
+    (record(status=400), InvalidRequestError),
+    # The code wins over the HTTP status.
+    (record('NoSuchKey', status=503), NotFoundError),
+    (record(cause='read tcp 10.0.0.1:9000: connection reset by peer'), NetworkError),
+    (record(cause='Something else'), MinioError),
+    ({'status': 'error', 'error': 'dial tcp: i/o timeout'}, NetworkError),
+    ('not a record', MinioError),
+])
+def test_classify_error(error, cls):
+    assert type(classify_error(error)) is cls
+
+
+def test_classified_error_details():
+    error = classify_error({'status': 'error', 'error': {'message': 'Unable to stat.', 'cause': {'message': 'Slow down.', 'error': {'Code': 'SlowDown', 'StatusCode': 503, 'Key': 'a/b'}}}})
+    assert (error.code, error.status_code, error.resource, error.retryable) == ('SlowDown', 503, 'a/b', True)
+    assert str(error) == 'Unable to stat.:Slow down.'
+    assert not classify_error(record('AccessDenied')).retryable
+
+
+def test_backoff_grows_exponentially_up_to_the_cap():
+    policy = RetryPolicy(base=0.5, cap=3, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3, 3]
+    jittered = RetryPolicy(base=0.5, cap=3)
+    assert all(0 <= jittered.backoff(3) <= 2.0 for _ in range(100))
+
+
+def test_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def failing(codes: list):
+    '''A call failing with each of `codes` in turn, then succeeding.'''
+    calls = []
+
+    def call():
+        calls.append(len(calls))
+        if len(calls) <= len(codes):
+            return Response(output=json.dumps(record(codes[len(calls) - 1])).encode())
+        return Response(output=b'{"status": "success"}')
+    return call, calls
+
+
+def no_wait(**kwargs):
+    return RetryPolicy(base=0, jitter=False, **kwargs)
+
+
+def test_transient_errors_are_retried():
+    call, calls = failing(['SlowDown', 'InternalError'])
+    assert run_with_retry(call, no_wait()).status == 'success'
+    assert len(calls) == 3
+
+
+def test_attempts_are_bounded_and_the_last_response_returned():
+    call, calls = failing(['SlowDown'] * 5)
+    policy = no_wait(max_attempts=3)
+    response = run_with_retry(call, policy)
+    assert response.status == 'error'
+    assert len(calls) == 3
+    assert policy.stats()['retries'] == 2
+    assert policy.stats()['exhausted'] == 1
+
+
+def test_permanent_errors_are_not_retried():
+    call, calls = failing(['AccessDenied'])
+    assert run_with_retry(call, no_wait()).status == 'error'
+    assert len(calls) == 1
+
+
+def test_empty_budget_stops_retries():
+    policy = no_wait(max_attempts=10, budget=RetryBudget(ratio=0, reserve=2))
+    call, calls = failing(['SlowDown'] * 5)
+    assert run_with_retry(call, policy).status == 'error'
+    assert len(calls) == 3
+
+
+def test_timeouts_are_retried_then_raised():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise CommandTimeoutError('mc ls', 1, 1.0)
+    with pytest.raises(CommandTimeoutError):
+        asyncio.run(async_run_with_retry(call, no_wait(max_attempts=2)))
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def policy():
+    policy = no_wait(max_attempts=3)
+    set_retry_policy(policy)
+    yield policy
+    set_retry_policy(None)
+
+
+def test_global_policy_retries_reads(policy):
+    with StubMc(failures=2, code='SlowDown') as stub:
+        assert aiomc.ls(target='prod/bucket').status == 'success'
+        assert stub.runs == 3
+    with StubMc(failures=2, code='SlowDown') as stub:
+        assert asyncio.run(aiomc.async_stat(target='prod/bucket/key')).status == 'success'
+        assert stub.runs == 3
+
+
+def test_global_policy_leaves_mutations_alone(policy):
+    with StubMc(failures=2, code='SlowDown') as stub:
+        assert aiomc.cp(source='a.txt', target='prod/bucket/').status == 'error'
+        assert asyncio.run(aiomc.async_admin_user_add(target='prod', username='a', password='b')).status == 'error'
+        assert stub.runs == 2
+
+
+def test_mutations_are_retried_on_request():
+    with StubMc(failures=2, code='SlowDown') as stub:
+        assert aiomc.cp(source='a.txt', target='prod/bucket/', retry=no_wait()).status == 'success'
+        assert stub.runs == 3
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+from aiomc.utils.scheduler import CommandScheduler
+
+
+def test_global_and_per_key_limits():
+    scheduler = CommandScheduler(max_concurrency=4, per_key_limit=2)
+    peak = {}
+
+    async def work(key):
+        async with scheduler.slot(key):
+            active = scheduler.stats()['in_flight_per_key'][key]
+            peak[key] = max(peak.get(key, 0), active)
+            assert scheduler.in_flight <= 4
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(work(key) for key in ['a', 'b', 'c'] * 10))
+    asyncio.run(main())
+    assert peak == {'a': 2, 'b': 2, 'c': 2}
+    assert scheduler.stats()['in_flight'] == 0
+    assert scheduler.queue_depth == 0
+
+
+def test_saturated_key_does_not_starve_others():
+    scheduler = CommandScheduler(max_concurrency=2)
+    scheduler.set_limit('busy', 1)
+    order = []
+
+    async def work(key, delay):
+        async with scheduler.slot(key):
+            order.append(key)
+            await asyncio.sleep(delay)
+
+    async def main():
+        await asyncio.gather(work('busy', 0.05), work('busy', 0.0), work('busy', 0.0), work('idle', 0.0))
+    asyncio.run(main())
+    # The idle alias goes ahead of the busy ones queued before it.
+    assert order.index('idle') == 1
+
+
+def test_cancelled_waiters_are_skipped():
+    scheduler = CommandScheduler(max_concurrency=1)
+
+    async def main():
+        await scheduler.acquire('a')
+        waiters = [asyncio.ensure_future(scheduler.acquire('a')) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 5
+        for waiter in waiters[:4]:
+            waiter.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 1
+        scheduler.release('a')
+        await waiters[4]
+        scheduler.release('a')
+    asyncio.run(main())
+    assert scheduler.stats()['in_flight'] == 0
+    assert scheduler.queue_depth == 0
+
+
+def test_slot_granted_to_closed_loop_is_released():
+    scheduler = CommandScheduler(max_concurrency=1)
+    loop = asyncio.new_event_loop()
+    queued = threading.Event()
+
+    async def wait():
+        queued.set()
+        await scheduler.acquire('a')
+
+    async def main():
+        await scheduler.acquire('a')
+        thread = threading.Thread(target=lambda: loop.run_until_complete(asyncio.wait([loop.create_task(wait())], timeout=0.05)))
+        thread.start()
+        thread.join()
+        loop.close()
+        scheduler.release('a')
+    asyncio.run(main())
+    assert queued.is_set()
+    assert scheduler.stats()['in_flight'] == 0
+
+
+def test_release_does_not_rescan_saturated_keys():
+    scheduler = CommandScheduler(max_concurrency=2)
+    scheduler.set_limit('busy', 1)
+    inspected = []
+    head = scheduler._head
+
+    def counting_head(key):
+        inspected.append(key)
+        return head(key)
+    scheduler._head = counting_head
+
+    async def main():
+        await scheduler.acquire('busy')
+        busy = [asyncio.ensure_future(scheduler.acquire('busy')) for _ in range(20000)]
+        free = [asyncio.ensure_future(scheduler.acquire('free')) for _ in range(2000)]
+        await asyncio.sleep(0)
+        order, peak = [], 0
+        for index, waiter in enumerate(free):
+            await waiter
+            order.append(index)
+            peak = max(peak, scheduler.stats()['in_flight_per_key']['free'])
+            scheduler.release('free')
+        for waiter in busy:
+            waiter.cancel()
+        await asyncio.gather(*busy, return_exceptions=True)
+        scheduler.release('busy')
+        return order, peak
+    order, peak = asyncio.run(main())
+    assert order == list(range(2000))
+    assert peak == 1
+    # Each release looks at the head of every alias queue, never at the
+    # 20000 busy waiters queued behind it.
+    assert len(inspected) <= 2 * 2 * 2000
+    assert scheduler.queue_depth == 0
+    assert scheduler.stats()['in_flight'] == 0
@@ -0,0 +1,63 @@
+import asyncio
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils.executor import Command, AsyncCommand, RecordDecoder
+from aiomc.utils.scheduler import get_scheduler
+
+from conftest import running
+
+
+def test_stream_ls_yields_every_entry_in_order():
+    async def collect():
+        return [entry async for entry in aiomc.stream_ls(target='s3/bucket', recursive=True)]
+    with StubMc(mode='lines', lines=500):
+        entries = asyncio.run(collect())
+    assert [entry['key'] for entry in entries] == [f'dir/key-{index}' for index in range(500)]
+    assert get_scheduler().stats()['in_flight'] == 0
+
+
+def test_sync_stream_yields_every_entry_in_order():
+    with StubMc(mode='lines', lines=500):
+        entries = list(Command('mc {flags} ls {target}').stream(target='s3/bucket'))
+    assert [entry['size'] for entry in entries] == list(range(500))
+
+
+def test_closing_the_stream_early_stops_mc():
+    async def first():
+        records = AsyncCommand('mc {flags} ls {target}').stream(target='s3/bucket')
+        async for entry in records:
+            break
+        await records.aclose()
+        return entry
+    # Far more output than a pipe holds, so `mc` is still writing when the consumer stops.
+    with StubMc(mode='lines', lines=200000, size=200) as stub:
+        assert asyncio.run(first())['key'].startswith('dir/key-0')
+        assert running(stub) == 0
+    assert get_scheduler().stats()['in_flight'] == 0
+
+
+def test_sync_stream_closed_early_stops_mc():
+    with StubMc(mode='lines', lines=200000, size=200) as stub:
+        records = Command('mc {flags} ls {target}').stream(target='s3/bucket')
+        assert next(records)['size'] == 0
+        records.close()
+        assert running(stub) == 0
+
+
+def test_multi_line_error_record_is_reassembled():
+    async def collect():
+        return [record async for record in aiomc.stream_ls(target='s3/bucket')]
+    with StubMc(mode='error', code='NoSuchBucket'):
+        records = asyncio.run(collect())
+    assert len(records) == 1
+    assert records[0]['status'] == 'error'
+    assert records[0]['error']['cause']['error']['Code'] == 'NoSuchBucket'
+
+
+def test_record_decoder_skips_noise_and_accepts_bytes():
+    decoder = RecordDecoder()
+    lines = [b'\n', b'{\n', b' "status": "error",\n', b' "error": {"message": "x"}\n', b'}\n', b'{"status": "success", "key": "a"}\n']
+    records = [record for record in map(decoder.feed, lines) if record is not None]
+    assert records == [{'status': 'error', 'error': {'message': 'x'}}, {'status': 'success', 'key': 'a'}]
+    assert decoder.pending == []
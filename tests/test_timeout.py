@@ -0,0 +1,86 @@
+import time
+import asyncio
+
+import pytest
+
+import aiomc
+from aiomc.testing import StubMc
+from aiomc.utils.executor import Command, AsyncCommand, KILL_GRACE
+from aiomc.utils.errors import CommandTimeoutError
+
+from conftest import running
+
+TIMEOUT = 0.5
+# Time allowed past the timeout: SIGTERM, at most KILL_GRACE before SIGKILL, and process start-up.
+SLACK = KILL_GRACE + 2
+
+
+@pytest.fixture(params=['sleep', 'hang'])
+def stub(request):
+    with StubMc(mode=request.param, sleep=60) as stub:
+        yield stub
+
+
+def assert_stopped(stub: StubMc, start: float):
+    assert time.monotonic() - start < TIMEOUT + SLACK
+    assert running(stub) == 0
+
+
+def test_sync_command(stub):
+    start = time.monotonic()
+    with pytest.raises(CommandTimeoutError) as error:
+        aiomc.ls(target='s3/bucket', timeout=TIMEOUT)
+    assert error.value.timeout == TIMEOUT
+    assert_stopped(stub, start)
+
+
+def test_async_command(stub):
+    start = time.monotonic()
+    with pytest.raises(CommandTimeoutError):
+        asyncio.run(aiomc.async_ls(target='s3/bucket', timeout=TIMEOUT))
+    assert_stopped(stub, start)
+
+
+def test_default_timeout(stub):
+    aiomc.set_default_timeout(TIMEOUT)
+    start = time.monotonic()
+    try:
+        with pytest.raises(CommandTimeoutError):
+            aiomc.stat(target='s3/bucket/key')
+    finally:
+        aiomc.set_default_timeout(None)
+    assert_stopped(stub, start)
+
+
+def test_sync_stream(stub):
+    start = time.monotonic()
+    with pytest.raises(CommandTimeoutError):
+        list(Command('mc {flags} ls {target}').stream(target='s3/bucket', timeout=TIMEOUT))
+    assert_stopped(stub, start)
+
+
+def test_async_stream(stub):
+    async def collect():
+        return [record async for record in AsyncCommand('mc {flags} ls {target}').stream(target='s3/bucket', timeout=TIMEOUT)]
+    start = time.monotonic()
+    with pytest.raises(CommandTimeoutError):
+        asyncio.run(collect())
+    assert_stopped(stub, start)
+
+
+def test_cancellation_stops_mc(stub):
+    async def main():
+        task = asyncio.ensure_future(aiomc.async_ls(target='s3/bucket'))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    start = time.monotonic()
+    asyncio.run(main())
+    assert_stopped(stub, start)
+
+
+def test_fast_command_is_not_affected():
+    with StubMc(mode='sleep', sleep=0.1):
+        response = aiomc.ls(target='s3/bucket', timeout=10)
+    assert response.status == 'success'